@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Async chat load benchmark
+
+Drives the FastAPI app in-process with N concurrent /chat requests against a
+fake LLM with fixed latency, and compares the legacy path (sync ``chat`` called
+from the async route) with the async ``achat`` path. While the load runs, a
+/health probe measures head-of-line blocking of the event loop.
+
+Usage:
+    python benchmarks/async_chat_load.py --latency 0.2 --concurrency 1 8 32 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.api import routes
+
+
+class SlowChatModel(BaseChatModel):
+    """Chat model stand-in that answers after a fixed delay."""
+
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "SlowChatModel":
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+def install_fake_llm(latency: float) -> None:
+    """Swap the module-level agents onto the fake model."""
+    model = SlowChatModel(latency=latency)
+    routes.agent.llm = model
+    routes.agent.graph = routes.agent._create_graph()
+    routes.modern_agent.llm = model
+    routes.modern_agent.agent = routes.modern_agent._create_agent()
+
+
+def use_legacy_path(enabled: bool) -> None:
+    """Route achat through the blocking sync chat, as the old handlers did."""
+    for target in (routes.agent, routes.modern_agent):
+        if enabled:
+            sync_chat = target.chat
+
+            async def blocking_achat(user_input: str, session_id: str = "default", _chat=sync_chat):
+                return _chat(user_input, session_id)
+
+            target.achat = blocking_achat
+        else:
+            target.__dict__.pop("achat", None)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int) -> dict:
+    """Fire ``concurrency`` requests at once and probe /health while they run.
+
+    Latencies are measured from the moment the burst is released, so time
+    spent queued behind a blocked event loop is included.
+    """
+    latencies: List[float] = []
+    probe: Optional[float] = None
+    start = time.perf_counter()
+
+    async def one(i: int) -> None:
+        response = await client.post(path, json={"message": "hi", "session_id": f"bench-{i}"})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    async def health_probe() -> None:
+        nonlocal probe
+        await asyncio.sleep(0.01)
+        await client.get("/health")
+        probe = time.perf_counter() - start - 0.01
+
+    await asyncio.gather(health_probe(), *(one(i) for i in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "wall": wall,
+        "throughput": concurrency / wall,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "health": probe or 0.0,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    install_fake_llm(args.latency)
+    transport = httpx.ASGITransport(app=routes.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for mode in ("legacy", "async"):
+            use_legacy_path(mode == "legacy")
+            print(f"\n📊 {mode} path ({args.path}, LLM latency {args.latency * 1000:.0f}ms)")
+            print(f"{'conc':>6} {'wall s':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'/health ms':>11}")
+            for concurrency in args.concurrency:
+                r = await run_level(client, args.path, concurrency)
+                print(f"{r['concurrency']:>6} {r['wall']:>8.2f} {r['throughput']:>8.1f} "
+                      f"{r['p50'] * 1000:>8.0f} {r['p95'] * 1000:>8.0f} {r['health'] * 1000:>11.0f}")
+        use_legacy_path(False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /chat load benchmark with a fake LLM")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--path", default="/chat", choices=["/chat", "/chat/modern"])
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
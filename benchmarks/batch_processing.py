@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Batch processing throughput benchmark
+
+Pushes N stub items through BatchProcessingNode on every backend, once with
+an I/O-bound processor (sleeps) and once with a CPU-bound one (hashing), and
+reports items per second.
+
+Usage:
+    python benchmarks/batch_processing.py --items 200 --batch-size 10 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.custom_nodes import BatchProcessingNode
+
+LATENCY = 0.01
+ROUNDS = 20000
+
+
+def io_bound(item: int) -> int:
+    time.sleep(LATENCY)
+    return item
+
+
+async def aio_bound(item: int) -> int:
+    await asyncio.sleep(LATENCY)
+    return item
+
+
+def cpu_bound(item: int) -> str:
+    digest = str(item).encode()
+    for _ in range(ROUNDS):
+        digest = hashlib.sha256(digest).digest()
+    return digest.hex()
+
+
+async def acpu_bound(item: int) -> str:
+    return cpu_bound(item)
+
+
+def items_per_second(backend: str, processor, items: int, batch_size: int, workers: int) -> float:
+    node = BatchProcessingNode(batch_size=batch_size, backend=backend, processor=processor, max_workers=workers)
+    # Generator input: the node never sees a materialized list
+    result = node.process_batch(i for i in range(items))
+    assert result["successful_items"] == items
+    return items / result["processing_time"]
+
+
+def main():
+    global LATENCY, ROUNDS
+    parser = argparse.ArgumentParser(description="BatchProcessingNode throughput per backend")
+    parser.add_argument("--items", type=int, default=200, help="Items per run")
+    parser.add_argument("--batch-size", type=int, default=10, help="Items per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size / async concurrency")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds each I/O-bound item sleeps")
+    parser.add_argument("--rounds", type=int, default=20000, help="SHA-256 rounds per CPU-bound item")
+    args = parser.parse_args()
+    LATENCY, ROUNDS = args.latency, args.rounds
+
+    print(f"{args.items} items, batch size {args.batch_size}")
+    print(f"{'backend':<12} {'I/O items/s':>12} {'CPU items/s':>12}")
+    for backend in BatchProcessingNode.BACKENDS:
+        io, cpu = (aio_bound, acpu_bound) if backend == "async" else (io_bound, cpu_bound)
+        workers = args.workers or (os.cpu_count() if backend == "process" else None)
+        print(f"{backend:<12} "
+              f"{items_per_second(backend, io, args.items, args.batch_size, workers):>12.0f} "
+              f"{items_per_second(backend, cpu, args.items, args.batch_size, workers):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
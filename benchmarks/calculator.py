@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Calculator microbenchmarks
+
+Compares the old ``eval`` path of the calculate tool with the safe
+``Calculator``, both on a cold cache (every expression parsed and compiled)
+and a warm one (compiled expression reused), and times how long a
+pathological expression takes to be rejected.
+
+Usage:
+    python benchmarks/calculator.py --number 20000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.calculator import Calculator, CalculatorError
+
+EXPRESSIONS = [
+    "2 + 3",
+    "(12.5 * 4 - 3) / 7",
+    "2 ** 16 + 3 ** 5 - 17 // 4",
+    "sqrt(144) + abs(-3) * max(1, 2, 3)",
+]
+
+
+def per_call_us(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="eval vs safe calculator")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    namespace = {"sqrt": __import__("math").sqrt}
+    print(f"{'expression':<38} {'eval us':>9} {'cold us':>9} {'warm us':>9}")
+    for expression in EXPRESSIONS:
+        cold = Calculator(cache_size=0)
+        warm = Calculator()
+        warm.evaluate(expression)
+        results = (
+            per_call_us(lambda: eval(expression, namespace), args.number),
+            per_call_us(lambda: cold.evaluate(expression), args.number),
+            per_call_us(lambda: warm.evaluate(expression), args.number),
+        )
+        print(f"{expression:<38} " + " ".join(f"{r:>9.2f}" for r in results))
+
+    calc = Calculator()
+
+    def reject():
+        try:
+            calc.evaluate("9**9**9")
+        except CalculatorError:
+            pass
+
+    # eval("9**9**9") would run for hours; only the safe path is timed
+    print(f"\n9**9**9 rejected in {per_call_us(reject, 1000):.2f} us (eval: does not finish)")
+
+
+if __name__ == "__main__":
+    main()
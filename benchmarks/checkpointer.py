@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Checkpointer benchmark
+
+Drives the checkpointer backends directly with agent-shaped traffic: each
+session appends a checkpoint (its growing message history) plus one batch of
+pending writes per task (``--tasks`` run in parallel, like parallel tool
+calls) per turn, from ``--workers`` threads at once. Reports:
+
+- write throughput (turns/s) and per-turn latency
+- latest-state read latency (``get_tuple`` of a random session)
+- commits: fsyncs for the file backend, transactions for SQLite
+- restart recovery: time until every session is readable again in a fresh
+  instance. ``InMemorySaver`` loses its state on restart, so its figure is the
+  time to replay every turn into an empty store (the best case for a process
+  that has to rebuild sessions from elsewhere).
+
+Durable writes cost what the disk's fsync costs; ``--fsync-ms`` adds a fixed
+delay to each one to see how the modes behave on slower storage than the
+machine running the benchmark.
+
+Usage:
+    python benchmarks/checkpointer.py --sessions 200 --turns 10 --workers 8
+    python benchmarks/checkpointer.py --fsync-ms 2 --tasks 4
+    python benchmarks/checkpointer.py --backends file:group file:none
+    python benchmarks/checkpointer.py --sessions 10000 --turns 3 --backends memory sqlite
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.agent.checkpointers import FileSaver, SqliteSaver, file_saver
+
+
+def build(backend: str, directory: str):
+    kind, _, option = backend.partition(":")
+    if kind == "memory":
+        return InMemorySaver()
+    if kind == "file":
+        return FileSaver(directory, durability=option or "group")
+    if kind == "sqlite":
+        return SqliteSaver(os.path.join(directory, "checkpoints.db"), synchronous=option or "NORMAL")
+    raise SystemExit(f"unknown backend {backend!r}")
+
+
+def turn(saver, session: str, i: int, history: list, payload: str, tasks: ThreadPoolExecutor, n_tasks: int) -> None:
+    history += [HumanMessage(content=f"{payload} {i}"), AIMessage(content=f"{payload} reply {i}")]
+    checkpoint = empty_checkpoint()
+    version = f"{i + 1:032}.0"
+    checkpoint["channel_values"] = {"messages": list(history)}
+    checkpoint["channel_versions"] = {"messages": version}
+    config = {"configurable": {"thread_id": session, "checkpoint_ns": ""}}
+    config = saver.put(config, checkpoint, {"source": "loop", "step": i}, {"messages": version})
+    # Parallel tool calls record their writes concurrently
+    list(tasks.map(lambda t: saver.put_writes(config, [("messages", history[-1])], task_id=f"task-{i}-{t}"),
+                   range(n_tasks)))
+
+
+def write_phase(saver, args) -> list:
+    """Every session's turns, sessions interleaved across workers; per-turn latencies."""
+    payload = "x" * args.message_chars
+    tasks = ThreadPoolExecutor(args.workers * args.tasks)
+
+    def session(s: int) -> list:
+        history, times = [], []
+        for i in range(args.turns):
+            start = time.perf_counter()
+            turn(saver, f"session-{s}", i, history, payload, tasks, args.tasks)
+            times.append(time.perf_counter() - start)
+        return times
+
+    with tasks, ThreadPoolExecutor(args.workers) as pool:
+        return [t for times in pool.map(session, range(args.sessions)) for t in times]
+
+
+def read_phase(saver, args) -> list:
+    rng = random.Random(0)
+    times = []
+    for _ in range(args.reads):
+        config = {"configurable": {"thread_id": f"session-{rng.randrange(args.sessions)}"}}
+        start = time.perf_counter()
+        assert saver.get_tuple(config) is not None
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def recover(backend: str, directory: str, args) -> float:
+    start = time.perf_counter()
+    saver = build(backend, directory)
+    if isinstance(saver, InMemorySaver):
+        write_phase(saver, args)
+    for s in range(args.sessions):
+        assert saver.get_tuple({"configurable": {"thread_id": f"session-{s}"}}) is not None
+    elapsed = time.perf_counter() - start
+    if hasattr(saver, "close"):
+        saver.close()
+    return elapsed
+
+
+def ms(values: list, q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else values[0] * 1000
+
+
+def run(backend: str, args) -> dict:
+    directory = tempfile.mkdtemp(prefix="checkpoints-")
+    try:
+        saver = build(backend, directory)
+        start = time.perf_counter()
+        writes = write_phase(saver, args)
+        elapsed = time.perf_counter() - start
+        reads = read_phase(saver, args)
+        stats = saver.stats() if hasattr(saver, "stats") else {}
+        if hasattr(saver, "close"):
+            saver.close()
+        return {
+            "backend": backend,
+            "turns_per_s": len(writes) / elapsed,
+            "write_p50": ms(writes, 50),
+            "write_p99": ms(writes, 99),
+            "read_p50": ms(reads, 50),
+            "read_p99": ms(reads, 99),
+            "recovery": recover(backend, directory, args),
+            "fsyncs": stats.get("fsyncs", stats.get("commits", "-")),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="checkpointer write, read and recovery timings")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10, help="Checkpoints per session")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent writer threads")
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--message-chars", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=1, help="Parallel tasks writing per turn")
+    parser.add_argument("--fsync-ms", type=float, default=0,
+                        help="Extra latency per fsync, to model a slower disk than this machine's")
+    parser.add_argument("--backends", nargs="+", default=["memory", "file:group", "file:always", "file:none", "sqlite", "sqlite:full"])
+    args = parser.parse_args()
+
+    if args.fsync_ms:
+        def slowed(sync):
+            def slow_sync(fd):
+                sync(fd)
+                time.sleep(args.fsync_ms / 1000)
+            return slow_sync
+        os.fsync = slowed(os.fsync)
+        # The file backend syncs its records with fdatasync where available
+        file_saver._fdatasync = slowed(file_saver._fdatasync)
+
+    print(f"\n📊 {args.sessions} sessions × {args.turns} turns × {args.tasks} tasks, {args.workers} writers, "
+          f"{args.message_chars}-char messages, +{args.fsync_ms}ms per fsync")
+    print(f"{'backend':<12} {'turns/s':>9} {'write p50':>10} {'write p99':>10} {'read p50':>9} {'read p99':>9} "
+          f"{'recovery':>9} {'commits':>8}")
+    for backend in args.backends:
+        r = run(backend, args)
+        print(f"{r['backend']:<12} {r['turns_per_s']:>9.0f} {r['write_p50']:>8.2f}ms {r['write_p99']:>8.2f}ms "
+              f"{r['read_p50']:>7.3f}ms {r['read_p99']:>7.3f}ms {r['recovery']:>8.2f}s {r['fsyncs']:>7}")
+
+
+if __name__ == "__main__":
+    main()
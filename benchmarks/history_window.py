@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Long-session history benchmark
+
+Runs a 200-turn conversation through ``LangGraphAgent`` against a fake LLM
+whose latency grows with the prompt (``base + per_token * prompt_tokens``),
+as real providers do, and reports per-turn latency, prompt size and
+checkpointed message count with:
+
+- no windowing (full history sent every turn)
+- a token window
+- a token window with rolling summaries and pruned state
+
+Usage:
+    python benchmarks/history_window.py --turns 200 --max-tokens 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Windows are passed explicitly below; keep the env default out of the baseline
+os.environ["CONTEXT_MAX_TOKENS"] = "0"
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent.core import LangGraphAgent
+from src.agent.history import ConversationWindow
+
+FILLER = "lorem ipsum dolor sit amet consectetur adipiscing elit " * 6
+
+
+class PromptCostModel(BaseChatModel):
+    """Chat model stand-in whose latency scales with the prompt size."""
+
+    base_latency: float = 0.005
+    per_token: float = 0.000002
+    prompt_tokens: List[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "prompt-cost-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "PromptCostModel":
+        return self
+
+    def _reply(self, messages) -> ChatResult:
+        tokens = count_tokens_approximately(messages)
+        self.prompt_tokens.append(tokens)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"noted. {FILLER}"))]), tokens
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        result, tokens = self._reply(messages)
+        time.sleep(self.base_latency + self.per_token * tokens)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        result, tokens = self._reply(messages)
+        await asyncio.sleep(self.base_latency + self.per_token * tokens)
+        return result
+
+
+def run_session(label: str, window, model: PromptCostModel, turns: int, report: List[int]) -> None:
+    agent = LangGraphAgent(context_window=window)
+    agent.llm = model
+    agent.graph = agent._create_graph()
+
+    print(f"\n📊 {label}")
+    print(f"{'turn':>6} {'latency ms':>11} {'prompt tok':>11} {'state msgs':>11}")
+    total = 0.0
+    for turn in range(1, turns + 1):
+        start = time.perf_counter()
+        result = asyncio.run(agent.achat(f"turn {turn}: {FILLER}", "bench"))
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        if turn in report:
+            print(f"{turn:>6} {elapsed * 1000:>11.1f} {model.prompt_tokens[-1]:>11} {len(result['messages']):>11}")
+    print(f"{'total':>6} {total:>11.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn latency over a long session")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=2000, help="Context window budget")
+    parser.add_argument("--per-token", type=float, default=0.000002, help="Fake LLM seconds per prompt token")
+    args = parser.parse_args()
+
+    report = sorted({1, 50, 100, args.turns} & set(range(1, args.turns + 1)))
+
+    def model() -> PromptCostModel:
+        return PromptCostModel(per_token=args.per_token, prompt_tokens=[])
+
+    run_session("full history", None, model(), args.turns, report)
+
+    windowed = model()
+    run_session(
+        f"window ({args.max_tokens} tokens)",
+        ConversationWindow(max_tokens=args.max_tokens),
+        windowed, args.turns, report,
+    )
+
+    # Summaries are generated by the same fake model, so their cost is included
+    summarizing = model()
+    run_session(
+        f"window + summary + prune ({args.max_tokens} tokens)",
+        ConversationWindow(max_tokens=args.max_tokens, summarizer=summarizing, prune_messages=True),
+        summarizing, args.turns, report,
+    )
+
+
+if __name__ == "__main__":
+    main()
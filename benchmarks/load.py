@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Offline load benchmark
+
+Drives the FastAPI app in-process against the scripted fake LLM
+(``LLM_PROVIDER=fake``), so results depend on the code and not on the model
+API. For each concurrency level, that many clients send /chat requests back
+to back until ``--requests`` have completed; the report gives p50/p95/p99
+latency, throughput, errors and process RSS.
+
+Results can be saved with ``--save`` and compared with an earlier run (for
+example on another commit) with ``--compare``:
+
+    python benchmarks/load.py --save before.json
+    git checkout my-branch
+    python benchmarks/load.py --compare before.json
+
+Usage:
+    python benchmarks/load.py --latency lognormal:0.05,0.5 --tool-rate 0.3 --concurrency 1 16 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def configure(args: argparse.Namespace) -> None:
+    """Point the app at the fake model; must run before the app is imported."""
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": args.latency,
+        "FAKE_LLM_TOOL_RATE": str(args.tool_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+        "AGENT_PRELOAD": "false",
+    })
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_level(client, path: str, concurrency: int, requests: int, sessions: int) -> dict:
+    """Closed loop: ``concurrency`` clients share ``requests`` requests."""
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker() -> None:
+        nonlocal errors, issued
+        while issued < requests:
+            i = issued
+            issued += 1
+            start = time.perf_counter()
+            response = await client.post(path, json={"message": f"request {i}",
+                                                     "session_id": f"load-{i % sessions}"})
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "wall": wall,
+        "throughput": len(latencies) / wall,
+        "p50": percentile(latencies, 50) if latencies else 0.0,
+        "p95": percentile(latencies, 95) if latencies else 0.0,
+        "p99": percentile(latencies, 99) if latencies else 0.0,
+        "rss_mb": rss_mb(),
+    }
+
+
+# (key, header, scale, format, higher is better)
+COLUMNS = [
+    ("throughput", "req/s", 1, ".1f", True),
+    ("p50", "p50 ms", 1000, ".1f", False),
+    ("p95", "p95 ms", 1000, ".1f", False),
+    ("p99", "p99 ms", 1000, ".1f", False),
+    ("rss_mb", "RSS MB", 1, ".1f", False),
+]
+
+
+def print_report(levels: List[dict], baseline: Optional[Dict[int, dict]] = None) -> None:
+    header = f"{'conc':>6} {'errors':>7} " + " ".join(f"{title:>10}" for _, title, *_ in COLUMNS)
+    if baseline:
+        header += "   change vs baseline"
+    print(header)
+    for r in levels:
+        line = f"{r['concurrency']:>6} {r['errors']:>7} " + " ".join(
+            f"{r[key] * scale:>10{fmt}}" for key, _, scale, fmt, _ in COLUMNS
+        )
+        before = (baseline or {}).get(r["concurrency"])
+        if before:
+            changes = []
+            for key, title, _, _, higher_is_better in COLUMNS:
+                if before[key]:
+                    delta = (r[key] - before[key]) / before[key] * 100
+                    better = delta > 0 if higher_is_better else delta < 0
+                    # Changes under 5% are treated as noise
+                    mark = "" if abs(delta) < 5 else " ✓" if better else " ✗"
+                    changes.append(f"{title.split()[0]} {delta:+.0f}%{mark}")
+            line += "   " + ", ".join(changes)
+        print(line)
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    configure(args)
+    import httpx
+    from src.api import routes
+
+    transport = httpx.ASGITransport(app=routes.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Build the agent and warm caches before measuring
+        await run_level(client, args.path, 1, args.warmup, args.sessions)
+        levels = [
+            await run_level(client, args.path, concurrency, args.requests, args.sessions)
+            for concurrency in args.concurrency
+        ]
+
+    return {
+        "revision": args.label or git_revision(),
+        "python": platform.python_version(),
+        "settings": {"path": args.path, "latency": args.latency, "tool_rate": args.tool_rate,
+                     "seed": args.seed, "requests": args.requests, "sessions": args.sessions},
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process /chat load benchmark against the fake LLM")
+    parser.add_argument("--path", default="/chat", choices=["/chat", "/chat/modern"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before the first level")
+    parser.add_argument("--sessions", type=int, default=50, help="Distinct session ids to spread requests over")
+    parser.add_argument("--latency", default="lognormal:0.05,0.5",
+                        help="Fake LLM delay per call, e.g. 0.05, uniform:0.02,0.1, lognormal:0.05,0.5")
+    parser.add_argument("--tool-rate", type=float, default=0.3, help="Share of requests that make a tool call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="Name for this run in saved results (default: git revision)")
+    parser.add_argument("--save", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Results JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+        if before.get("settings") != result["settings"]:
+            print(f"⚠️  {args.compare} was run with different settings: {before.get('settings')}")
+        baseline = {level["concurrency"]: level for level in before["levels"]}
+        print(f"Baseline: {before['revision']}")
+
+    s = result["settings"]
+    print(f"\n📊 {s['path']} at {result['revision']} (LLM latency {s['latency']}, tool rate {s['tool_rate']}, "
+          f"{s['requests']} requests per level)")
+    print_report(result["levels"], baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Parallel tool execution benchmark
+
+Runs one agent turn in which the model asks for N slow stub tools at once
+(fake model, no API key needed) and compares sequential execution with the
+concurrent tools node, for sync and async stub tools.
+
+Usage:
+    python benchmarks/parallel_tools.py --calls 8 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CONTEXT_MAX_TOKENS", "0")
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from src.agent import tool_execution
+from src.agent.core import LangGraphAgent
+from src.agent.tool_execution import ToolExecutor
+from tests.fakes import FakeChatModel, use_model
+
+
+def stub_tools(latency: float):
+    def slow_sync(n: int) -> str:
+        """Blocking stub tool."""
+        time.sleep(latency)
+        return str(n)
+
+    async def slow_async(n: int) -> str:
+        """Non-blocking stub tool."""
+        await asyncio.sleep(latency)
+        return str(n)
+
+    return [
+        StructuredTool.from_function(slow_sync, name="slow_sync"),
+        StructuredTool.from_function(coroutine=slow_async, name="slow_async"),
+    ]
+
+
+def turn_seconds(tool_name: str, calls: int, latency: float, workers: int) -> float:
+    tool_execution._default = ToolExecutor(max_workers=workers, timeout=None)
+    model = FakeChatModel(replies=[
+        AIMessage(content="", tool_calls=[
+            {"name": tool_name, "args": {"n": i}, "id": f"call-{i}"} for i in range(calls)
+        ]),
+        "done",
+    ])
+    agent = LangGraphAgent(llm=model)
+    agent.tools = stub_tools(latency)
+    use_model(agent, model)
+    started = time.perf_counter()
+    result = asyncio.run(agent.achat("go", f"bench-{tool_name}-{workers}"))
+    elapsed = time.perf_counter() - started
+    assert sum(m.type == "tool" for m in result["messages"]) == calls
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent tool calls in one turn")
+    parser.add_argument("--calls", type=int, default=8, help="Tool calls requested in one model turn")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds each stub tool takes")
+    parser.add_argument("--workers", type=int, default=8, help="Pool size for the concurrent run")
+    args = parser.parse_args()
+
+    print(f"{args.calls} calls x {args.latency:.2f}s")
+    print(f"{'tool':<12} {'sequential s':>12} {f'{args.workers} workers s':>12} {'speedup':>8}")
+    for tool_name in ("slow_sync", "slow_async"):
+        # Async tools ignore the pool, so the single-worker sync run is the sequential baseline
+        baseline = (turn_seconds(tool_name, args.calls, args.latency, 1) if tool_name == "slow_sync"
+                    else args.calls * args.latency)
+        parallel = turn_seconds(tool_name, args.calls, args.latency, args.workers)
+        print(f"{tool_name:<12} {baseline:>12.2f} {parallel:>12.2f} {baseline / parallel:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Trace replay benchmark
+
+Re-drives a recorded request trace (``TRACE_FILE`` JSONL, see
+``src/api/trace.py``) against the FastAPI app in-process with the scripted
+fake LLM, at the recorded pace or N times faster, and compares latency and
+throughput with the recording. Requests on one session keep their order by
+default; the time they spent waiting for their session and the latency by
+turn position show how session interleaving and the growing checkpointed
+history affect the run.
+
+Record a trace, then replay it (``--save``/``--compare`` diff two replays,
+e.g. before and after a change):
+
+    TRACE_FILE=trace.jsonl uvicorn src.api.routes:app
+    python benchmarks/replay.py trace.jsonl --speed 1 4 --save before.json
+    python benchmarks/replay.py trace.jsonl --speed 1 4 --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def configure(args: argparse.Namespace) -> None:
+    """Point the app at the fake model; must run before the app is imported."""
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": args.latency,
+        "FAKE_LLM_TOOL_RATE": str(args.tool_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+        "AGENT_PRELOAD": "false",
+    })
+    os.environ.pop("TRACE_FILE", None)
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+
+def ms(value: Optional[float]) -> str:
+    return f"{value * 1000:.1f}" if value else "-"
+
+
+def delta(now: float, before: float) -> str:
+    return f"{(now - before) / before * 100:+.0f}%" if before else "-"
+
+
+def print_run(speed: float, summary: dict, baseline: Optional[dict] = None) -> None:
+    replayed, recorded = summary["replayed"], summary["recorded"]
+    print(f"\n📊 {speed:g}x: {summary['requests']} requests in {summary['wall']:.2f}s "
+          f"({summary['throughput']:.1f} req/s), {summary['errors']} errors, "
+          f"{summary['status_changes']} status changes, {summary['session_busy']} session-busy (409)")
+    print(f"{'':>14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print(f"{'recorded':>14} " + " ".join(f"{ms(recorded[p]):>9}" for p in ("p50", "p95", "p99")))
+    print(f"{'replayed':>14} " + " ".join(f"{ms(replayed[p]):>9}" for p in ("p50", "p95", "p99")))
+    print(f"{'  vs recorded':>14} " + " ".join(f"{delta(replayed[p], recorded[p]):>9}" for p in ("p50", "p95", "p99")))
+    if baseline:
+        print(f"{'  vs baseline':>14} " + " ".join(
+            f"{delta(replayed[p], baseline['replayed'][p]):>9}" for p in ("p50", "p95", "p99")
+        ) + f"   throughput {delta(summary['throughput'], baseline['throughput'])}")
+    print(f"{'first byte':>14} " + " ".join(f"{ms(summary['first_byte'][p]):>9}" for p in ("p50", "p95", "p99")))
+    print(f"{'session wait':>14} " + " ".join(f"{ms(summary['session_wait'][p]):>9}" for p in ("p50", "p95", "p99")))
+    print("p50 by turn in session: " + ", ".join(f"{turn}: {ms(p50)}ms" for turn, p50 in summary["by_turn"].items()))
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, dict]:
+    configure(args)
+    import httpx
+    from src.api import routes
+    from src.api.trace import load_trace, replay, summarize
+
+    records = load_trace(args.trace)
+    if args.limit:
+        records = records[:args.limit]
+    transport = httpx.ASGITransport(app=routes.app)
+    runs = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None) as client:
+        for speed in args.speed:
+            # Fresh sessions per run, so runs do not share checkpointed history
+            results = await replay(client, records, speed=speed, preserve_order=not args.no_order,
+                                   session_prefix=f"replay-{speed:g}x:")
+            runs[f"{speed:g}"] = summarize(results)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded request trace against the app with a fake LLM")
+    parser.add_argument("trace", help="JSONL trace written by TraceMiddleware (TRACE_FILE)")
+    parser.add_argument("--speed", type=float, nargs="+", default=[1.0], help="Replay pace multipliers, e.g. 1 4")
+    parser.add_argument("--no-order", action="store_true",
+                        help="Send each request at its recorded time even if its session is still busy")
+    parser.add_argument("--limit", type=int, help="Replay only the first N requests")
+    parser.add_argument("--latency", default="lognormal:0.05,0.5", help="Fake LLM delay per call")
+    parser.add_argument("--tool-rate", type=float, default=0.3, help="Share of requests that make a tool call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write the replay summaries as JSON to this file")
+    parser.add_argument("--compare", help="Summaries JSON from an earlier replay to compare against")
+    args = parser.parse_args()
+
+    runs = asyncio.run(main_async(args))
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    for speed, summary in runs.items():
+        print_run(float(speed), summary, baseline.get(speed))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(runs, f, indent=2)
+        print(f"\nSaved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
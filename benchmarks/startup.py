@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+API startup benchmark
+
+Measures, each in a fresh interpreter, how long it takes to import the API
+module and then to build the enabled agent variants (what the first request,
+or the background warm-up, pays). Runs once per ``AGENT_VARIANTS`` setting.
+
+Usage:
+    python benchmarks/startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, os, time
+start = time.perf_counter()
+from src.api import routes
+imported = time.perf_counter()
+routes.agents.warm_up()
+built = time.perf_counter()
+print(json.dumps({"import": imported - start, "build": built - imported}))
+"""
+
+
+def measure(variants: str) -> dict:
+    env = dict(os.environ, AGENT_VARIANTS=variants, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "sk-benchmark"))
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and agent build time of the API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--variants", nargs="+", default=["custom,modern", "custom", "modern"])
+    args = parser.parse_args()
+
+    print(f"{'AGENT_VARIANTS':<16} {'import ms':>10} {'build ms':>10} {'total ms':>10}")
+    for variants in args.variants:
+        runs = [measure(variants) for _ in range(args.runs)]
+        imp = statistics.median(r["import"] for r in runs) * 1000
+        build = statistics.median(r["build"] for r in runs) * 1000
+        print(f"{variants:<16} {imp:>10.0f} {build:>10.0f} {imp + build:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
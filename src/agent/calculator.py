@@ -0,0 +1,222 @@
+"""
+Safe arithmetic evaluator for the calculate tool
+
+Expressions come straight from the model, so they are never handed to
+``eval``. Instead they are parsed with ``ast``, checked against a whitelist of
+numeric literals, arithmetic operators, constants and math functions, and
+compiled into a tree of closures. Compiled expressions are kept in an LRU
+cache, so repeated expressions skip parsing entirely.
+
+Evaluation is bounded:
+
+- expressions longer than ``max_length`` characters are rejected
+- at most ``max_operations`` operators and calls per expression
+- integer exponents above ``max_exponent`` and results wider than
+  ``max_bits`` are refused before they are computed (``9**9**9`` fails
+  in microseconds instead of pinning a core)
+- evaluation stops once ``timeout`` seconds have elapsed
+- complex and non-finite results (``(-8)**(1/3)``, ``1e308*10``) are
+  rejected rather than returned
+
+Besides Python arithmetic syntax it accepts ``^`` for powers, ``sqrt(x)``,
+``x%`` for percentages and ``x% of y``.
+"""
+
+import ast
+import math
+import operator
+import re
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Union
+
+Number = Union[int, float]
+
+FUNCTIONS: Dict[str, Callable[..., Number]] = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "exp": math.exp,
+    "log": math.log,
+    "log10": math.log10,
+    "log2": math.log2,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+}
+
+CONSTANTS: Dict[str, float] = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+_PERCENT_OF = re.compile(r"(\d+(?:\.\d+)?|\.\d+)\s*%\s*of\b", re.IGNORECASE)
+# "15%" not followed by an operand (otherwise it is the modulo operator)
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?|\.\d+)\s*%(?!\s*[\w.(])")
+
+
+class CalculatorError(ValueError):
+    """Raised for expressions that are invalid, unsupported or over a limit."""
+
+
+class Calculator:
+    """Whitelisting arithmetic evaluator with a compiled-expression cache."""
+
+    def __init__(
+        self,
+        max_length: int = 500,
+        max_operations: int = 100,
+        max_exponent: int = 10_000,
+        max_bits: int = 4096,
+        timeout: float = 0.05,
+        cache_size: int = 1024,
+    ):
+        self.max_length = max_length
+        self.max_operations = max_operations
+        self.max_exponent = max_exponent
+        self.max_bits = max_bits
+        self.timeout = timeout
+        self._compile = lru_cache(maxsize=cache_size)(self._compile_uncached)
+
+    def evaluate(self, expression: str) -> Number:
+        """Evaluate ``expression`` and return an int or float."""
+        program = self._compile(expression.strip())
+        try:
+            return program(time.perf_counter() + self.timeout)
+        except CalculatorError:
+            raise
+        except ZeroDivisionError:
+            raise CalculatorError("division by zero") from None
+        except (OverflowError, ValueError, TypeError) as e:
+            raise CalculatorError(str(e)) from None
+
+    def cache_info(self):
+        """Hit/miss statistics of the compiled-expression cache."""
+        return self._compile.cache_info()
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _compile_uncached(self, expression: str) -> Callable[[float], Number]:
+        if not expression:
+            raise CalculatorError("empty expression")
+        if len(expression) > self.max_length:
+            raise CalculatorError(f"expression longer than {self.max_length} characters")
+
+        source = _PERCENT_OF.sub(r"(\1/100)*", expression)
+        source = _PERCENT.sub(r"(\1/100)", source).replace("^", "**")
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError:
+            raise CalculatorError("invalid syntax") from None
+
+        operations = sum(
+            isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Call)) for node in ast.walk(tree)
+        )
+        if operations > self.max_operations:
+            raise CalculatorError(f"more than {self.max_operations} operations")
+        return self._node(tree.body)
+
+    def _node(self, node: ast.AST) -> Callable[[float], Number]:
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise CalculatorError(f"unsupported literal {value!r}")
+            _check_result(value)
+            return lambda deadline: value
+
+        if isinstance(node, ast.Name):
+            if node.id not in CONSTANTS:
+                raise CalculatorError(f"unknown name '{node.id}'")
+            value = CONSTANTS[node.id]
+            return lambda deadline: value
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            op, operand = _UNARY_OPS[type(node.op)], self._node(node.operand)
+            return lambda deadline: op(operand(deadline))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            return self._binary(node)
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise CalculatorError("unsupported function call")
+            if node.keywords:
+                raise CalculatorError("keyword arguments are not supported")
+            func = FUNCTIONS[node.func.id]
+            args = [self._node(arg) for arg in node.args]
+
+            def call(deadline: float) -> Number:
+                return _check_result(func(*(arg(deadline) for arg in args)))
+            return call
+
+        raise CalculatorError(f"unsupported syntax: {type(node).__name__}")
+
+    def _binary(self, node: ast.BinOp) -> Callable[[float], Number]:
+        left, right = self._node(node.left), self._node(node.right)
+        op = _BINARY_OPS[type(node.op)]
+        check = {ast.Pow: self._check_pow, ast.Mult: self._check_mul}.get(type(node.op))
+
+        def binary(deadline: float) -> Number:
+            a, b = left(deadline), right(deadline)
+            if time.perf_counter() > deadline:
+                raise CalculatorError("evaluation timed out")
+            if check is not None:
+                check(a, b)
+            return _check_result(op(a, b))
+        return binary
+
+    # ------------------------------------------------------------------
+    # Limits
+    # ------------------------------------------------------------------
+
+    def _check_pow(self, base: Number, exponent: Number) -> None:
+        if not (isinstance(base, int) and isinstance(exponent, int)):
+            return  # float powers overflow with OverflowError instead
+        if abs(exponent) > self.max_exponent and abs(base) > 1:
+            raise CalculatorError(f"exponent larger than {self.max_exponent}")
+        if exponent > 0 and (abs(base).bit_length() - 1) * exponent > self.max_bits:
+            raise CalculatorError(f"result larger than {self.max_bits} bits")
+
+    def _check_mul(self, a: Number, b: Number) -> None:
+        if isinstance(a, int) and isinstance(b, int):
+            if a.bit_length() + b.bit_length() > self.max_bits + 1:
+                raise CalculatorError(f"result larger than {self.max_bits} bits")
+
+
+def _check_result(value: Number) -> Number:
+    """Refuse values a real-number calculator cannot report."""
+    if isinstance(value, complex):
+        raise CalculatorError("complex result")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise CalculatorError("result out of range")
+    return value
+
+
+def format_number(value: Number) -> str:
+    """Render results without a trailing ``.0`` for whole floats."""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return str(value)
+
+
+_default = Calculator()
+
+
+def evaluate(expression: str) -> Number:
+    """Evaluate ``expression`` with the shared default calculator."""
+    return _default.evaluate(expression)
@@ -0,0 +1,37 @@
+"""
+Callback handlers attached to agent runs
+"""
+
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+class ToolUsageTracker(BaseCallbackHandler):
+    """
+    Collect the tools the model called during a single turn.
+
+    A fresh tracker is passed in the run config of each turn, so the cost is
+    proportional to the tool calls made in that turn rather than to the
+    length of the conversation. Names are taken from each model response as
+    it completes, so they keep the model's call order (tools themselves may
+    run in parallel) without duplicates.
+    """
+
+    # Cheap enough to run on the event loop instead of an executor thread
+    run_inline = True
+
+    def __init__(self):
+        self._tools: Dict[str, None] = {}
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                for tool_call in getattr(message, "tool_calls", None) or ():
+                    self._tools.setdefault(tool_call["name"], None)
+
+    @property
+    def tools_used(self) -> List[str]:
+        return list(self._tools)
@@ -0,0 +1,85 @@
+"""
+Checkpointer backends for the agents
+
+``create_checkpointer`` picks the backend used by ``LangGraphAgent`` and
+``ModernLangGraphAgent`` when no explicit ``checkpointer`` is passed.
+"""
+
+import os
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from .file_saver import FileCheckpointer, FileSaver
+from .memory import BoundedMemorySaver
+from .redis_saver import RedisSaver, get_connection_pool
+from .sqlite_saver import SqliteSaver, sqlite_path
+
+
+def _env_number(name: str, default, cast=int):
+    """Read a numeric limit from the environment; ``0`` or ``none`` disables it."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ("", "0", "none"):
+        return None
+    return cast(value)
+
+
+def create_checkpointer(redis_url: Optional[str] = None) -> BaseCheckpointSaver:
+    """
+    Build the default checkpointer from environment settings.
+
+    With a ``redis_url`` checkpoints go to Redis (shared across replicas), or
+    to a SQLite database when the URL is ``sqlite:///path/to/checkpoints.db``;
+    with ``CHECKPOINT_DIR`` set they go to append-only files on local disk;
+    otherwise they are kept in a bounded in-memory store.
+
+    CHECKPOINT_MAX_HISTORY   checkpoints kept per thread (default 10)
+    CHECKPOINT_MAX_THREADS   threads kept before LRU eviction (default 10000, memory only)
+    CHECKPOINT_TTL_SECONDS   idle time before a thread is dropped (default 3600)
+    CHECKPOINT_MAX_BYTES     global serialized-size budget (default 256 MiB, memory only)
+    CHECKPOINT_DIR           directory for the file checkpointer
+    CHECKPOINT_FSYNC         file durability: group, always or none (default group)
+    REDIS_MAX_CONNECTIONS    size of the shared Redis connection pool (default 50)
+    SQLITE_SYNCHRONOUS       NORMAL (default) or FULL to survive power loss too
+    SQLITE_READ_POOL_SIZE    pooled read connections (default 8)
+    """
+    if redis_url and redis_url.startswith("sqlite:"):
+        return SqliteSaver(
+            sqlite_path(redis_url),
+            max_history=_env_number("CHECKPOINT_MAX_HISTORY", 10),
+            synchronous=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+            read_pool_size=_env_number("SQLITE_READ_POOL_SIZE", 8) or 1,
+        )
+    if redis_url:
+        ttl = _env_number("CHECKPOINT_TTL_SECONDS", 3600.0, float)
+        return RedisSaver(
+            redis_url,
+            max_history=_env_number("CHECKPOINT_MAX_HISTORY", 10),
+            ttl_seconds=int(ttl) if ttl else None,
+            max_connections=_env_number("REDIS_MAX_CONNECTIONS", 50),
+        )
+    if os.getenv("CHECKPOINT_DIR"):
+        return FileSaver(
+            os.environ["CHECKPOINT_DIR"],
+            max_history=_env_number("CHECKPOINT_MAX_HISTORY", 10),
+            durability=os.getenv("CHECKPOINT_FSYNC", "group"),
+        )
+    return BoundedMemorySaver(
+        max_history=_env_number("CHECKPOINT_MAX_HISTORY", 10) or 1,
+        max_threads=_env_number("CHECKPOINT_MAX_THREADS", 10_000),
+        ttl_seconds=_env_number("CHECKPOINT_TTL_SECONDS", 3600.0, float),
+        max_bytes=_env_number("CHECKPOINT_MAX_BYTES", 256 * 1024 * 1024),
+    )
+
+
+__all__ = [
+    "BoundedMemorySaver",
+    "FileCheckpointer",
+    "FileSaver",
+    "RedisSaver",
+    "SqliteSaver",
+    "create_checkpointer",
+    "get_connection_pool",
+]
@@ -0,0 +1,133 @@
+"""
+Compact binary encoding shared by the persistent checkpointer backends
+
+A checkpoint row is one msgpack array holding the serde-typed checkpoint
+(channel values inline), its metadata and the parent checkpoint id. Payloads
+above ``COMPRESS_THRESHOLD`` bytes are zlib-compressed, which pays off quickly
+for message histories.
+"""
+
+import random
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import ormsgpack
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+FORMAT_VERSION = 1
+COMPRESS_THRESHOLD = 2048
+
+_FLAG_ZLIB = 1
+
+
+def _pack_payload(data: bytes) -> Tuple[int, bytes]:
+    if len(data) > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(data, 1)
+        if len(compressed) < len(data):
+            return _FLAG_ZLIB, compressed
+    return 0, data
+
+
+def _unpack_payload(flags: int, data: bytes) -> bytes:
+    return zlib.decompress(data) if flags & _FLAG_ZLIB else data
+
+
+def encode_checkpoint(
+    serde: SerializerProtocol,
+    checkpoint: Checkpoint,
+    metadata: CheckpointMetadata,
+    parent_id: Optional[str],
+) -> bytes:
+    """Encode a checkpoint, its metadata and parent id into one binary row."""
+    cp_type, cp_bytes = serde.dumps_typed(checkpoint)
+    md_type, md_bytes = serde.dumps_typed(metadata)
+    flags, cp_bytes = _pack_payload(cp_bytes)
+    return ormsgpack.packb([FORMAT_VERSION, flags, cp_type, cp_bytes, md_type, md_bytes, parent_id])
+
+
+def decode_checkpoint(
+    serde: SerializerProtocol, data: bytes
+) -> Tuple[Checkpoint, CheckpointMetadata, Optional[str]]:
+    """Inverse of ``encode_checkpoint``."""
+    _, flags, cp_type, cp_bytes, md_type, md_bytes, parent_id = ormsgpack.unpackb(data)
+    checkpoint = serde.loads_typed((cp_type, _unpack_payload(flags, cp_bytes)))
+    metadata = serde.loads_typed((md_type, md_bytes))
+    return checkpoint, metadata, parent_id
+
+
+def decode_metadata(serde: SerializerProtocol, data: bytes) -> CheckpointMetadata:
+    """Decode only the metadata of a row (used for ``list`` filters)."""
+    row = ormsgpack.unpackb(data)
+    return serde.loads_typed((row[4], row[5]))
+
+
+def write_index(channel: str, position: int) -> int:
+    """Index of a write within its task; special channels use fixed negative slots."""
+    return WRITES_IDX_MAP.get(channel, position)
+
+
+def encode_write(
+    serde: SerializerProtocol, task_id: str, idx: int, channel: str, value: Any, task_path: str
+) -> bytes:
+    """Encode one pending write."""
+    value_type, value_bytes = serde.dumps_typed(value)
+    return ormsgpack.packb([task_id, idx, channel, value_type, value_bytes, task_path])
+
+
+def decode_writes(serde: SerializerProtocol, rows: List[bytes]) -> List[Tuple[str, str, Any]]:
+    """Decode pending writes in the order LangGraph expects them."""
+    decoded = sorted(
+        (ormsgpack.unpackb(row) for row in rows),
+        key=lambda w: writes_sort_key(w[5], w[0], w[1]),
+    )
+    return [
+        (task_id, channel, serde.loads_typed((value_type, value_bytes)))
+        for task_id, _, channel, value_type, value_bytes, _ in decoded
+    ]
+
+
+def next_version(current: Optional[Any]) -> str:
+    """Monotonic string channel versions, same scheme as ``InMemorySaver``."""
+    if current is None:
+        current_v = 0
+    elif isinstance(current, int):
+        current_v = current
+    else:
+        current_v = int(current.split(".")[0])
+    return f"{current_v + 1:032}.{random.random():016}"
+
+
+def checkpoint_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Dict[str, Any]:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+def make_tuple(
+    thread_id: str,
+    checkpoint_ns: str,
+    checkpoint_id: str,
+    checkpoint: Checkpoint,
+    metadata: CheckpointMetadata,
+    parent_id: Optional[str],
+    pending_writes: List[Tuple[str, str, Any]],
+) -> CheckpointTuple:
+    """Assemble a ``CheckpointTuple`` from decoded parts."""
+    return CheckpointTuple(
+        config=checkpoint_config(thread_id, checkpoint_ns, checkpoint_id),
+        checkpoint=checkpoint,
+        metadata=metadata,
+        parent_config=checkpoint_config(thread_id, checkpoint_ns, parent_id) if parent_id else None,
+        pending_writes=pending_writes,
+    )
@@ -0,0 +1,711 @@
+"""
+Append-only file checkpointer
+
+Durable checkpoints for single-node and edge deployments without Redis. Each
+thread gets two files under ``directory`` (fanned out by the first byte of a
+hash of the thread id):
+
+    <hash>.log   append-only records: ``<length u32><crc32 u32>`` + msgpack
+                 ``[kind, checkpoint_ns, checkpoint_id, body]``; checkpoint
+                 bodies use the shared binary ``codec``
+    <hash>.idx   fixed-size entries, one per record: log offset, length, crc,
+                 kind and digests of the namespace and checkpoint key
+
+The index is read through ``mmap``: the latest checkpoint of a namespace is
+found by walking the index back from its end, normally one or two entries,
+without touching the log. The log is the source of truth. When a thread is
+opened after a restart, the index is checked against the log's tail and
+extended (after a crash between the two appends) or rebuilt from the log.
+
+Durability (``durability``):
+
+- ``"group"`` (default): ``put`` returns once its record is fsynced, but
+  records appended to a thread while its files are being synced (parallel
+  tasks' writes, the checkpoint after them) share the next fsync
+- ``"always"``: every append is fsynced inline
+- ``"none"``: appends reach the OS page cache only
+
+Threads that accumulate more than twice ``max_history`` checkpoints in a
+namespace are compacted in the background: the newest ``max_history`` and
+their pending writes are copied to a new log and index, which replace the old
+ones atomically.
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import queue
+import shutil
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import ormsgpack
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.base.id import uuid6
+
+from . import codec
+
+_CHECKPOINT, _WRITES = 1, 2
+# Log record header: payload length, crc32 of the payload
+_HEADER = struct.Struct("<II")
+# Index entry: log offset, payload length, crc32, kind, namespace digest, checkpoint key digest
+_ENTRY = struct.Struct("<QIIB7x8s16s")
+
+DURABILITY_MODES = ("group", "always", "none")
+
+# File sizes are the only metadata the records need; skip the rest where we can
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _fsync_dir(path: str) -> None:
+    """Make renames and new files in ``path`` durable (where directories can be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _digest(value: str, size: int) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=size).digest()
+
+
+def _ns_digest(checkpoint_ns: str) -> bytes:
+    return _digest(checkpoint_ns, 8)
+
+
+def _key_digest(checkpoint_ns: str, checkpoint_id: str) -> bytes:
+    return _digest(f"{checkpoint_ns}\x00{checkpoint_id}", 16)
+
+
+def _configurable(config: RunnableConfig) -> Dict[str, Any]:
+    # Plain ``{"thread_id": ...}`` configs (used outside graphs) are accepted too
+    return config.get("configurable") or config
+
+
+class _Entry:
+    __slots__ = ("offset", "length", "crc", "kind", "ns", "key")
+
+    def __init__(self, offset: int, length: int, crc: int, kind: int, ns: bytes, key: bytes):
+        self.offset, self.length, self.crc = offset, length, crc
+        self.kind, self.ns, self.key = kind, ns, key
+
+    def pack(self) -> bytes:
+        return _ENTRY.pack(self.offset, self.length, self.crc, self.kind, self.ns, self.key)
+
+
+class _ThreadFiles:
+    """
+    Open log and index of one thread. Reads and appends hold ``lock``; fsyncs
+    hold only ``sync_lock``, so the thread keeps appending while one runs.
+    """
+
+    def __init__(self, log_path: str, idx_path: str):
+        self.lock = threading.RLock()
+        self.sync_lock = threading.Lock()
+        self.log_path = log_path
+        self.idx_path = idx_path
+        self.closed = False
+        # Records appended / known durable, for group commit
+        self.appended = 0
+        self.synced = 0
+        self._open()
+
+    def _open(self) -> None:
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self.log_fd = os.open(self.log_path, flags, 0o644)
+        self.idx_fd = os.open(self.idx_path, flags, 0o644)
+        self.log_size = os.fstat(self.log_fd).st_size
+        self.entries = os.fstat(self.idx_fd).st_size // _ENTRY.size
+        self._map: Optional[mmap.mmap] = None
+        self._mapped = 0
+
+    def close(self) -> None:
+        with self.sync_lock:
+            self._close()
+
+    def _close(self) -> None:
+        self._unmap()
+        os.close(self.log_fd)
+        os.close(self.idx_fd)
+        self.closed = True
+
+    def reopen(self) -> None:
+        """Pick up files replaced on disk (after compaction, which synced them)."""
+        with self.sync_lock:
+            self._close()
+            self.closed = False
+            self._open()
+            self.synced = self.appended
+
+    def _unmap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map, self._mapped = None, 0
+
+    # Index
+
+    def entry(self, i: int) -> _Entry:
+        if self._mapped != self.entries:
+            self._unmap()
+            if self.entries:
+                self._map = mmap.mmap(
+                    self.idx_fd, self.entries * _ENTRY.size, access=mmap.ACCESS_READ
+                )
+            self._mapped = self.entries
+        return _Entry(*_ENTRY.unpack_from(self._map, i * _ENTRY.size))
+
+    def newest_first(self) -> Iterator[Tuple[int, _Entry]]:
+        for i in range(self.entries - 1, -1, -1):
+            yield i, self.entry(i)
+
+    # Records
+
+    def append(self, kind: int, checkpoint_ns: str, checkpoint_id: str, body: Any) -> _Entry:
+        payload = ormsgpack.packb([kind, checkpoint_ns, checkpoint_id, body])
+        crc = zlib.crc32(payload)
+        entry = _Entry(self.log_size, len(payload), crc, kind, _ns_digest(checkpoint_ns),
+                       _key_digest(checkpoint_ns, checkpoint_id))
+        # Log first: an index entry never points past the end of the log
+        os.pwrite(self.log_fd, _HEADER.pack(len(payload), crc) + payload, self.log_size)
+        os.pwrite(self.idx_fd, entry.pack(), self.entries * _ENTRY.size)
+        self.log_size += _HEADER.size + len(payload)
+        self.entries += 1
+        self.appended += 1
+        return entry
+
+    def read(self, entry: _Entry) -> Tuple[int, str, str, Any]:
+        payload = os.pread(self.log_fd, entry.length, entry.offset + _HEADER.size)
+        if len(payload) != entry.length or zlib.crc32(payload) != entry.crc:
+            raise IOError(f"Corrupt checkpoint record at offset {entry.offset} of {self.log_path}")
+        return ormsgpack.unpackb(payload)
+
+    def sync(self, record: Optional[int] = None) -> int:
+        """
+        Make every record appended so far durable, unless ``record`` already
+        is; returns the records covered.
+        """
+        with self.sync_lock:
+            appended = self.appended
+            if self.closed or self.synced >= (appended if record is None else record):
+                return 0
+            self._fsync()
+            covered, self.synced = appended - self.synced, appended
+            return covered
+
+    def _fsync(self) -> None:
+        _fdatasync(self.log_fd)
+        _fdatasync(self.idx_fd)
+
+    # Recovery
+
+    def recover(self) -> bool:
+        """Make the index match the log after an unclean shutdown; True if anything was repaired."""
+        indexed_end = 0
+        if self.entries:
+            last = self.entry(self.entries - 1)
+            indexed_end = last.offset + _HEADER.size + last.length
+            if indexed_end > self.log_size or not self._valid(last):
+                # Index ahead of the log or stale (e.g. crash mid-compaction): rebuild from the log
+                self.entries = 0
+                indexed_end = 0
+        index_complete = self.entries * _ENTRY.size == os.fstat(self.idx_fd).st_size
+        if indexed_end == self.log_size and index_complete:
+            return False
+        self._index_from(indexed_end)
+        return True
+
+    def _valid(self, entry: _Entry) -> bool:
+        header = os.pread(self.log_fd, _HEADER.size, entry.offset)
+        if len(header) != _HEADER.size or _HEADER.unpack(header) != (entry.length, entry.crc):
+            return False
+        payload = os.pread(self.log_fd, entry.length, entry.offset + _HEADER.size)
+        return zlib.crc32(payload) == entry.crc
+
+    def _index_from(self, offset: int) -> None:
+        """Index the log records from ``offset`` on, dropping a torn record at the tail."""
+        os.ftruncate(self.idx_fd, self.entries * _ENTRY.size)
+        entries = []
+        while offset + _HEADER.size <= self.log_size:
+            length, crc = _HEADER.unpack(os.pread(self.log_fd, _HEADER.size, offset))
+            payload = os.pread(self.log_fd, length, offset + _HEADER.size)
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            kind, checkpoint_ns, checkpoint_id, _ = ormsgpack.unpackb(payload)
+            entries.append(_Entry(offset, length, crc, kind, _ns_digest(checkpoint_ns),
+                                  _key_digest(checkpoint_ns, checkpoint_id)))
+            offset += _HEADER.size + length
+        if offset != self.log_size:
+            os.ftruncate(self.log_fd, offset)
+            self.log_size = offset
+        if entries:
+            os.pwrite(self.idx_fd, b"".join(e.pack() for e in entries), self.entries * _ENTRY.size)
+        self.entries += len(entries)
+        self._unmap()
+        self._fsync()
+
+
+class FileSaver(BaseCheckpointSaver[str]):
+    """Checkpointer keeping an append-only log and an mmap'd index per thread on local disk."""
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        max_history: Optional[int] = 10,
+        durability: str = "group",
+        max_open_threads: int = 256,
+        serde=None,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {', '.join(DURABILITY_MODES)}")
+        super().__init__(serde=serde)
+        self.directory = directory
+        self.max_history = max_history
+        self.durability = durability
+        self.max_open_threads = max_open_threads
+        os.makedirs(directory, exist_ok=True)
+
+        # hash -> open files, least recently used first
+        self._files: "OrderedDict[str, _ThreadFiles]" = OrderedDict()
+        self._files_lock = threading.Lock()
+        # hash -> set once the thread's files are open; opening and recovery run without _files_lock
+        self._opening: Dict[str, threading.Event] = {}
+
+        self._stats_lock = threading.Lock()
+        self.counters = {"fsyncs": 0, "synced_records": 0, "compactions": 0, "recoveries": 0}
+
+        # Compactions run on a worker thread, off the request path
+        self._compactions: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._compact_pending: Set[str] = set()
+        self._worker = threading.Thread(
+            target=self._compact_worker, name="file-checkpointer", daemon=True
+        )
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def _paths(self, thread_id: str) -> Tuple[str, str, str]:
+        name = hashlib.blake2b(thread_id.encode(), digest_size=16).hexdigest()
+        base = os.path.join(self.directory, name[:2], name)
+        return name, base + ".log", base + ".idx"
+
+    def _open_files(self, thread_id: str, create: bool) -> Optional[_ThreadFiles]:
+        name, log_path, idx_path = self._paths(thread_id)
+        while True:
+            with self._files_lock:
+                files = self._files.get(name)
+                if files is not None:
+                    self._files.move_to_end(name)
+                    return files
+                opening = self._opening.get(name)
+                if opening is None:
+                    if not create and not os.path.exists(log_path):
+                        return None
+                    opening = self._opening[name] = threading.Event()
+                    break
+            # Someone else is opening this thread; other threads are not held up
+            opening.wait()
+
+        evicted: List[_ThreadFiles] = []
+        files = None
+        try:
+            # Recovery may read the whole log, so it runs outside _files_lock
+            created = not os.path.exists(log_path)
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            files = _ThreadFiles(log_path, idx_path)
+            if created and self.durability != "none":
+                _fsync_dir(os.path.dirname(log_path))
+            with files.lock:
+                if files.recover():
+                    self._count("recoveries")
+        finally:
+            with self._files_lock:
+                del self._opening[name]
+                if files is not None:
+                    self._files[name] = files
+                    while len(self._files) > self.max_open_threads:
+                        evicted.append(self._files.popitem(last=False)[1])
+            opening.set()
+        for oldest in evicted:
+            self._close_files(oldest)
+        return files
+
+    def _close_files(self, files: _ThreadFiles) -> None:
+        with files.lock:
+            if files.closed:
+                return
+            if self.durability != "none":
+                self._sync(files)
+            files.close()
+
+    @contextmanager
+    def _thread(self, thread_id: str, create: bool = False) -> Iterator[Optional[_ThreadFiles]]:
+        """The thread's files with their lock held (None if the thread has no files)."""
+        while True:
+            files = self._open_files(thread_id, create)
+            if files is None:
+                yield None
+                return
+            with files.lock:
+                # Closed by eviction between lookup and lock: open again
+                if files.closed:
+                    continue
+                yield files
+                return
+
+    def _count(self, counter: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.counters[counter] += n
+
+    def _sync(self, files: _ThreadFiles, record: Optional[int] = None) -> None:
+        covered = files.sync(record)
+        if covered:
+            with self._stats_lock:
+                self.counters["fsyncs"] += 1
+                self.counters["synced_records"] += covered
+
+    def _wait_durable(self, files: _ThreadFiles, record: int) -> None:
+        """
+        Return once the thread's record number ``record`` is on disk. Records
+        appended while an fsync of the thread runs are picked up together by
+        the next one: the first waiter syncs them all and the others find
+        their record already durable.
+        """
+        if self.durability == "group":
+            # A closed thread was synced (or deleted) when it was closed
+            self._sync(files, record)
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _compact_worker(self) -> None:
+        while True:
+            thread_id = self._compactions.get()
+            if thread_id is None:
+                return
+            with self._stats_lock:
+                self._compact_pending.discard(thread_id)
+            try:
+                self.compact(thread_id)
+            except OSError:
+                pass
+
+    def _maybe_compact(self, thread_id: str, files: _ThreadFiles, ns: bytes) -> None:
+        if not self.max_history or files.entries <= 2 * self.max_history:
+            return
+        count = 0
+        for _, entry in files.newest_first():
+            if entry.kind == _CHECKPOINT and entry.ns == ns:
+                count += 1
+                if count > 2 * self.max_history:
+                    with self._stats_lock:
+                        if thread_id in self._compact_pending:
+                            return
+                        self._compact_pending.add(thread_id)
+                    self._compactions.put(thread_id)
+                    return
+
+    def compact(self, thread_id: str) -> int:
+        """Keep the newest ``max_history`` checkpoints per namespace; returns bytes reclaimed."""
+        with self._thread(thread_id) as files:
+            if files is None or not self.max_history:
+                return 0
+            kept_per_ns: Dict[bytes, int] = {}
+            kept: List[_Entry] = []
+            # Writes come after their checkpoint, so walking back sees them first
+            writes: Dict[bytes, List[_Entry]] = {}
+            for _, entry in files.newest_first():
+                if entry.kind == _WRITES:
+                    writes.setdefault(entry.key, []).append(entry)
+                elif kept_per_ns.get(entry.ns, 0) < self.max_history:
+                    kept_per_ns[entry.ns] = kept_per_ns.get(entry.ns, 0) + 1
+                    kept.append(entry)
+                    kept.extend(writes.pop(entry.key, []))
+            kept.sort(key=lambda e: e.offset)
+
+            before = files.log_size
+            log_tmp, idx_tmp = files.log_path + ".compact", files.idx_path + ".compact"
+            offset = 0
+            with open(log_tmp, "wb") as log, open(idx_tmp, "wb") as idx:
+                for entry in kept:
+                    record = os.pread(files.log_fd, _HEADER.size + entry.length, entry.offset)
+                    log.write(record)
+                    moved = _Entry(offset, entry.length, entry.crc, entry.kind, entry.ns, entry.key)
+                    idx.write(moved.pack())
+                    offset += len(record)
+                for f in (log, idx):
+                    f.flush()
+                    os.fsync(f.fileno())
+            # The log is authoritative: if we stop between the two renames, recovery
+            # rebuilds the index
+            os.replace(log_tmp, files.log_path)
+            os.replace(idx_tmp, files.idx_path)
+            _fsync_dir(os.path.dirname(files.log_path))
+            files.reopen()
+            self._count("compactions")
+            return before - files.log_size
+
+    # ------------------------------------------------------------------
+    # Checkpointer interface
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = _configurable(config)
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable.get("checkpoint_id")
+        with self._thread(thread_id) as files:
+            if files is None:
+                return None
+            ns = _ns_digest(checkpoint_ns)
+            key = _key_digest(checkpoint_ns, checkpoint_id) if checkpoint_id else None
+            pending: List[_Entry] = []
+            for _, entry in files.newest_first():
+                if entry.kind == _WRITES:
+                    pending.append(entry)
+                elif entry.key == key if key else entry.ns == ns:
+                    writes = [w for w in pending if w.key == entry.key]
+                    return self._tuple(thread_id, files, entry, writes)
+            return None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is None:
+            raise ValueError("FileSaver.list requires a config with a thread_id")
+        configurable = _configurable(config)
+        thread_id = str(configurable["thread_id"])
+        ns = _ns_digest(configurable["checkpoint_ns"]) if "checkpoint_ns" in configurable else None
+        wanted_id = configurable.get("checkpoint_id")
+        before_id = _configurable(before).get("checkpoint_id") if before else None
+
+        with self._thread(thread_id) as files:
+            if files is None:
+                return
+            items = []
+            writes: Dict[bytes, List[_Entry]] = {}
+            for _, entry in files.newest_first():
+                if entry.kind == _WRITES:
+                    writes.setdefault(entry.key, []).append(entry)
+                    continue
+                if ns is not None and entry.ns != ns:
+                    continue
+                item = self._tuple(thread_id, files, entry, writes.get(entry.key, []))
+                checkpoint_id = item.config["configurable"]["checkpoint_id"]
+                if wanted_id and checkpoint_id != wanted_id:
+                    continue
+                if before_id and checkpoint_id >= before_id:
+                    continue
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                items.append(item)
+                if limit is not None and len(items) >= limit:
+                    break
+        yield from items
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: Optional[ChannelVersions] = None,
+    ) -> RunnableConfig:
+        configurable = _configurable(config)
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = checkpoint.get("id") or str(uuid6())
+        row = codec.encode_checkpoint(
+            self.serde, checkpoint, get_checkpoint_metadata(config, metadata),
+            configurable.get("checkpoint_id"),
+        )
+        with self._thread(thread_id, create=True) as files:
+            entry = files.append(_CHECKPOINT, checkpoint_ns, checkpoint_id, row)
+            record = files.appended
+            if self.durability == "always":
+                self._sync(files)
+            self._maybe_compact(thread_id, files, entry.ns)
+        self._wait_durable(files, record)
+        return codec.checkpoint_config(thread_id, checkpoint_ns, checkpoint_id)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = _configurable(config)
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        body = []
+        for position, (channel, value) in enumerate(writes):
+            idx = codec.write_index(channel, position)
+            encoded = codec.encode_write(self.serde, task_id, idx, channel, value, task_path)
+            body.append([f"{task_id}:{idx}", idx, encoded])
+        with self._thread(thread_id, create=True) as files:
+            files.append(_WRITES, checkpoint_ns, configurable["checkpoint_id"], body)
+            record = files.appended
+            if self.durability == "always":
+                self._sync(files)
+        self._wait_durable(files, record)
+
+    def delete_thread(self, thread_id: str) -> None:
+        name, log_path, idx_path = self._paths(str(thread_id))
+        while True:
+            with self._files_lock:
+                opening = self._opening.get(name)
+                if opening is None:
+                    files = self._files.pop(name, None)
+                    break
+            opening.wait()
+        if files is not None:
+            with files.lock:
+                if not files.closed:
+                    files.close()
+        for path in (log_path, idx_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return codec.next_version(current)
+
+    # Async variants run the file I/O in worker threads to keep the event loop free
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: Optional[ChannelVersions] = None,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def cleanup(self, older_than: Optional[float] = None) -> int:
+        """
+        Delete threads not written for ``older_than`` seconds, or every thread
+        (and the directory) when it is None; returns the threads removed.
+        """
+        cutoff = time.time() - older_than if older_than is not None else None
+        removed = 0
+        with self._files_lock:
+            open_files = dict(self._files)
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".log"):
+                    continue
+                path = os.path.join(root, name)
+                if cutoff is not None and os.path.getmtime(path) >= cutoff:
+                    continue
+                files = open_files.get(name[:-4])
+                if files is not None:
+                    with self._files_lock:
+                        self._files.pop(name[:-4], None)
+                    self._close_files(files)
+                for stale in (path, path[:-4] + ".idx"):
+                    try:
+                        os.remove(stale)
+                    except FileNotFoundError:
+                        pass
+                removed += 1
+        if cutoff is None:
+            self.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+        return removed
+
+    def close(self) -> None:
+        """Stop the compaction worker, then sync and close every file."""
+        self._compactions.put(None)
+        self._worker.join()
+        with self._files_lock:
+            files, self._files = list(self._files.values()), OrderedDict()
+        for f in files:
+            self._close_files(f)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._files_lock:
+            open_threads = len(self._files)
+        with self._stats_lock:
+            return {"open_threads": open_threads, **self.counters}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _tuple(self, thread_id: str, files: _ThreadFiles, entry: _Entry,
+               write_entries: List[_Entry]) -> CheckpointTuple:
+        _, checkpoint_ns, checkpoint_id, row = files.read(entry)
+        checkpoint, metadata, parent_id = codec.decode_checkpoint(self.serde, row)
+        # Oldest record first; regular writes keep the first value, special channels the last
+        rows: Dict[str, bytes] = {}
+        for write_entry in reversed(write_entries):
+            for field, idx, encoded in files.read(write_entry)[3]:
+                if idx < 0 or field not in rows:
+                    rows[field] = encoded
+        writes = codec.decode_writes(self.serde, list(rows.values()))
+        return codec.make_tuple(thread_id, checkpoint_ns, checkpoint_id, checkpoint, metadata,
+                                parent_id, writes)
+
+
+# Name used by the learning-plan exercises
+FileCheckpointer = FileSaver
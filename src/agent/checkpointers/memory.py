@@ -0,0 +1,231 @@
+"""
+Bounded in-memory checkpointer
+
+``MemorySaver`` keeps every checkpoint of every thread for the life of the
+process. ``BoundedMemorySaver`` keeps the same storage layout but caps it:
+
+- only the newest ``max_history`` checkpoints of each thread are retained
+- threads idle for longer than ``ttl_seconds`` are dropped
+- at most ``max_threads`` threads are kept (least recently used go first)
+- the serialized size of everything stored stays under ``max_bytes``
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from .. import metrics
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """In-memory checkpointer with history truncation and LRU/TTL/byte-budget eviction."""
+
+    def __init__(
+        self,
+        *,
+        max_history: int = 10,
+        max_threads: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        serde=None,
+    ):
+        if max_history < 1:
+            raise ValueError("max_history must be at least 1")
+        super().__init__(serde=serde)
+        self.max_history = max_history
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._lock = threading.RLock()
+        # thread_id -> last access time, least recently used first
+        self._access: "OrderedDict[str, float]" = OrderedDict()
+        self._thread_bytes: Dict[str, int] = defaultdict(int)
+        self._total_bytes = 0
+        # Per-thread indexes so truncation and eviction never scan other threads
+        self._blob_keys: Dict[str, Set[Tuple]] = defaultdict(set)
+        self._write_keys: Dict[str, Set[Tuple[str, str, str]]] = defaultdict(set)
+        # thread_id -> (checkpoint_ns, checkpoint_id) -> channel versions it references
+        self._versions: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = defaultdict(dict)
+
+        self.evictions = {"history": 0, "ttl": 0, "lru": 0, "bytes": 0}
+
+    # ------------------------------------------------------------------
+    # Checkpointer interface
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            # Avoid the defaultdict creating empty entries for unknown threads
+            if thread_id not in self.storage:
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            for channel, version in new_versions.items():
+                self._blob_keys[thread_id].add((thread_id, checkpoint_ns, channel, version))
+            self._versions[thread_id][(checkpoint_ns, checkpoint["id"])] = dict(
+                checkpoint["channel_versions"]
+            )
+            self._truncate(thread_id, checkpoint_ns)
+            self._recount(thread_id)
+            self._touch(thread_id)
+            self._enforce_limits(keep=thread_id)
+            return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        outer_key = (thread_id, checkpoint_ns, config["configurable"]["checkpoint_id"])
+        with self._lock:
+            before = self._writes_size(outer_key)
+            super().put_writes(config, writes, task_id, task_path)
+            self._write_keys[thread_id].add(outer_key)
+            self._add_bytes(thread_id, self._writes_size(outer_key) - before)
+            self._touch(thread_id)
+            self._enforce_limits(keep=thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop_thread(thread_id)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current size and eviction counters."""
+        with self._lock:
+            return {
+                "threads": len(self._access),
+                "bytes": self._total_bytes,
+                "evictions": dict(self.evictions),
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _touch(self, thread_id: str) -> None:
+        self._access[thread_id] = time.monotonic()
+        self._access.move_to_end(thread_id)
+
+    def _add_bytes(self, thread_id: str, delta: int) -> None:
+        self._thread_bytes[thread_id] += delta
+        self._total_bytes += delta
+
+    def _writes_size(self, outer_key: Tuple[str, str, str]) -> int:
+        stored = self.writes.get(outer_key)
+        if not stored:
+            return 0
+        return sum(len(value[2][1]) for value in stored.values())
+
+    def _truncate(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop checkpoints beyond ``max_history`` and the blobs only they used."""
+        ns_storage = self.storage[thread_id][checkpoint_ns]
+        excess = len(ns_storage) - self.max_history
+        if excess <= 0:
+            return
+
+        # Checkpoint ids are time-ordered, so the smallest are the oldest
+        for checkpoint_id in sorted(ns_storage)[:excess]:
+            del ns_storage[checkpoint_id]
+            outer_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(outer_key, None)
+            self._write_keys[thread_id].discard(outer_key)
+            self._versions[thread_id].pop((checkpoint_ns, checkpoint_id), None)
+        self.evictions["history"] += excess
+        metrics.observe_checkpoint_eviction("history", excess)
+
+        referenced = {
+            (thread_id, ns, channel, version)
+            for (ns, _), versions in self._versions[thread_id].items()
+            for channel, version in versions.items()
+        }
+        blob_keys = self._blob_keys[thread_id]
+        for key in blob_keys - referenced:
+            self.blobs.pop(key, None)
+        blob_keys &= referenced
+
+    def _recount(self, thread_id: str) -> None:
+        """Recompute the serialized size of one thread (bounded by ``max_history``)."""
+        size = 0
+        for ns_storage in self.storage.get(thread_id, {}).values():
+            for checkpoint, metadata, _ in ns_storage.values():
+                size += len(checkpoint[1]) + len(metadata[1])
+        for key in self._blob_keys.get(thread_id, ()):
+            blob = self.blobs.get(key)
+            if blob is not None:
+                size += len(blob[1])
+        for outer_key in self._write_keys.get(thread_id, ()):
+            size += self._writes_size(outer_key)
+        self._add_bytes(thread_id, size - self._thread_bytes[thread_id])
+
+    def _drop_thread(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        for outer_key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(outer_key, None)
+        self._versions.pop(thread_id, None)
+        self._total_bytes -= self._thread_bytes.pop(thread_id, 0)
+        self._access.pop(thread_id, None)
+
+    def _enforce_limits(self, keep: str) -> None:
+        """Evict idle, surplus and oversized threads, never the one being written."""
+        if self.ttl_seconds is not None:
+            deadline = time.monotonic() - self.ttl_seconds
+            while self._access:
+                thread_id, last_access = next(iter(self._access.items()))
+                if last_access > deadline or thread_id == keep:
+                    break
+                self._drop_thread(thread_id)
+                self.evictions["ttl"] += 1
+                metrics.observe_checkpoint_eviction("ttl")
+
+        if self.max_threads is not None:
+            while len(self._access) > self.max_threads:
+                if not self._evict_oldest(keep, "lru"):
+                    break
+
+        if self.max_bytes is not None:
+            while self._total_bytes > self.max_bytes:
+                if not self._evict_oldest(keep, "bytes"):
+                    break
+
+    def _evict_oldest(self, keep: str, reason: str) -> bool:
+        for thread_id in self._access:
+            if thread_id != keep:
+                self._drop_thread(thread_id)
+                self.evictions[reason] += 1
+                metrics.observe_checkpoint_eviction(reason)
+                return True
+        return False
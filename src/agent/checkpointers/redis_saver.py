@@ -0,0 +1,354 @@
+"""
+Redis-backed checkpointer
+
+Checkpoints are shared across replicas and survive restarts. Every agent in
+the process that points at the same ``redis_url`` shares one connection pool,
+and each checkpoint (or batch of pending writes) is stored with a single
+pipelined round trip.
+
+Key layout (the ``{thread_id}`` hash tag keeps a thread on one cluster slot):
+
+    <prefix>:{<thread_id>}:namespaces               set of checkpoint namespaces
+    <prefix>:{<thread_id>}:index:<ns>               zset of checkpoint ids (lexicographic)
+    <prefix>:{<thread_id>}:checkpoint:<ns>:<id>     encoded checkpoint row
+    <prefix>:{<thread_id>}:writes:<ns>:<id>         hash of encoded pending writes
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from . import codec
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    redis = None
+
+# Checkpoints fetched per round trip when listing a thread's history
+LIST_PAGE_SIZE = 100
+
+_pools: Dict[Tuple[str, int], Any] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(redis_url: str, max_connections: int = 50):
+    """Return the process-wide connection pool for ``redis_url``."""
+    if redis is None:
+        raise ImportError("RedisSaver requires the 'redis' package: pip install redis")
+    key = (redis_url, max_connections)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = redis.ConnectionPool.from_url(redis_url, max_connections=max_connections)
+        return _pools[key]
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisSaver(BaseCheckpointSaver[str]):
+    """Checkpointer storing compact binary checkpoints in Redis."""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        *,
+        client=None,
+        key_prefix: str = "langgraph:checkpoint",
+        max_history: Optional[int] = 10,
+        ttl_seconds: Optional[int] = None,
+        max_connections: int = 50,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        if client is None:
+            if redis_url is None:
+                raise ValueError("RedisSaver needs either redis_url or client")
+            client = redis.Redis(connection_pool=get_connection_pool(redis_url, max_connections))
+        self.client = client
+        self.key_prefix = key_prefix
+        self.max_history = max_history
+        self.ttl_seconds = ttl_seconds
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def _thread_key(self, thread_id: str, *parts: str) -> str:
+        return ":".join((f"{self.key_prefix}:{{{thread_id}}}",) + parts)
+
+    def _checkpoint_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return self._thread_key(thread_id, "checkpoint", checkpoint_ns, checkpoint_id)
+
+    def _writes_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return self._thread_key(thread_id, "writes", checkpoint_ns, checkpoint_id)
+
+    def _index_key(self, thread_id: str, checkpoint_ns: str) -> str:
+        return self._thread_key(thread_id, "index", checkpoint_ns)
+
+    def _expire(self, pipe, *keys: str) -> None:
+        if self.ttl_seconds:
+            for key in keys:
+                pipe.expire(key, self.ttl_seconds)
+
+    # ------------------------------------------------------------------
+    # Checkpointer interface
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            latest = self.client.zrevrange(self._index_key(thread_id, checkpoint_ns), 0, 0)
+            if not latest:
+                return None
+            checkpoint_id = _decode(latest[0])
+        return self._load(thread_id, checkpoint_ns, [checkpoint_id]).get(checkpoint_id)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is None:
+            raise ValueError("RedisSaver.list requires a config with a thread_id")
+        thread_id = config["configurable"]["thread_id"]
+        if "checkpoint_ns" in config["configurable"]:
+            namespaces = [config["configurable"]["checkpoint_ns"]]
+        else:
+            stored = self.client.smembers(self._thread_key(thread_id, "namespaces"))
+            namespaces = sorted(_decode(ns) for ns in stored)
+        wanted_id = get_checkpoint_id(config)
+        before_id = get_checkpoint_id(before) if before else None
+
+        if limit is not None and limit <= 0:
+            return
+        for checkpoint_ns in namespaces:
+            history = self._history(thread_id, checkpoint_ns, wanted_id, before_id, filter, limit)
+            for item in history:
+                yield item
+                if limit is not None:
+                    limit -= 1
+                    # Stop before the next page is fetched
+                    if limit == 0:
+                        return
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = checkpoint["id"]
+        row = codec.encode_checkpoint(
+            self.serde,
+            checkpoint,
+            get_checkpoint_metadata(config, metadata),
+            config["configurable"].get("checkpoint_id"),
+        )
+
+        index_key = self._index_key(thread_id, checkpoint_ns)
+        namespaces_key = self._thread_key(thread_id, "namespaces")
+        checkpoint_key = self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(checkpoint_key, row, ex=self.ttl_seconds)
+        pipe.zadd(index_key, {checkpoint_id: 0})
+        pipe.sadd(namespaces_key, checkpoint_ns)
+        self._expire(pipe, index_key, namespaces_key)
+        pipe.zcard(index_key)
+        size = pipe.execute()[-1]
+
+        if self.max_history and size > self.max_history:
+            self._truncate(thread_id, checkpoint_ns, size - self.max_history)
+
+        return codec.checkpoint_config(thread_id, checkpoint_ns, checkpoint_id)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        key = self._writes_key(thread_id, checkpoint_ns, checkpoint_id)
+
+        pipe = self.client.pipeline(transaction=False)
+        for position, (channel, value) in enumerate(writes):
+            idx = codec.write_index(channel, position)
+            row = codec.encode_write(self.serde, task_id, idx, channel, value, task_path)
+            field = f"{task_id}:{idx}"
+            # Regular writes are idempotent on retry; special channels overwrite
+            if idx >= 0:
+                pipe.hsetnx(key, field, row)
+            else:
+                pipe.hset(key, field, row)
+        self._expire(pipe, key)
+        pipe.execute()
+
+    def delete_thread(self, thread_id: str) -> None:
+        namespaces_key = self._thread_key(thread_id, "namespaces")
+        namespaces = [_decode(ns) for ns in self.client.smembers(namespaces_key)]
+        keys = [namespaces_key]
+        for checkpoint_ns in namespaces:
+            index_key = self._index_key(thread_id, checkpoint_ns)
+            for checkpoint_id in self.client.zrange(index_key, 0, -1):
+                checkpoint_id = _decode(checkpoint_id)
+                keys.append(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+                keys.append(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+            keys.append(index_key)
+        self.client.delete(*keys)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return codec.next_version(current)
+
+    # Async variants share the thread-safe pool and keep the event loop free
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _load(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_ids
+    ) -> Dict[str, CheckpointTuple]:
+        """Fetch checkpoints and their pending writes in one pipelined round trip."""
+        if not checkpoint_ids:
+            return {}
+        pipe = self.client.pipeline(transaction=False)
+        for checkpoint_id in checkpoint_ids:
+            pipe.get(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+            pipe.hvals(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+        replies = pipe.execute()
+
+        loaded = {}
+        for i, checkpoint_id in enumerate(checkpoint_ids):
+            row, writes = replies[2 * i], replies[2 * i + 1]
+            if row is None:
+                continue
+            checkpoint, metadata, parent_id = codec.decode_checkpoint(self.serde, row)
+            loaded[checkpoint_id] = codec.make_tuple(
+                thread_id, checkpoint_ns, checkpoint_id, checkpoint, metadata, parent_id,
+                codec.decode_writes(self.serde, writes),
+            )
+        return loaded
+
+    def _history(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        wanted_id: Optional[str],
+        before_id: Optional[str],
+        filter: Optional[Dict[str, Any]],
+        limit: Optional[int],
+    ) -> Iterator[CheckpointTuple]:
+        """
+        Newest-first checkpoints of one namespace, loaded a page at a time.
+
+        ``before`` becomes the ZREVRANGEBYLEX bound and, without a metadata
+        filter, ``limit`` caps the page, so only the returned checkpoints are
+        read; each page resumes below the last id seen.
+        """
+        if wanted_id:
+            pages = [[wanted_id]] if not before_id or wanted_id < before_id else []
+        else:
+            page_size = LIST_PAGE_SIZE
+            if limit is not None and not filter:
+                page_size = min(limit, LIST_PAGE_SIZE)
+            pages = self._index_pages(thread_id, checkpoint_ns, before_id, page_size)
+        for ids in pages:
+            loaded = self._load(thread_id, checkpoint_ns, ids)
+            for checkpoint_id in ids:
+                item = loaded.get(checkpoint_id)
+                if item is None:
+                    continue
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                yield item
+
+    def _index_pages(
+        self, thread_id: str, checkpoint_ns: str, before_id: Optional[str], page_size: int
+    ) -> Iterator[list]:
+        index_key = self._index_key(thread_id, checkpoint_ns)
+        upper = f"({before_id}" if before_id else "+"
+        while page_size > 0:
+            ids = [_decode(i) for i in self.client.zrevrangebylex(
+                index_key, upper, "-", start=0, num=page_size)]
+            if ids:
+                yield ids
+            if len(ids) < page_size:
+                return
+            upper = f"({ids[-1]}"
+
+    def _truncate(self, thread_id: str, checkpoint_ns: str, excess: int) -> None:
+        index_key = self._index_key(thread_id, checkpoint_ns)
+        old_ids = [_decode(i) for i in self.client.zrange(index_key, 0, excess - 1)]
+        if not old_ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for checkpoint_id in old_ids:
+            pipe.delete(
+                self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id),
+                self._writes_key(thread_id, checkpoint_ns, checkpoint_id),
+            )
+        pipe.zrem(index_key, *old_ids)
+        pipe.execute()
@@ -0,0 +1,498 @@
+"""
+SQLite-backed checkpointer
+
+A middle ground between the in-memory store and Redis: checkpoints survive
+restarts without running a server. The database runs in WAL mode, so readers
+never block the writer or each other.
+
+All writes go through one connection owned by a writer thread. Callers queue
+their statements and wait; the writer takes everything queued (up to
+``max_batch`` requests) and commits it as one transaction, so concurrent
+sessions share each commit instead of contending for the database lock. Each
+request runs inside its own savepoint, so a failing one does not roll back
+the rest of its batch. Reads use a pool of connections. Statements are fixed
+strings, so each connection prepares them once and reuses them from its
+statement cache.
+
+Tables (rows use the shared binary ``codec``):
+
+    checkpoints(thread_id, checkpoint_ns, checkpoint_id, row)
+    writes(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, row)
+
+Both are keyed (``WITHOUT ROWID``) on their leading columns, so the latest
+checkpoint of a thread is one index seek at any table size.
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.base.id import uuid6
+
+from . import codec
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    row BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    row BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+_INSERT_CHECKPOINT = (
+    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, row) "
+    "VALUES (?, ?, ?, ?)"
+)
+# Regular writes keep their first value (a retried task must not overwrite it), special
+# channels the last
+_INSERT_WRITE = (
+    "INSERT OR IGNORE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, row) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_REPLACE_WRITE = (
+    "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, row) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+# Newest checkpoint id past the history limit (NULL while under it)
+_HISTORY_CUTOFF = (
+    "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+    "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?)"
+)
+_PRUNE_WRITES = (
+    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+    f"AND checkpoint_id <= {_HISTORY_CUTOFF}"
+)
+_PRUNE_CHECKPOINTS = (
+    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+    f"AND checkpoint_id <= {_HISTORY_CUTOFF}"
+)
+_DELETE_THREAD = (
+    "DELETE FROM writes WHERE thread_id = ?",
+    "DELETE FROM checkpoints WHERE thread_id = ?",
+)
+
+_SELECT_LATEST = (
+    "SELECT checkpoint_id, row FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+    "ORDER BY checkpoint_id DESC LIMIT 1"
+)
+_SELECT_CHECKPOINT = (
+    "SELECT checkpoint_id, row FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+    "AND checkpoint_id = ?"
+)
+_SELECT_WRITES = (
+    "SELECT row FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+)
+
+# One queued request: a function run on the writer's connection, and its caller's future
+_Request = Tuple[Callable[[sqlite3.Connection], Any], Future]
+
+_STOP = object()
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def sqlite_path(url: str) -> str:
+    """Database path from a ``sqlite:///relative.db`` or ``sqlite:////absolute.db`` URL."""
+    if not url.startswith("sqlite:///"):
+        raise ValueError(f"Expected a sqlite:/// URL, got {url!r}")
+    return url[len("sqlite:///"):]
+
+
+def _configurable(config: RunnableConfig) -> Dict[str, Any]:
+    # Plain ``{"thread_id": ...}`` configs (used outside graphs) are accepted too
+    return config.get("configurable") or config
+
+
+class SqliteSaver(BaseCheckpointSaver[str]):
+    """Checkpointer storing compact binary checkpoints in a SQLite database in WAL mode."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_history: Optional[int] = 10,
+        synchronous: str = "NORMAL",
+        max_batch: int = 256,
+        read_pool_size: int = 8,
+        serde=None,
+    ):
+        if synchronous.upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}")
+        if path == ":memory:" or path.startswith("file::memory:"):
+            raise ValueError(
+                "SqliteSaver needs a database file: WAL readers cannot share an in-memory database"
+            )
+        super().__init__(serde=serde)
+        self.path = path
+        self.max_history = max_history
+        self.max_batch = max_batch
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._writer_conn = self._connect()
+        self._writer_conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL: a commit survives a process crash; FULL: also power loss (one more fsync
+        # per batch)
+        self._writer_conn.execute(f"PRAGMA synchronous={synchronous.upper()}")
+        self._writer_conn.executescript(_SCHEMA)
+
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._read_slots = threading.BoundedSemaphore(read_pool_size)
+        self._requests: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.counters = {"commits": 0, "requests": 0, "largest_batch": 0, "failed_requests": 0}
+        self._writer = threading.Thread(
+            target=self._write_loop, name="sqlite-checkpointer", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False, cached_statements=64
+        )
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _submit(self, apply: Callable[[sqlite3.Connection], Any]) -> Future:
+        future: Future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("SqliteSaver is closed")
+            self._requests.put((apply, future))
+        return future
+
+    def _write_loop(self) -> None:
+        conn = self._writer_conn
+        batch: List[_Request] = []
+        try:
+            while True:
+                first = self._requests.get()
+                if first is _STOP:
+                    return
+                batch = [first]
+                stopping = False
+                # Everything that queued up during the previous commit goes into this one
+                while len(batch) < self.max_batch:
+                    try:
+                        request = self._requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    if request is _STOP:
+                        stopping = True
+                        break
+                    batch.append(request)
+                self._commit(conn, batch)
+                if stopping:
+                    return
+        finally:
+            # Stopped or died: nothing queued will run, so nobody may keep waiting for it
+            with self._submit_lock:
+                self._closed = True
+            stranded = [future for _, future in batch]
+            while True:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not _STOP:
+                    stranded.append(request[1])
+            for future in stranded:
+                if not future.done():
+                    future.set_exception(sqlite3.ProgrammingError("SqliteSaver writer stopped"))
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Request]) -> None:
+        results = []
+        failed = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for apply, future in batch:
+                conn.execute("SAVEPOINT request")
+                try:
+                    result = apply(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO request")
+                    result, failed = e, failed + 1
+                conn.execute("RELEASE request")
+                results.append(result)
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results, failed = [e] * len(batch), len(batch)
+        # Callers are released only once their transaction is committed
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        with self._stats_lock:
+            self.counters["commits"] += 1
+            self.counters["requests"] += len(batch)
+            self.counters["failed_requests"] += failed
+            self.counters["largest_batch"] = max(self.counters["largest_batch"], len(batch))
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        if self._closed:
+            raise sqlite3.ProgrammingError("SqliteSaver is closed")
+        with self._read_slots:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                conn.execute("PRAGMA query_only=1")
+            try:
+                yield conn
+            finally:
+                self._readers.put(conn)
+
+    # ------------------------------------------------------------------
+    # Checkpointer interface
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = _configurable(config)
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable.get("checkpoint_id")
+        with self._reader() as conn:
+            if checkpoint_id:
+                found = conn.execute(
+                    _SELECT_CHECKPOINT, (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchone()
+            else:
+                found = conn.execute(_SELECT_LATEST, (thread_id, checkpoint_ns)).fetchone()
+            if found is None:
+                return None
+            writes = conn.execute(_SELECT_WRITES, (thread_id, checkpoint_ns, found[0])).fetchall()
+        return self._tuple(thread_id, checkpoint_ns, found[0], found[1], writes)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is None:
+            raise ValueError("SqliteSaver.list requires a config with a thread_id")
+        configurable = _configurable(config)
+        thread_id = str(configurable["thread_id"])
+        query = "SELECT checkpoint_ns, checkpoint_id, row FROM checkpoints WHERE thread_id = ?"
+        params: List[Any] = [thread_id]
+        if "checkpoint_ns" in configurable:
+            query += " AND checkpoint_ns = ?"
+            params.append(configurable["checkpoint_ns"])
+        if configurable.get("checkpoint_id"):
+            query += " AND checkpoint_id = ?"
+            params.append(configurable["checkpoint_id"])
+        before_id = _configurable(before).get("checkpoint_id") if before else None
+        if before_id:
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY checkpoint_id DESC"
+        # Metadata filters are applied after decoding, so the limit can only go to SQL without one
+        if limit is not None and not filter:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        items = []
+        with self._reader() as conn:
+            for checkpoint_ns, checkpoint_id, row in conn.execute(query, params).fetchall():
+                if filter:
+                    metadata = codec.decode_metadata(self.serde, row)
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                writes = conn.execute(
+                    _SELECT_WRITES, (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchall()
+                items.append(self._tuple(thread_id, checkpoint_ns, checkpoint_id, row, writes))
+                if limit is not None and len(items) >= limit:
+                    break
+        yield from items
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: Optional[ChannelVersions] = None,
+    ) -> RunnableConfig:
+        return self._put(config, checkpoint, metadata).result()
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self._put_writes(config, writes, task_id, task_path).result()
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._delete_thread(thread_id).result()
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return codec.next_version(current)
+
+    # Async variants: reads run in worker threads, writes wait for the writer thread without
+    # holding one
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: Optional[ChannelVersions] = None,
+    ) -> RunnableConfig:
+        return await asyncio.wrap_future(self._put(config, checkpoint, metadata))
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.wrap_future(self._put_writes(config, writes, task_id, task_path))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.wrap_future(self._delete_thread(thread_id))
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def close(self) -> None:
+        """Commit what is queued, stop the writer and close every connection."""
+        with self._submit_lock:
+            if not self._closed:
+                self._closed = True
+                self._requests.put(_STOP)
+        self._writer.join()
+        self._writer_conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self.counters)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _put(self, config: RunnableConfig, checkpoint: Checkpoint,
+             metadata: CheckpointMetadata) -> Future:
+        configurable = _configurable(config)
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = checkpoint.get("id") or str(uuid6())
+        # Encoding happens on the caller's thread; the writer only runs SQL
+        row = codec.encode_checkpoint(
+            self.serde, checkpoint, get_checkpoint_metadata(config, metadata),
+            configurable.get("checkpoint_id"),
+        )
+        max_history = self.max_history
+
+        def apply(conn: sqlite3.Connection) -> RunnableConfig:
+            conn.execute(_INSERT_CHECKPOINT, (thread_id, checkpoint_ns, checkpoint_id, row))
+            if max_history:
+                cutoff = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, max_history)
+                conn.execute(_PRUNE_WRITES, cutoff)
+                conn.execute(_PRUNE_CHECKPOINTS, cutoff)
+            return codec.checkpoint_config(thread_id, checkpoint_ns, checkpoint_id)
+
+        return self._submit(apply)
+
+    def _put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                    task_path: str) -> Future:
+        configurable = _configurable(config)
+        key = (
+            str(configurable["thread_id"]),
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+        )
+        inserts, replaces = [], []
+        for position, (channel, value) in enumerate(writes):
+            idx = codec.write_index(channel, position)
+            row = codec.encode_write(self.serde, task_id, idx, channel, value, task_path)
+            (replaces if idx < 0 else inserts).append((*key, task_id, idx, row))
+
+        def apply(conn: sqlite3.Connection) -> None:
+            if inserts:
+                conn.executemany(_INSERT_WRITE, inserts)
+            if replaces:
+                conn.executemany(_REPLACE_WRITE, replaces)
+
+        return self._submit(apply)
+
+    def _delete_thread(self, thread_id: str) -> Future:
+        def apply(conn: sqlite3.Connection) -> None:
+            for statement in _DELETE_THREAD:
+                conn.execute(statement, (str(thread_id),))
+
+        return self._submit(apply)
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, row: bytes,
+               writes: List[Tuple[bytes]]) -> CheckpointTuple:
+        checkpoint, metadata, parent_id = codec.decode_checkpoint(self.serde, row)
+        decoded = codec.decode_writes(self.serde, [w[0] for w in writes])
+        return codec.make_tuple(thread_id, checkpoint_ns, checkpoint_id, checkpoint, metadata,
+                                parent_id, decoded)
@@ -0,0 +1,233 @@
+"""
+Circuit breakers for the model client and tools
+
+When a dependency degrades, every call to it otherwise waits out the full
+client timeout before failing, so threads, connections and admission slots
+pile up behind a service that is not answering. A ``CircuitBreaker`` tracks
+the outcome of the last ``window_size`` calls to one dependency:
+
+- CLOSED: calls go through. Once the window holds at least
+  ``failure_threshold`` failures and they make up ``failure_rate`` of it,
+  the circuit opens.
+- OPEN: calls fail immediately with ``CircuitOpenError`` for
+  ``reset_timeout`` seconds.
+- HALF_OPEN: up to ``half_open_max_calls`` trial calls go through;
+  ``success_threshold`` successes close the circuit, a failure reopens it.
+
+Breakers are per dependency: ``get_circuit_breaker("llm")`` guards the model
+client shared by both agents and the tool executor uses one per tool
+(``"tool:<name>"``). Only failures that say something about the dependency's
+health count: by default every exception, for the model only transient ones
+(``retry.is_retryable``), so a bad request does not trip the circuit.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from . import metrics
+
+CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit breaker is OPEN for '{name}'; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a sliding window of recent call outcomes."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        success_threshold: int = 2,
+        failure_rate: float = 0.5,
+        window_size: int = 20,
+        half_open_max_calls: int = 1,
+        name: str = "default",
+        is_failure: Callable[[BaseException], bool] = lambda error: True,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.success_threshold = success_threshold
+        self.failure_rate = failure_rate
+        self.window_size = max(window_size, failure_threshold)
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+        self.is_failure = is_failure
+        # True for each failed call, oldest first
+        self._window: Deque[bool] = deque(maxlen=self.window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+        metrics.observe_circuit_state(name, CLOSED)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a trial call through (0 when not open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._trials = self._trial_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CLOSED:
+            self._window.clear()
+        metrics.observe_circuit_state(self.name, state)
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+
+    def allow(self) -> None:
+        """Admit one call or raise ``CircuitOpenError``; every admitted call must be recorded."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._trials < self.half_open_max_calls:
+                self._trials += 1
+                return
+            retry_after = max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+        metrics.observe_circuit_rejection(self.name)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials = max(0, self._trials - 1)
+                self._trial_successes += 1
+                if self._trial_successes >= self.success_threshold:
+                    self._transition(CLOSED)
+            elif self._state == CLOSED:
+                self._window.append(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+            elif self._state == CLOSED:
+                self._window.append(True)
+                failures = sum(self._window)
+                rate_exceeded = failures >= self.failure_rate * len(self._window)
+                if failures >= self.failure_threshold and rate_exceeded:
+                    self._transition(OPEN)
+
+    def record(self, error: Optional[BaseException]) -> None:
+        """Record the outcome of an admitted call (``error`` is None on success)."""
+        if error is not None and self.is_failure(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def release(self) -> None:
+        """Give back an admitted call that ended without an outcome (e.g. it was cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trials = max(0, self._trials - 1)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._transition(CLOSED)
+
+    # Guarding calls
+
+    def __enter__(self) -> "CircuitBreaker":
+        self.allow()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is not None and not isinstance(exc, Exception):
+            self.release()
+        else:
+            self.record(exc)
+        return False
+
+    async def __aenter__(self) -> "CircuitBreaker":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        return self.__exit__(exc_type, exc, tb)
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self:
+            return fn(*args, **kwargs)
+
+    async def acall(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        async with self:
+            return await fn(*args, **kwargs)
+
+
+def retry_after_header(error: CircuitOpenError) -> str:
+    """``Retry-After`` value (whole seconds, at least 1) for a fast-failed request."""
+    return str(max(1, math.ceil(error.retry_after)))
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def create_circuit_breaker(name: str, is_failure: Optional[Callable[[BaseException], bool]] = None
+                           ) -> Optional[CircuitBreaker]:
+    """
+    Build a breaker for dependency ``name`` from environment settings; None when disabled.
+
+    CIRCUIT_BREAKER_ENABLED          turn breakers off with false (default true)
+    CIRCUIT_FAILURE_THRESHOLD        failures in the window before opening (default 5)
+    CIRCUIT_FAILURE_RATE             share of the window that must have failed (default 0.5)
+    CIRCUIT_WINDOW_SIZE              recent calls considered (default 20)
+    CIRCUIT_RESET_TIMEOUT_SECONDS    time open before trial calls (default 30)
+    CIRCUIT_SUCCESS_THRESHOLD        trial successes needed to close (default 2)
+    """
+    if os.getenv("CIRCUIT_BREAKER_ENABLED", "true").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    kwargs = {"is_failure": is_failure} if is_failure is not None else {}
+    return CircuitBreaker(
+        failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+        failure_rate=float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+        window_size=int(os.getenv("CIRCUIT_WINDOW_SIZE", "20")),
+        reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT_SECONDS", "30")),
+        success_threshold=int(os.getenv("CIRCUIT_SUCCESS_THRESHOLD", "2")),
+        name=name,
+        **kwargs,
+    )
+
+
+def get_circuit_breaker(name: str, is_failure: Optional[Callable[[BaseException], bool]] = None
+                        ) -> Optional[CircuitBreaker]:
+    """Return the process-wide breaker for dependency ``name`` (None when breakers are disabled)."""
+    breaker = _breakers.get(name)
+    if breaker is None and name not in _breakers:
+        with _breakers_lock:
+            if name not in _breakers:
+                _breakers[name] = create_circuit_breaker(name, is_failure)
+            breaker = _breakers[name]
+    return breaker
+
+
+def reset_circuit_breakers() -> None:
+    """Close every process-wide breaker."""
+    for breaker in list(_breakers.values()):
+        if breaker is not None:
+            breaker.reset()
@@ -2,81 +2,111 @@
 Core LangGraph Agent Implementation
 """
 
-import os
-from typing import Annotated, List, Optional, Literal
+import uuid
+from typing import List, Optional, Literal
 from datetime import datetime
 from dotenv import load_dotenv
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_core.tools import tool
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models import BaseChatModel
 from langgraph.graph import StateGraph, END, START
-from langgraph.prebuilt import ToolNode, create_react_agent
-# Use memory checkpointing for now - Redis checkpointing may not be available in all versions
 from langgraph.graph.message import MessagesState
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from .callbacks import ToolUsageTracker
+from .checkpointers import create_checkpointer
+from .history import ConversationWindow, WindowedState, create_context_window
+from .circuit_breaker import CircuitBreaker
+from .deadlines import arun_turn, astream_turn, run_turn, stream_turn, turn_config
+from .llm import DEFAULT_MODEL, get_llm, get_llm_circuit_breaker, guarded_model
+from .metrics import callbacks as metrics_callbacks, instrument_checkpointer
+from .retry import Retrier, get_llm_retrier
+from .sessions import SessionLocks, get_session_locks
+from .tool_execution import create_tool_node
+from .tools import get_tools
+# Re-exported for existing imports
+from .tools import calculate, echo, get_current_time  # noqa: F401
 
 # Load environment variables
 load_dotenv()
 
-# Basic tools for the agent
-@tool
-def get_current_time() -> str:
-    """Get the current date and time."""
-    return f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-
-@tool
-def calculate(expression: str) -> str:
-    """Calculate a mathematical expression safely."""
-    try:
-        # Simple evaluation for basic math - in production, use a proper math parser
-        result = eval(expression)
-        return f"Result: {expression} = {result}"
-    except Exception as e:
-        return f"Error calculating {expression}: {str(e)}"
-
-@tool
-def echo(message: str) -> str:
-    """Echo back the input message."""
-    return f"Echo: {message}"
 
 class LangGraphAgent:
     """Main LangGraph Agent class using modern patterns."""
-    
-    def __init__(self, redis_url: Optional[str] = None):
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        context_window: Optional[ConversationWindow] = None,
+        llm: Optional[BaseChatModel] = None,
+        session_locks: Optional[SessionLocks] = None,
+        retrier: Optional[Retrier] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         """Initialize the agent."""
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            api_key=os.getenv("OPENAI_API_KEY")
+        # One pooled client shared by every agent variant unless one is passed in
+        self.llm = llm or get_llm()
+
+        # Tools come from the shared registry
+        self.tools = get_tools()
+
+        # Initialize checkpointer - Redis when redis_url is set, bounded memory otherwise
+        self.checkpointer = instrument_checkpointer(checkpointer or create_checkpointer(redis_url))
+
+        # Keep long sessions inside the model's context budget (CONTEXT_* env vars)
+        self.context_window = context_window or create_context_window(self.llm)
+
+        # Turns on the same session run one at a time (shared by every agent variant)
+        self.session_locks = session_locks if session_locks is not None else get_session_locks()
+
+        # Transient model errors are retried with jittered backoff under a shared budget
+        # (LLM_* env vars)
+        self.retrier = retrier if retrier is not None else get_llm_retrier()
+
+        # Fail fast while the model API is down instead of waiting out its timeout
+        # (CIRCUIT_* env vars)
+        self.circuit_breaker = (
+            circuit_breaker if circuit_breaker is not None else get_llm_circuit_breaker()
         )
-        
-        # Define tools
-        self.tools = [get_current_time, calculate, echo]
-        
-        # Initialize checkpointer - using memory for now
-        from langgraph.checkpoint.memory import MemorySaver
-        self.checkpointer = MemorySaver()
-        
+
         # Create the graph using modern patterns
         self.graph = self._create_graph()
-    
+
     def _create_graph(self) -> StateGraph:
         """Create the LangGraph workflow using modern patterns."""
-        # Use MessagesState for better message handling
-        workflow = StateGraph(MessagesState)
-        
-        # Bind tools to LLM
-        llm_with_tools = self.llm.bind_tools(self.tools)
-        
-        # Define the agent node
-        def call_model(state: MessagesState):
-            messages = state['messages']
-            response = llm_with_tools.invoke(messages)
-            return {"messages": [response]}
-        
-        # Define tool node
-        tool_node = ToolNode(self.tools)
-        
+        # Use MessagesState for better message handling (plus the rolling summary)
+        workflow = StateGraph(WindowedState)
+
+        # Bind tools to LLM; calls retry transient failures behind the circuit breaker
+        llm_with_tools = guarded_model(
+            self.llm.bind_tools(self.tools), self.retrier, self.circuit_breaker
+        )
+        window = self.context_window
+
+        def with_response(update: dict, response) -> dict:
+            update["messages"] = update.get("messages", []) + [response]
+            return update
+
+        # Define the agent node (sync for invoke/stream, async for ainvoke/astream)
+        def call_model(state: WindowedState):
+            if window is None:
+                return {"messages": [llm_with_tools.invoke(state['messages'])]}
+            update = window.prepare(state)
+            response = llm_with_tools.invoke(update.pop("llm_input_messages"))
+            return with_response(update, response)
+
+        async def acall_model(state: WindowedState):
+            if window is None:
+                return {"messages": [await llm_with_tools.ainvoke(state['messages'])]}
+            update = await window.aprepare(state)
+            response = await llm_with_tools.ainvoke(update.pop("llm_input_messages"))
+            return with_response(update, response)
+
+        # Tool calls from one model turn run concurrently, each with a timeout
+        tool_node = create_tool_node(self.tools)
+
         # Define conditional logic
         def should_continue(state: MessagesState) -> Literal["tools", END]:
             messages = state['messages']
@@ -84,11 +114,11 @@ class LangGraphAgent:
             if last_message.tool_calls:
                 return "tools"
             return END
-        
+
         # Add nodes
-        workflow.add_node("agent", call_model)
+        workflow.add_node("agent", RunnableLambda(call_model, afunc=acall_model, name="call_model"))
         workflow.add_node("tools", tool_node)
-        
+
         # Add edges
         workflow.add_edge(START, "agent")
         workflow.add_conditional_edges(
@@ -100,46 +130,92 @@ class LangGraphAgent:
             }
         )
         workflow.add_edge("tools", "agent")
-        
+
         return workflow.compile(checkpointer=self.checkpointer)
-    
-    def chat(self, user_input: str, session_id: str = "default") -> dict:
-        """Process a chat message."""
-        messages = [HumanMessage(content=user_input)]
-        
-        result = self.graph.invoke(
-            {"messages": messages}, 
-            {"configurable": {"thread_id": session_id}}
-        )
-        
+
+    def chat(
+        self, user_input: str, session_id: str = "default", deadline: Optional[float] = None
+    ) -> dict:
+        """
+        Process a chat message.
+
+        ``deadline`` is a ``time.monotonic()`` timestamp; a turn stopped by it
+        (or by the step cap) returns what it has so far, see ``deadlines.py``.
+        """
+        turn_id = str(uuid.uuid4())
+        messages = [HumanMessage(content=user_input, id=turn_id)]
+
+        tracker = ToolUsageTracker()
+        config = turn_config(session_id, [tracker, *metrics_callbacks()], deadline)
+        with self.session_locks.hold(session_id):
+            result = run_turn(self.graph, {"messages": messages}, config, turn_id)
+
+        return self._format_result(result, session_id, tracker.tools_used)
+
+    async def achat(
+        self, user_input: str, session_id: str = "default", deadline: Optional[float] = None
+    ) -> dict:
+        """Process a chat message without blocking the event loop; cancelled at ``deadline``."""
+        turn_id = str(uuid.uuid4())
+        messages = [HumanMessage(content=user_input, id=turn_id)]
+
+        tracker = ToolUsageTracker()
+        config = turn_config(session_id, [tracker, *metrics_callbacks()], deadline)
+        async with self.session_locks.ahold(session_id):
+            result = await arun_turn(self.graph, {"messages": messages}, config, turn_id)
+
+        return self._format_result(result, session_id, tracker.tools_used)
+
+    def _format_result(self, result: dict, session_id: str, tools_used: List[str]) -> dict:
+        """Build the chat response payload from the final graph state."""
         # Extract response and metadata
         last_message = result["messages"][-1]
-        response_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
-        
-        # Track tools used
-        tools_used = []
-        for message in result["messages"]:
-            if hasattr(message, 'tool_calls') and message.tool_calls:
-                for tool_call in message.tool_calls:
-                    if tool_call["name"] not in tools_used:
-                        tools_used.append(tool_call["name"])
-        
+        response_content = (
+            last_message.content if hasattr(last_message, 'content') else str(last_message)
+        )
+
+        metadata = {
+            "timestamp": datetime.now().isoformat(),
+            "model": DEFAULT_MODEL
+        }
+        if result.get("stop_reason"):
+            # Turn cut short by its deadline or the step cap
+            metadata.update(partial=True, stop_reason=result["stop_reason"])
+
         return {
             "messages": result["messages"],
             "agent_response": response_content,
             "session_id": session_id,
             "tools_used": tools_used,
-            "metadata": {
-                "timestamp": datetime.now().isoformat(),
-                "model": "gpt-4o-mini"
-            }
+            "metadata": metadata
         }
-    
-    def stream_chat(self, user_input: str, session_id: str = "default"):
+
+    def stream_chat(
+        self, user_input: str, session_id: str = "default", deadline: Optional[float] = None
+    ):
         """Stream chat responses."""
-        messages = [HumanMessage(content=user_input)]
-        
-        return self.graph.stream(
-            {"messages": messages}, 
-            {"configurable": {"thread_id": session_id}}
+        turn_id = str(uuid.uuid4())
+        messages = [HumanMessage(content=user_input, id=turn_id)]
+
+        config = turn_config(session_id, metrics_callbacks(), deadline)
+        return self.session_locks.locked_stream(session_id, stream_turn(
+            self.graph, self.graph.stream({"messages": messages}, config), config, turn_id
+        ))
+
+    def astream_chat(self, user_input: str, session_id: str = "default", stream_mode="updates",
+                     deadline: Optional[float] = None):
+        """
+        Stream chat responses as an async iterator.
+
+        ``stream_mode="messages"`` (or a list including it) yields LLM tokens
+        as ``(message_chunk, metadata)`` pairs while the model is generating.
+        The stream ends with ``DeadlineExceeded`` when ``deadline`` expires.
+        """
+        turn_id = str(uuid.uuid4())
+        messages = [HumanMessage(content=user_input, id=turn_id)]
+
+        config = turn_config(session_id, metrics_callbacks(), deadline)
+        stream = self.graph.astream({"messages": messages}, config, stream_mode=stream_mode)
+        return self.session_locks.alocked_stream(
+            session_id, astream_turn(self.graph, stream, config, turn_id)
         )
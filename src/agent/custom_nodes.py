@@ -3,45 +3,62 @@ Custom Node Implementations for Learning Plan 2
 
 🎯 This file contains STUB implementations that you need to complete.
 Each class has TODO comments indicating what you need to implement.
+``RetryNode`` and ``BatchProcessingNode`` are already implemented and can serve as references.
 
 The tests in test_learning_02.py will fail until you properly implement these classes.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 import asyncio
+import inspect
+import itertools
+import os
 import time
-from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from .retry import Retrier, RetryBudget, is_retryable
 
 
 class MultiOperationNode:
     """
     🧪 Exercise 1.1: Multi-operation node
-    
+
     TODO: Implement a node that can perform multiple operations in sequence.
-    
+
     Required methods:
     - execute(input_data: Dict[str, Any]) -> Dict[str, Any]
-    
+
     The execute method should:
     1. Validate input data
     2. Process each operation in the operations list
     3. Return structured results with success status
     """
-    
+
     def __init__(self):
         # TODO: Initialize your multi-operation node
         pass
-    
+
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute multiple operations in sequence.
-        
+
         Expected input_data format:
         {
             "operations": ["validate_input", "process_data", "format_output"],
             "data": {"value": 42, "type": "number"}
         }
-        
+
         Expected return format:
         {
             "success": True,
@@ -59,66 +76,105 @@ class MultiOperationNode:
 class StatefulNode:
     """
     🧪 Exercise 1.2: Stateful node with internal state management
-    
+
     TODO: Implement a node that maintains internal state between calls.
-    
+
     Required methods:
     - get_state() -> Dict[str, Any]
     - update_state(state_update: Dict[str, Any]) -> None
     - process(input_data: Dict[str, Any]) -> Dict[str, Any]
     - reset_state() -> None
     """
-    
+
     def __init__(self):
         # TODO: Initialize internal state
         pass
-    
+
     def get_state(self) -> Dict[str, Any]:
         """Return current internal state."""
         # TODO: Implement state retrieval
         raise NotImplementedError("You need to implement get_state method")
-    
+
     def update_state(self, state_update: Dict[str, Any]) -> None:
         """Update internal state with new values."""
         # TODO: Implement state updates
         raise NotImplementedError("You need to implement update_state method")
-    
+
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process input and update internal state."""
         # TODO: Implement processing logic that updates state
         # For example, if input_data["action"] == "increment", increment counter
         raise NotImplementedError("You need to implement process method")
-    
+
     def reset_state(self) -> None:
         """Reset internal state to initial values."""
         # TODO: Implement state reset
         raise NotImplementedError("You need to implement reset_state method")
 
 
+def _simulated_operation(input_data: Dict[str, Any], attempt: int) -> Dict[str, Any]:
+    """Stand-in operation: ``input_data["operation"]`` is success, fail_twice or always_fail."""
+    operation = input_data.get("operation", "success")
+    if operation == "always_fail" or (operation == "fail_twice" and attempt < 2):
+        raise ConnectionError(f"Simulated failure of '{operation}' (attempt {attempt + 1})")
+    return {"operation": operation, "data": input_data.get("data")}
+
+
 class RetryNode:
     """
-    🧪 Exercise 1.3: Node with configurable retry logic
-    
-    TODO: Implement a node with sophisticated retry mechanisms.
-    
-    Required methods:
-    - execute(input_data: Dict[str, Any]) -> Dict[str, Any]
-    
-    The node should support:
-    - Configurable max retries
-    - Exponential backoff
-    - Different failure handling strategies
+    Node that retries a failing operation with exponential backoff.
+
+    Retries go through ``agent.retry.Retrier``: only transient errors are
+    retried (see ``is_retryable``), delays are jittered, an optional
+    ``RetryBudget`` caps retries across calls and a ``deadline``
+    (``time.monotonic()`` timestamp) stops retries that would overrun it.
+    ``aexecute`` waits with ``asyncio.sleep`` so it never blocks the loop.
+
+    ``operation(input_data, attempt)`` defaults to a simulated operation
+    driven by ``input_data["operation"]``.
     """
-    
-    def __init__(self, max_retries: int = 3, base_delay: float = 0.1):
-        # TODO: Initialize retry configuration
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 10.0,
+        jitter: str = "full",
+        operation: Optional[Callable[[Dict[str, Any], int], Any]] = None,
+        budget: Optional[RetryBudget] = None,
+        retryable: Callable[[BaseException], bool] = is_retryable,
+    ):
         self.max_retries = max_retries
         self.base_delay = base_delay
-    
-    def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.operation = operation or _simulated_operation
+        self.retrier = Retrier(max_retries=max_retries, base_delay=base_delay, max_delay=max_delay,
+                               jitter=jitter, budget=budget, retryable=retryable)
+
+    def _attempts(self, input_data: Dict[str, Any]):
+        attempts = []
+
+        def attempt():
+            attempts.append(len(attempts))
+            return self.operation(input_data, len(attempts) - 1)
+        return attempts, attempt
+
+    @staticmethod
+    def _outcome(
+        attempts: List[int], result: Any = None, error: Optional[BaseException] = None
+    ) -> Dict[str, Any]:
+        outcome = {"success": error is None, "retry_count": max(0, len(attempts) - 1)}
+        if error is None:
+            outcome["result"] = result
+        else:
+            outcome["final_error"] = f"{type(error).__name__}: {error}"
+        return outcome
+
+    def execute(
+        self, input_data: Dict[str, Any], deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Execute operation with retry logic.
-        
+
         Expected return format:
         {
             "success": True/False,
@@ -127,40 +183,254 @@ class RetryNode:
             "result": {...} (if successful)
         }
         """
-        # TODO: Implement retry logic with exponential backoff
-        # Handle different operation types:
-        # - "success": should succeed immediately
-        # - "fail_twice": should fail twice then succeed
-        # - "always_fail": should exhaust retries and fail
-        raise NotImplementedError("You need to implement execute method for RetryNode")
+        attempts, attempt = self._attempts(input_data)
+        try:
+            result = self.retrier.call(attempt, operation="node", deadline=deadline)
+        except Exception as e:
+            return self._outcome(attempts, error=e)
+        return self._outcome(attempts, result)
+
+    async def aexecute(
+        self, input_data: Dict[str, Any], deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async version of ``execute``; a coroutine ``operation`` is awaited."""
+        attempts, attempt = self._attempts(input_data)
+
+        async def aattempt():
+            result = attempt()
+            return await result if inspect.isawaitable(result) else result
+        try:
+            result = await self.retrier.acall(aattempt, operation="node", deadline=deadline)
+        except Exception as e:
+            return self._outcome(attempts, error=e)
+        return self._outcome(attempts, result)
+
+
+def _default_processor(item: Any) -> Any:
+    """Mark an item as processed (used when no processor is given)."""
+    return {**item, "processed": True} if isinstance(item, dict) else item
+
+
+def _run_chunk(
+    processor: Callable[[Any], Any], chunk: List[Tuple[int, Any]]
+) -> List[Tuple[int, bool, Any]]:
+    """Process one chunk, isolating per-item failures; module level so process pools pickle it."""
+    records = []
+    for index, item in chunk:
+        try:
+            records.append((index, True, processor(item)))
+        except Exception as e:
+            records.append((index, False, f"{type(e).__name__}: {e}"))
+    return records
+
+
+async def _arun_chunk(processor: Callable[[Any], Awaitable[Any]], chunk: List[Tuple[int, Any]],
+                      semaphore: asyncio.Semaphore) -> List[Tuple[int, bool, Any]]:
+    async def one(index, item):
+        async with semaphore:
+            try:
+                return index, True, await processor(item)
+            except Exception as e:
+                return index, False, f"{type(e).__name__}: {e}"
+    return list(await asyncio.gather(*(one(index, item) for index, item in chunk)))
 
 
 class BatchProcessingNode:
     """
-    🧪 Exercise 1.4: Node for efficient batch processing
-    
-    TODO: Implement a node that can process multiple items efficiently.
-    
-    Required methods:
-    - process_batch(items: List[Dict[str, Any]]) -> Dict[str, Any]
-    
-    Features to implement:
-    - Parallel processing support
-    - Progress tracking
-    - Partial failure handling
-    - Configurable batch sizes
+    Batch processing engine with pluggable executors.
+
+    Items are split into chunks of ``batch_size`` and run on one of:
+
+    - ``"sequential"``: in the calling thread (the default when ``parallel`` is False)
+    - ``"thread"``: a thread pool, for blocking I/O-bound processors (the default when
+      ``parallel`` is True)
+    - ``"process"``: a process pool, for CPU-bound processors (processor and items must be
+      picklable)
+    - ``"async"``: the event loop, for coroutine processors (sync ones run in worker threads);
+      ``max_workers`` bounds concurrent items
+
+    ``stream``/``astream`` yield ``{"index", "success", "result" | "error"}``
+    records as chunks complete. Input is consumed lazily and at most
+    ``max_pending`` chunks are in flight, so arbitrarily large iterables are
+    processed in bounded memory. ``process_batch`` collects everything into
+    a summary.
     """
-    
-    def __init__(self, batch_size: int = 10, parallel: bool = False):
-        # TODO: Initialize batch processing configuration
+
+    BACKENDS = ("sequential", "thread", "process", "async")
+
+    def __init__(
+        self,
+        batch_size: int = 10,
+        parallel: bool = False,
+        processor: Optional[Callable[[Any], Any]] = None,
+        backend: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+    ):
+        backend = backend or ("thread" if parallel else "sequential")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend must be one of {', '.join(self.BACKENDS)}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
         self.batch_size = batch_size
-        self.parallel = parallel
-    
-    def process_batch(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.parallel = backend != "sequential"
+        self.backend = backend
+        self.processor = processor or _default_processor
+        # The async backend awaits its processor; a sync one runs in a worker thread
+        self._aprocessor = self.processor
+        if backend == "async" and not inspect.iscoroutinefunction(self.processor):
+            sync_processor = self.processor
+
+            async def in_thread(item):
+                return await asyncio.to_thread(sync_processor, item)
+            self._aprocessor = in_thread
+        default_workers = (os.cpu_count() or 1) if backend == "process" else min(32, batch_size * 4)
+        self.max_workers = max_workers or default_workers
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.on_progress = on_progress
+        self.progress = {"submitted": 0, "completed": 0, "failed": 0}
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def _chunks(self, items: Iterable[Any]) -> Iterator[List[Tuple[int, Any]]]:
+        indexed = enumerate(items)
+        while True:
+            chunk = list(itertools.islice(indexed, self.batch_size))
+            if not chunk:
+                return
+            self.progress["submitted"] += len(chunk)
+            yield chunk
+
+    def _records(self, records: List[Tuple[int, bool, Any]]) -> Iterator[Dict[str, Any]]:
+        for index, ok, value in records:
+            self.progress["completed"] += 1
+            self.progress["failed"] += not ok
+            yield {"index": index, "success": True, "result": value} if ok else {
+                "index": index, "success": False, "error": value
+            }
+        if self.on_progress:
+            self.on_progress(dict(self.progress))
+
+    def stream(self, items: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """Yield per-item records in completion order (chunk by chunk)."""
+        self.progress = {"submitted": 0, "completed": 0, "failed": 0}
+        if self.backend == "async":
+            yield from self._stream_async_in_new_loop(items)
+            return
+        if self.backend == "sequential":
+            for chunk in self._chunks(items):
+                yield from self._records(_run_chunk(self.processor, chunk))
+            return
+
+        pool_cls = ThreadPoolExecutor if self.backend == "thread" else ProcessPoolExecutor
+        with pool_cls(max_workers=self.max_workers) as pool:
+            chunks = self._chunks(items)
+            pending = set()
+            try:
+                while True:
+                    # Backpressure: only pull more input while fewer than max_pending chunks run
+                    for chunk in itertools.islice(chunks, self.max_pending - len(pending)):
+                        pending.add(pool.submit(_run_chunk, self.processor, chunk))
+                    if not pending:
+                        return
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from self._records(future.result())
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    async def astream(self, items: Iterable[Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of ``stream``; non-async backends run their chunks in an executor."""
+        self.progress = {"submitted": 0, "completed": 0, "failed": 0}
+        if self.backend != "async":
+            loop = asyncio.get_running_loop()
+            pool_cls = ProcessPoolExecutor if self.backend == "process" else ThreadPoolExecutor
+            workers = 1 if self.backend == "sequential" else self.max_workers
+            with pool_cls(max_workers=workers) as pool:
+                def submit(chunk):
+                    return loop.run_in_executor(pool, _run_chunk, self.processor, chunk)
+                async for record in self._astream_chunks(items, submit):
+                    yield record
+            return
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+        async for record in self._astream_chunks(
+            items,
+            lambda chunk: asyncio.ensure_future(_arun_chunk(self._aprocessor, chunk, semaphore)),
+        ):
+            yield record
+
+    async def _astream_chunks(self, items, submit) -> AsyncIterator[Dict[str, Any]]:
+        chunks = self._chunks(items)
+        pending = set()
+        try:
+            while True:
+                for chunk in itertools.islice(chunks, self.max_pending - len(pending)):
+                    pending.add(submit(chunk))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    for record in self._records(future.result()):
+                        yield record
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _stream_async_in_new_loop(self, items: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "The async backend cannot run synchronously inside an event loop; "
+                "use astream() or aprocess_batch() instead"
+            )
+        loop = asyncio.new_event_loop()
+        records = self.astream(items)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(records.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(records.aclose())
+            loop.close()
+
+    # ------------------------------------------------------------------
+    # Collected results
+    # ------------------------------------------------------------------
+
+    def _summary(self, records: List[Dict[str, Any]], started: float) -> Dict[str, Any]:
+        results: List[Any] = [None] * len(records)
+        errors = []
+        for record in records:
+            if record["success"]:
+                results[record["index"]] = record["result"]
+            else:
+                errors.append({"index": record["index"], "error": record["error"]})
+        errors.sort(key=lambda e: e["index"])
+        return {
+            "total_items": len(records),
+            "successful_items": len(records) - len(errors),
+            "failed_items": len(errors),
+            "results": results,
+            "processing_time": time.perf_counter() - started,
+            "errors": errors,
+        }
+
+    def process_batch(self, items: Iterable[Any]) -> Dict[str, Any]:
         """
         Process a batch of items.
-        
-        Expected return format:
+
+        ``results`` is in input order (``None`` for failed items) and
+        ``errors`` lists ``{"index", "error"}`` for each failure:
         {
             "total_items": 10,
             "successful_items": 9,
@@ -170,8 +440,10 @@ class BatchProcessingNode:
             "errors": [...]
         }
         """
-        # TODO: Implement batch processing logic
-        # Consider parallel processing if self.parallel is True
-        # Handle individual item failures gracefully
-        # Track timing and provide comprehensive results
-        raise NotImplementedError("You need to implement process_batch method")
+        started = time.perf_counter()
+        return self._summary(list(self.stream(items)), started)
+
+    async def aprocess_batch(self, items: Iterable[Any]) -> Dict[str, Any]:
+        """Async version of ``process_batch``."""
+        started = time.perf_counter()
+        return self._summary([record async for record in self.astream(items)], started)
@@ -0,0 +1,228 @@
+"""
+Per-request deadlines for agent turns
+
+A turn's deadline is a ``time.monotonic()`` timestamp carried in the graph
+config (``configurable["deadline"]``), so every layer can see how much time
+is left:
+
+- model calls are refused once it has passed and, on the async path, are
+  cut off when it expires (``llm.GuardedModel``); retries never start a
+  backoff that would end past it (``retry.Retrier``)
+- tool calls get ``min(tool timeout, time left)`` (``tool_execution``)
+- the async turn itself is cancelled when it expires
+
+The number of agent/tools steps in one turn is capped by ``recursion_limit``
+(``AGENT_MAX_STEPS``). A turn stopped by its deadline, the step cap or a
+client disconnect is closed cleanly: tool calls left without an answer get
+an error ``ToolMessage`` and a closing ``AIMessage`` is checkpointed, so the
+next turn on the session starts from a valid history. When the turn had
+produced something, a partial result is returned (``stop_reason`` set);
+otherwise ``DeadlineExceeded`` is raised.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.runnables.config import ensure_config
+from langgraph.errors import GraphRecursionError
+
+# Steps (node runs) allowed in one turn; LangGraph's own default is 25
+MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "25"))
+
+STOP_NOTES = {
+    "deadline": "I ran out of time before I could finish this request.",
+    "step_limit": "I needed more steps than allowed to finish this request.",
+    "cancelled": "This request was cancelled before it finished.",
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a turn's deadline passes before it produced an answer."""
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """Deadline ``seconds`` from now (None for no deadline)."""
+    return None if seconds is None else time.monotonic() + seconds
+
+
+def deadline_from(config: Optional[dict]) -> Optional[float]:
+    """The request deadline carried in a runnable config (or the current one), if any."""
+    return ensure_config(config).get("configurable", {}).get("deadline")
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """Seconds until ``deadline`` (None without one); raises once it has passed."""
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return left
+
+
+def turn_config(
+    session_id: str, callbacks: List[Any], deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """Graph config for one turn: session thread, callbacks, step cap and deadline."""
+    configurable: Dict[str, Any] = {"thread_id": session_id}
+    if deadline is not None:
+        configurable["deadline"] = deadline
+    return {"configurable": configurable, "callbacks": callbacks, "recursion_limit": MAX_STEPS}
+
+
+def stop_reason(error: BaseException) -> str:
+    if isinstance(error, GraphRecursionError):
+        return "step_limit"
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    return "deadline"
+
+
+# Interrupted turns
+
+def _turn_messages(messages: List[BaseMessage], turn_id: str) -> List[BaseMessage]:
+    for i, message in enumerate(messages):
+        if getattr(message, "id", None) == turn_id:
+            return messages[i + 1:]
+    return []
+
+
+def _closing_messages(turn: List[BaseMessage], reason: str) -> List[BaseMessage]:
+    """Answers for pending tool calls plus a closing AI message built from any text produced."""
+    if not turn or (isinstance(turn[-1], AIMessage) and not turn[-1].tool_calls):
+        # The turn was never checkpointed, or it had already finished
+        return []
+    answered = {m.tool_call_id for m in turn if isinstance(m, ToolMessage)}
+    closing: List[BaseMessage] = [
+        ToolMessage(content=f"Error: not run ({reason})", tool_call_id=call["id"],
+                    name=call["name"], status="error")
+        for m in turn if isinstance(m, AIMessage)
+        for call in m.tool_calls if call["id"] not in answered
+    ]
+    text = [
+        m.content for m in turn
+        if isinstance(m, AIMessage) and isinstance(m.content, str) and m.content
+    ]
+    closing.append(AIMessage(content="\n\n".join(text + [STOP_NOTES[reason]])))
+    return closing
+
+
+def _partial(values: Dict[str, Any], turn: List[BaseMessage], closing: List[BaseMessage],
+             reason: str, error: BaseException) -> Dict[str, Any]:
+    if not any(isinstance(m, AIMessage) for m in turn):
+        # Nothing to show for this turn
+        if isinstance(error, DeadlineExceeded):
+            raise error
+        raise DeadlineExceeded("Request deadline exceeded") from error
+    return {**values, "messages": list(values.get("messages", [])) + closing, "stop_reason": reason}
+
+
+def close_interrupted_turn(
+    graph, config: Dict[str, Any], turn_id: str, error: BaseException
+) -> Dict[str, Any]:
+    """Checkpoint a clean end for a turn stopped by ``error`` and return the partial result."""
+    reason = stop_reason(error)
+    thread = {"configurable": config["configurable"]}
+    values = graph.get_state(thread).values
+    turn = _turn_messages(values.get("messages", []), turn_id)
+    closing = _closing_messages(turn, reason)
+    if closing:
+        graph.update_state(thread, {"messages": closing}, as_node="agent")
+    return _partial(values, turn, closing, reason, error)
+
+
+async def aclose_interrupted_turn(graph, config: Dict[str, Any], turn_id: str,
+                                  error: BaseException) -> Dict[str, Any]:
+    """Async version of ``close_interrupted_turn``."""
+    reason = stop_reason(error)
+    thread = {"configurable": config["configurable"]}
+    values = (await graph.aget_state(thread)).values
+    turn = _turn_messages(values.get("messages", []), turn_id)
+    closing = _closing_messages(turn, reason)
+    if closing:
+        await graph.aupdate_state(thread, {"messages": closing}, as_node="agent")
+    return _partial(values, turn, closing, reason, error)
+
+
+# Running turns
+
+INTERRUPTIONS = (DeadlineExceeded, GraphRecursionError)
+
+
+def run_turn(
+    graph, graph_input: Dict[str, Any], config: Dict[str, Any], turn_id: str
+) -> Dict[str, Any]:
+    """Invoke one turn; a turn stopped by its deadline or step cap returns a partial result."""
+    try:
+        return graph.invoke(graph_input, config)
+    except INTERRUPTIONS as e:
+        return close_interrupted_turn(graph, config, turn_id, e)
+
+
+async def arun_turn(
+    graph, graph_input: Dict[str, Any], config: Dict[str, Any], turn_id: str
+) -> Dict[str, Any]:
+    """Invoke one turn, cancelling it when its deadline expires; see ``run_turn``."""
+    deadline = config["configurable"].get("deadline")
+    try:
+        try:
+            return await asyncio.wait_for(graph.ainvoke(graph_input, config), time_left(deadline))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Request deadline exceeded") from None
+    except INTERRUPTIONS as e:
+        return await aclose_interrupted_turn(graph, config, turn_id, e)
+    except asyncio.CancelledError as e:
+        # Client went away: still leave the session in a consistent state
+        await asyncio.shield(_aclose_quietly(graph, config, turn_id, e))
+        raise
+
+
+async def _aclose_quietly(graph, config, turn_id, error) -> None:
+    try:
+        await aclose_interrupted_turn(graph, config, turn_id, error)
+    except DeadlineExceeded:
+        pass
+
+
+def stream_turn(
+    graph, stream: Iterator[Any], config: Dict[str, Any], turn_id: str
+) -> Iterator[Any]:
+    """Relay a turn's stream; on an interruption close the turn, then re-raise."""
+    try:
+        yield from stream
+    except INTERRUPTIONS as e:
+        _close_quietly(graph, config, turn_id, e)
+        raise
+
+
+def _close_quietly(graph, config, turn_id, error) -> None:
+    try:
+        close_interrupted_turn(graph, config, turn_id, error)
+    except DeadlineExceeded:
+        pass
+
+
+async def astream_turn(graph, stream: AsyncIterator[Any], config: Dict[str, Any],
+                       turn_id: str) -> AsyncIterator[Any]:
+    """Relay a turn's async stream until its deadline; interrupted turns are closed, re-raised."""
+    deadline = config["configurable"].get("deadline")
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(stream.__anext__(), time_left(deadline))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Request deadline exceeded") from None
+            yield item
+    except INTERRUPTIONS as e:
+        await _aclose_quietly(graph, config, turn_id, e)
+        raise
+    except (asyncio.CancelledError, GeneratorExit) as e:
+        await asyncio.shield(_aclose_quietly(graph, config, turn_id, e))
+        raise
+    finally:
+        await stream.aclose()
@@ -0,0 +1,83 @@
+"""
+Agent factory
+
+Builds agent variants on first use and caches them, so a process only pays
+for (and holds memory for) the variants it actually serves. All variants
+share the registry tools and the pooled LLM client from ``get_llm``.
+
+``AGENT_VARIANTS`` lists the enabled variants (comma separated, default
+``custom,modern``).
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+VARIANTS = ("custom", "modern")
+
+
+def _build_custom(**kwargs: Any):
+    from .core import LangGraphAgent
+    return LangGraphAgent(**kwargs)
+
+
+def _build_modern(**kwargs: Any):
+    from .modern import ModernLangGraphAgent
+    return ModernLangGraphAgent(**kwargs)
+
+
+_BUILDERS: Dict[str, Callable[..., Any]] = {
+    "custom": _build_custom,
+    "modern": _build_modern,
+}
+
+
+class VariantDisabledError(LookupError):
+    """Raised when asking the factory for a variant this deployment does not serve."""
+
+
+def enabled_variants_from_env() -> tuple:
+    raw = os.getenv("AGENT_VARIANTS", ",".join(VARIANTS))
+    return tuple(v.strip() for v in raw.split(",") if v.strip())
+
+
+class AgentFactory:
+    """Lazily builds and caches one agent per enabled variant."""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        enabled: Optional[Iterable[str]] = None,
+        **agent_kwargs: Any,
+    ):
+        self.enabled = tuple(enabled) if enabled is not None else enabled_variants_from_env()
+        unknown = [v for v in self.enabled if v not in _BUILDERS]
+        if unknown:
+            raise ValueError(f"Unknown agent variants: {', '.join(unknown)}")
+        self.agent_kwargs = {"redis_url": redis_url, **agent_kwargs}
+        self._agents: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def is_enabled(self, variant: str) -> bool:
+        return variant in self.enabled
+
+    def get(self, variant: str):
+        """Return the agent for ``variant``, building it on first use."""
+        agent = self._agents.get(variant)
+        if agent is not None:
+            return agent
+        if variant not in self.enabled:
+            raise VariantDisabledError(f"Agent variant '{variant}' is not enabled")
+        with self._lock:
+            if variant not in self._agents:
+                self._agents[variant] = _BUILDERS[variant](**self.agent_kwargs)
+            return self._agents[variant]
+
+    def built(self) -> tuple:
+        """Variants that have been built so far."""
+        return tuple(self._agents)
+
+    def warm_up(self) -> None:
+        """Build every enabled variant now (e.g. from a startup hook)."""
+        for variant in self.enabled:
+            self.get(variant)
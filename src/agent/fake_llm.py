@@ -0,0 +1,229 @@
+"""
+Scripted chat model for offline runs and benchmarks
+
+``ScriptedChatModel`` stands in for the provider client (``LLM_PROVIDER=fake``)
+so both agents, the API and the benchmarks run without network access. Each
+call sleeps for a delay drawn from a ``LatencyDistribution`` and then answers:
+
+- from ``replies``, cycled in order, when a script is given (plain strings,
+  ``AIMessage`` objects or ``{"content": ..., "tool_calls": [...]}`` dicts)
+- otherwise with a small default policy: a user message is answered directly
+  or, for ``tool_rate`` of them, with an ``echo`` tool call first; a tool
+  result is answered by quoting it
+
+Delays and tool decisions come from a random generator seeded with ``seed``
+and the conversation itself, so a run is reproducible whatever the request
+interleaving.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+
+class LatencyDistribution:
+    """
+    Delay per model call in seconds.
+
+    ``parse`` accepts ``"0.2"`` or ``"fixed:0.2"``, ``"uniform:LOW,HIGH"``,
+    ``"normal:MEAN,STDDEV"``, ``"lognormal:MEDIAN,SIGMA"`` and
+    ``"exponential:MEAN"``; samples are never negative.
+    """
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, kind: str = "fixed", *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(
+                f"Unknown latency distribution '{kind}' (expected one of {', '.join(self.KINDS)})"
+            )
+        if len(params) != self.KINDS[kind]:
+            raise ValueError(
+                f"'{kind}' latency takes {self.KINDS[kind]} parameter(s), got {len(params)}"
+            )
+        self.kind = kind
+        self.params = tuple(float(p) for p in params)
+
+    @classmethod
+    def parse(cls, spec: Any) -> "LatencyDistribution":
+        if isinstance(spec, LatencyDistribution):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("fixed", spec)
+        kind, _, params = str(spec).strip().partition(":")
+        if not params:
+            return cls("fixed", float(kind or 0))
+        return cls(kind.strip(), *(float(p) for p in params.split(",")))
+
+    def sample(self, rng: random.Random) -> float:
+        a = self.params[0]
+        if self.kind == "fixed":
+            value = a
+        elif self.kind == "uniform":
+            value = rng.uniform(a, self.params[1])
+        elif self.kind == "normal":
+            value = rng.gauss(a, self.params[1])
+        elif self.kind == "lognormal":
+            value = a * rng.lognormvariate(0.0, self.params[1])
+        else:
+            value = rng.expovariate(1.0 / a) if a > 0 else 0.0
+        return max(0.0, value)
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else json.dumps(message.content)
+
+
+def _as_reply(reply: Any) -> AIMessage:
+    if isinstance(reply, AIMessage):
+        return reply
+    if isinstance(reply, dict):
+        tool_calls = [
+            {"name": c["name"], "args": c.get("args", {}),
+             "id": c.get("id") or f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+            for c in reply.get("tool_calls", [])
+        ]
+        return AIMessage(content=reply.get("content", ""), tool_calls=tool_calls)
+    return AIMessage(content=str(reply))
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model: scripted or policy replies after a sampled delay."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    replies: List[Any] = []
+    latency: Any = 0.0
+    tool_rate: float = 0.0
+    seed: int = 0
+
+    _distribution: LatencyDistribution = PrivateAttr()
+    _turns: Any = PrivateAttr()
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._distribution = LatencyDistribution.parse(self.latency)
+        self._turns = itertools.count()
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"latency": repr(self._distribution), "tool_rate": self.tool_rate, "seed": self.seed}
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        # Tool schemas are not needed: the script and policy name tools directly
+        return self
+
+    def _rng(self, messages: Sequence[BaseMessage]) -> random.Random:
+        last = _text(messages[-1]) if messages else ""
+        return random.Random(f"{self.seed}:{len(messages)}:{last}")
+
+    def _reply(self, messages: Sequence[BaseMessage], rng: random.Random) -> AIMessage:
+        if self.replies:
+            with self._lock:
+                turn = next(self._turns)
+            return _as_reply(self.replies[turn % len(self.replies)])
+        last = messages[-1] if messages else HumanMessage(content="")
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"The {last.name or 'tool'} tool returned: {_text(last)}")
+        text = _text(last)
+        if rng.random() < self.tool_rate:
+            return AIMessage(content="", tool_calls=[{
+                "name": "echo", "args": {"message": text}, "id": f"call_{rng.getrandbits(48):012x}",
+                "type": "tool_call",
+            }])
+        return AIMessage(content=f"You said: {text}")
+
+    def _plan(self, messages: Sequence[BaseMessage]):
+        rng = self._rng(messages)
+        return self._distribution.sample(rng), self._reply(messages, rng)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, reply = self._plan(messages)
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, reply = self._plan(messages)
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    @staticmethod
+    def _chunks(reply: AIMessage):
+        if reply.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(reply.tool_calls)
+            ]))
+            return
+        for i, word in enumerate(reply.content.split(" ")):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + word))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        delay, reply = self._plan(messages)
+        time.sleep(delay)
+        for chunk in self._chunks(reply):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        delay, reply = self._plan(messages)
+        await asyncio.sleep(delay)
+        for chunk in self._chunks(reply):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def load_replies(path: Optional[str]) -> List[Any]:
+    """Scripted replies from a JSON file holding a list (empty without a path)."""
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as f:
+        replies = json.load(f)
+    if not isinstance(replies, list):
+        raise ValueError(f"{path} must hold a JSON list of replies")
+    return replies
+
+
+def create_fake_llm(**overrides: Any) -> ScriptedChatModel:
+    """
+    Build the fake model from environment settings.
+
+    FAKE_LLM_LATENCY     delay per call, e.g. ``0.2`` or ``lognormal:0.2,0.5`` (default 0)
+    FAKE_LLM_TOOL_RATE   share of user messages answered with a tool call first (default 0)
+    FAKE_LLM_SEED        seed for delays and tool decisions (default 0)
+    FAKE_LLM_REPLIES     JSON file with a list of scripted replies (default: the policy)
+    """
+    settings = {
+        "latency": os.getenv("FAKE_LLM_LATENCY", "0"),
+        "tool_rate": float(os.getenv("FAKE_LLM_TOOL_RATE", "0")),
+        "seed": int(os.getenv("FAKE_LLM_SEED", "0")),
+        "replies": load_replies(os.getenv("FAKE_LLM_REPLIES")),
+    }
+    settings.update(overrides)
+    return ScriptedChatModel(**settings)
@@ -0,0 +1,205 @@
+"""
+Conversation windowing for the agents' model calls
+
+``ConversationWindow`` runs right before every LLM call and decides which part
+of the conversation the model sees:
+
+- leading system messages are always kept (pinned)
+- the most recent messages are kept while they fit in ``max_tokens``
+- the window always starts on a human message, so tool calls and their
+  results are never split
+- optionally, messages that fall out of the window are folded into a rolling
+  summary that is cached in graph state and only recomputed when more
+  history falls out; with ``prune_messages`` the summarized messages are
+  also removed from state so checkpoints stop growing
+
+Only the window is walked on each call, so the cost per turn does not grow
+with the length of the session.
+"""
+
+import os
+from typing import Annotated, Any, Dict, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph.message import MessagesState, add_messages
+from langgraph.managed import RemainingSteps
+from typing_extensions import NotRequired, TypedDict
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation so far for your own future reference. "
+    "Keep names, numbers, decisions and open questions; drop pleasantries. "
+    "Reply with the summary only."
+)
+
+
+class WindowedState(MessagesState):
+    """MessagesState plus the cached rolling summary."""
+    summary: NotRequired[str]
+    summary_upto: NotRequired[int]
+
+
+class WindowedAgentState(TypedDict):
+    """State for ``create_react_agent`` with the cached rolling summary."""
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+    remaining_steps: NotRequired[RemainingSteps]
+    summary: NotRequired[str]
+    summary_upto: NotRequired[int]
+
+
+class ConversationWindow:
+    """Pre-model stage that keeps the prompt inside a token budget."""
+
+    def __init__(
+        self,
+        max_tokens: int = 8000,
+        summarizer: Optional[BaseChatModel] = None,
+        compact_ratio: float = 0.5,
+        prune_messages: bool = False,
+        token_counter=count_tokens_approximately,
+    ):
+        """
+        Args:
+            max_tokens: Budget for the messages sent to the model.
+            summarizer: Model used to summarize messages leaving the window.
+                Without one, old messages are simply not sent.
+            compact_ratio: When summarizing, shrink the window to this share
+                of the budget so the next summary is many turns away.
+            prune_messages: Remove summarized messages from graph state.
+            token_counter: Callable counting tokens for a list of messages.
+        """
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer.with_config(tags=[TAG_NOSTREAM]) if summarizer else None
+        self.compact_ratio = compact_ratio
+        self.prune_messages = prune_messages
+        self.token_counter = token_counter
+
+    def prepare(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Return ``llm_input_messages`` plus any summary/state updates."""
+        plan = self._plan(state)
+        if plan["to_summarize"]:
+            prompt = self._summary_prompt(plan["summary"], plan["to_summarize"])
+            plan["summary"] = self.summarizer.invoke(prompt).content
+        return self._finish(state, plan)
+
+    async def aprepare(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of ``prepare``."""
+        plan = self._plan(state)
+        if plan["to_summarize"]:
+            prompt = self._summary_prompt(plan["summary"], plan["to_summarize"])
+            plan["summary"] = (await self.summarizer.ainvoke(prompt)).content
+        return self._finish(state, plan)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _count(self, message: BaseMessage) -> int:
+        return self.token_counter([message])
+
+    def _window_start(self, messages: List[BaseMessage], lower: int, budget: int) -> int:
+        """Index of the oldest message that fits in ``budget``, walking back from the end."""
+        used = 0
+        start = len(messages)
+        for i in range(len(messages) - 1, lower - 1, -1):
+            used += self._count(messages[i])
+            if used > budget:
+                break
+            start = i
+
+        # Begin on a human message so tool call/result pairs stay together
+        while start < len(messages) and not isinstance(messages[start], HumanMessage):
+            start += 1
+        if start == len(messages):
+            # Even the latest turn is over budget; send it anyway
+            for i in range(len(messages) - 1, lower - 1, -1):
+                if isinstance(messages[i], HumanMessage):
+                    return i
+            return lower
+        return start
+
+    def _plan(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        messages = list(state["messages"])
+        pinned = 0
+        while pinned < len(messages) and isinstance(messages[pinned], SystemMessage):
+            pinned += 1
+
+        summary = state.get("summary") or ""
+        covered = max(state.get("summary_upto") or pinned, pinned)
+        budget = self.max_tokens - sum(self._count(m) for m in messages[:pinned])
+        if summary:
+            budget -= self._count(self._summary_message(summary))
+
+        start = self._window_start(messages, covered, budget)
+        to_summarize: List[BaseMessage] = []
+        if self.summarizer is not None and start > covered:
+            # Leave headroom so the next summary is many turns away
+            start = self._window_start(messages, covered, int(budget * self.compact_ratio))
+            to_summarize = messages[covered:start]
+
+        return {
+            "messages": messages,
+            "pinned": pinned,
+            "covered": covered,
+            "start": start,
+            "summary": summary,
+            "to_summarize": to_summarize,
+        }
+
+    def _summary_message(self, summary: str) -> SystemMessage:
+        return SystemMessage(content=f"Summary of the earlier conversation: {summary}")
+
+    def _summary_prompt(self, summary: str, messages: List[BaseMessage]) -> List[BaseMessage]:
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in messages if m.content)
+        if summary:
+            transcript = f"Previous summary: {summary}\n\n{transcript}"
+        return [SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=transcript)]
+
+    def _finish(self, state: Dict[str, Any], plan: Dict[str, Any]) -> Dict[str, Any]:
+        messages, pinned = plan["messages"], plan["pinned"]
+        start, summary = plan["start"], plan["summary"]
+
+        llm_input = messages[:pinned]
+        if summary:
+            llm_input.append(self._summary_message(summary))
+        llm_input.extend(messages[start:])
+
+        update: Dict[str, Any] = {"llm_input_messages": llm_input}
+        if plan["to_summarize"]:
+            update["summary"] = summary
+            if self.prune_messages:
+                update["messages"] = [RemoveMessage(id=m.id) for m in plan["to_summarize"] if m.id]
+                update["summary_upto"] = pinned
+            else:
+                update["summary_upto"] = start
+        return update
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def create_context_window(llm: Optional[BaseChatModel] = None) -> Optional[ConversationWindow]:
+    """
+    Build the agents' context window from environment settings.
+
+    CONTEXT_MAX_TOKENS       prompt token budget; unset or 0 (the default) sends the full
+                             history, so windowing is opt-in
+    CONTEXT_SUMMARIZE        summarize messages leaving the window with ``llm``
+    CONTEXT_PRUNE_MESSAGES   drop summarized messages from graph state
+    """
+    max_tokens = int(os.getenv("CONTEXT_MAX_TOKENS", "0") or 0)
+    if max_tokens <= 0:
+        return None
+    return ConversationWindow(
+        max_tokens=max_tokens,
+        summarizer=llm if _env_flag("CONTEXT_SUMMARIZE") else None,
+        prune_messages=_env_flag("CONTEXT_PRUNE_MESSAGES"),
+    )
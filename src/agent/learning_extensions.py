@@ -8,33 +8,33 @@ The tests in test_learning_01.py will fail until you properly implement these fu
 """
 
 from typing import Dict, Any, List, Optional
-from datetime import datetime
-import time
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage
 from langgraph.graph import MessagesState
 from agent.core import LangGraphAgent
+from agent.tracing import Tracer, create_tracer
 
 
 def enhanced_calculate(expression: str) -> str:
     """
     🧪 Exercise 1.1: Enhance the calculator tool
-    
+
     TODO: Extend the existing calculator to support:
     - Power operations (^): "2 ^ 3" should return "8"
-    - Square root operations: "sqrt(16)" should return "4"  
+    - Square root operations: "sqrt(16)" should return "4"
     - Percentage operations: "20% of 100" should return "20"
     - Keep existing functionality for +, -, *, /
-    
+
     Args:
         expression: Mathematical expression as string
-        
+
     Returns:
         String with the calculation result
     """
     # TODO: Implement enhanced calculator logic
     # You can use the existing calculate tool as a starting point
     # Look at src/agent/core.py to see how the original calculate tool works
-    
+    # src/agent/calculator.py already parses ^, sqrt() and percentages without eval()
+
     # This is a placeholder that will make tests fail
     raise NotImplementedError("You need to implement enhanced_calculate function")
 
@@ -42,79 +42,79 @@ def enhanced_calculate(expression: str) -> str:
 def reverse_string(text: str) -> str:
     """
     🧪 Exercise 1.2a: Create reverse_string utility tool
-    
+
     TODO: Create a simple function that reverses a string.
-    
+
     Args:
         text: String to reverse
-        
+
     Returns:
         Reversed string
     """
     # TODO: Implement string reversal
     # Hint: Python strings can be sliced with [::-1]
-    
+
     raise NotImplementedError("You need to implement reverse_string function")
 
 
 def word_count(text: str) -> int:
     """
     🧪 Exercise 1.2b: Create word_count utility tool
-    
+
     TODO: Create a function that counts words in text.
-    
+
     Args:
         text: Text to count words in
-        
+
     Returns:
         Number of words
     """
     # TODO: Implement word counting
     # Hint: You can split on whitespace and count the parts
-    
+
     raise NotImplementedError("You need to implement word_count function")
 
 
 def upper_lower(text: str, mode: str) -> str:
     """
     🧪 Exercise 1.2c: Create upper_lower case conversion tool
-    
+
     TODO: Create a function that converts text case.
-    
+
     Args:
         text: Text to convert
         mode: "upper" or "lower"
-        
+
     Returns:
         Converted text
     """
     # TODO: Implement case conversion
     # Handle both "upper" and "lower" modes
-    
+
     raise NotImplementedError("You need to implement upper_lower function")
 
 
 class LearningEnhancedAgent:
     """
     🧪 Exercise 1.3: Create an enhanced agent with new tools
-    
+
     TODO: Create an agent class that includes all existing tools plus your new ones.
-    
+
     This should:
     1. Include all tools from the original LangGraphAgent
     2. Add your enhanced_calculate tool
     3. Add your utility tools (reverse_string, word_count, upper_lower)
     4. Use the same graph structure as the original
     """
-    
+
     def __init__(self):
         # TODO: Initialize the enhanced agent
         # Look at src/agent/core.py to see how LangGraphAgent is implemented
         # You'll need to create tools and build a graph
-        
+
         self.tools = []  # TODO: Add all tools here
         self.graph = None  # TODO: Build the graph
-        
+
         # This is a placeholder that will make tests fail
         raise NotImplementedError("You need to implement LearningEnhancedAgent.__init__")
 
@@ -122,18 +122,18 @@ class LearningEnhancedAgent:
 class SessionState(MessagesState):
     """
     🧪 Exercise 2.1a: Create a session state that extends MessagesState
-    
+
     TODO: Add session tracking fields to the basic MessagesState.
     """
-    
+
     # TODO: Add additional fields for session tracking
     # Hint: You'll need session_id, message_count, start_time, etc.
-    
+
     def __init__(self, **kwargs):
         # TODO: Initialize the session state
         # Call parent constructor and add your fields
         super().__init__(**kwargs)
-        
+
         # This is a placeholder that will make tests fail
         raise NotImplementedError("You need to implement SessionState.__init__")
 
@@ -141,57 +141,57 @@ class SessionState(MessagesState):
 class SessionTracker:
     """
     🧪 Exercise 2.1b: Create a session tracker
-    
+
     TODO: Create a class that tracks session statistics.
     """
-    
+
     def __init__(self):
         # TODO: Initialize session tracking
         # You'll need to store session data somewhere
-        
+
         # This is a placeholder that will make tests fail
         self.sessions = {}
-    
+
     def create_session(self, session_id: str) -> SessionState:
         """Create a new session and return its state."""
         # TODO: Create a new session with the given ID
         # Return a SessionState object
-        
+
         raise NotImplementedError("You need to implement create_session method")
-    
+
     def add_message(self, session_id: str, message: str) -> None:
         """Add a message to the session."""
         # TODO: Track a new message in the session
         # Update message count and any other relevant stats
-        
+
         raise NotImplementedError("You need to implement add_message method")
-    
+
     def get_session_stats(self, session_id: str) -> Dict[str, Any]:
         """Get statistics for a session."""
         # TODO: Return session statistics
         # Should include message_count, session_duration, etc.
-        
+
         raise NotImplementedError("You need to implement get_session_stats method")
 
 
 class MessageHistoryAnalyzer:
     """
     🧪 Exercise 2.2: Create a message history analyzer
-    
+
     TODO: Create a class that analyzes message patterns.
     """
-    
+
     def __init__(self):
         # TODO: Initialize the analyzer
         pass
-    
+
     def analyze_messages(self, messages: List[BaseMessage]) -> Dict[str, Any]:
         """
         Analyze a list of messages and return insights.
-        
+
         Should return:
         - total_messages: int
-        - human_messages: int  
+        - human_messages: int
         - ai_messages: int
         - patterns: dict (any patterns you detect)
         - tool_usage: dict (tool usage statistics)
@@ -200,61 +200,85 @@ class MessageHistoryAnalyzer:
         # Count different message types
         # Look for patterns in the messages
         # Analyze tool usage if present
-        
+
         raise NotImplementedError("You need to implement analyze_messages method")
 
 
 class ConditionalRoutingAgent:
     """
     🧪 Exercise 3.1: Create a conditional routing agent
-    
+
     TODO: Create an agent that routes differently based on message type.
     """
-    
+
     def __init__(self):
         # TODO: Create an agent with conditional routing
         # Look at how the original agent creates its graph
         # Add conditional logic to route questions vs commands differently
-        
+
         self.graph = None
-        
+
         raise NotImplementedError("You need to implement ConditionalRoutingAgent.__init__")
-    
+
     def chat(self, message: str, session_id: str) -> str:
         """Chat with conditional routing based on message type."""
         # TODO: Implement chat with your conditional routing graph
-        
+
         raise NotImplementedError("You need to implement chat method")
 
 
 class LoggingGraphWrapper:
     """
     🧪 Exercise 3.2: Create a logging wrapper for graphs
-    
-    TODO: Create a wrapper that logs graph execution.
+
+    Runs the wrapped agent under a ``Tracer`` (see ``agent/tracing.py``): node
+    entry/exit and execution time come from graph callbacks as spans in a
+    fixed-size ring buffer, sampled per run and exportable as OTLP/JSON.
     """
-    
-    def __init__(self, original_agent: LangGraphAgent):
-        # TODO: Wrap the original agent with logging
-        # Store the original agent and initialize logging
-        
+
+    def __init__(self, original_agent: LangGraphAgent, tracer: Optional[Tracer] = None):
         self.original_agent = original_agent
-        self.execution_logs = []
-        
-        raise NotImplementedError("You need to implement LoggingGraphWrapper.__init__")
-    
+        # TRACING_* env vars set buffer size, sampling and the exporter
+        self.tracer = tracer if tracer is not None else create_tracer()
+
     def chat(self, message: str, session_id: str) -> str:
         """Chat with logging wrapper."""
-        # TODO: Implement chat with logging
-        # Log when nodes are entered/exited
-        # Track execution time
-        # Call the original agent's chat method
-        
-        raise NotImplementedError("You need to implement chat method")
-    
+        with self.tracer.activate():
+            result = self.original_agent.chat(message, session_id)
+        return result["agent_response"]
+
+    async def achat(self, message: str, session_id: str) -> str:
+        with self.tracer.activate():
+            result = await self.original_agent.achat(message, session_id)
+        return result["agent_response"]
+
     def get_execution_logs(self) -> List[Dict[str, Any]]:
-        """Get the execution logs."""
-        # TODO: Return the logs you've captured
-        # Each log entry should have node_entry, execution_time, etc.
-        
-        raise NotImplementedError("You need to implement get_execution_logs method")
+        """Node executions still in the buffer, oldest first."""
+        return [
+            {
+                "node": span.name,
+                "node_entry": span.start_ns / 1e9,
+                "node_exit": span.end_ns / 1e9,
+                "execution_time": span.duration,
+                "step": span.attributes.get("langgraph.step"),
+                "trace_id": span.trace_id,
+                "error": span.error,
+            }
+            for span in self.tracer.spans() if span.parent_id is not None
+        ]
+
+    def get_execution_stats(self) -> Dict[str, Dict[str, float]]:
+        """Count, total, mean and max execution time per node over the buffered logs."""
+        stats: Dict[str, Dict[str, float]] = {}
+        for log in self.get_execution_logs():
+            node = stats.setdefault(log["node"], {"count": 0, "total_time": 0.0, "max_time": 0.0})
+            node["count"] += 1
+            node["total_time"] += log["execution_time"]
+            node["max_time"] = max(node["max_time"], log["execution_time"])
+        for node in stats.values():
+            node["mean_time"] = node["total_time"] / node["count"]
+        return stats
+
+    def export_traces(self) -> int:
+        """Send buffered spans to the tracer's exporter; returns how many were sent."""
+        return self.tracer.flush()
@@ -0,0 +1,177 @@
+"""
+Shared chat model client
+
+Every agent variant talks to the same model through one ``ChatOpenAI``
+instance backed by pooled sync and async HTTP clients, so connections (and
+their TLS handshakes) are reused across agents and requests. The optional
+response cache (``LLM_CACHE``) is attached here, so every variant shares it.
+``langchain_openai`` is imported on first use, which keeps it off the API's
+import path.
+
+``LLM_PROVIDER`` picks the client: ``openai`` (default) or ``fake``, the
+scripted offline model from ``fake_llm`` used by the benchmarks. More
+providers can be added with ``register_provider``.
+
+``guarded_model`` wraps the tool-bound model each agent calls with the
+shared retry policy, circuit breaker and the request deadline.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableBinding
+
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from .deadlines import DeadlineExceeded, deadline_from, time_left
+from .llm_cache import create_llm_cache
+from .retry import Retrier, is_retryable
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+_llm: Optional[BaseChatModel] = None
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=30.0,
+    )
+
+
+def _openai_llm() -> BaseChatModel:
+    from langchain_openai import ChatOpenAI
+
+    limits = _limits()
+    return ChatOpenAI(
+        model=DEFAULT_MODEL,
+        temperature=0.7,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=httpx.Client(limits=limits),
+        http_async_client=httpx.AsyncClient(limits=limits),
+        # Model calls are retried by the agents (see retry.py); client retries would multiply them
+        max_retries=int(os.getenv("LLM_CLIENT_MAX_RETRIES", "0")),
+        # Opt-in response cache (LLM_CACHE); None leaves caching off
+        cache=create_llm_cache(),
+    )
+
+
+def _fake_llm() -> BaseChatModel:
+    from .fake_llm import create_fake_llm
+
+    return create_fake_llm(cache=create_llm_cache())
+
+
+_PROVIDERS: Dict[str, Callable[[], BaseChatModel]] = {
+    "openai": _openai_llm,
+    "fake": _fake_llm,
+}
+
+
+def register_provider(name: str, build: Callable[[], BaseChatModel]) -> None:
+    """Make ``LLM_PROVIDER=<name>`` build the shared model with ``build``."""
+    _PROVIDERS[name] = build
+
+
+def get_llm() -> BaseChatModel:
+    """Return the process-wide chat model from ``LLM_PROVIDER``, creating it on first call."""
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                provider = os.getenv("LLM_PROVIDER", "openai").strip().lower()
+                if provider not in _PROVIDERS:
+                    raise ValueError(
+                        f"Unknown LLM_PROVIDER '{provider}' "
+                        f"(expected one of {', '.join(_PROVIDERS)})"
+                    )
+                _llm = _PROVIDERS[provider]()
+    return _llm
+
+
+def get_llm_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Breaker for the model API; only transient errors count against it."""
+    return get_circuit_breaker("llm", is_failure=is_retryable)
+
+
+class GuardedModel(RunnableBinding):
+    """
+    A (tool-bound) chat model whose calls go through a ``CircuitBreaker``
+    and a ``Retrier``. Each attempt passes the breaker, so an open circuit
+    ends the retries at once; ``fallback`` then answers instead of the error.
+    Calls are refused once the request deadline has passed, and async calls
+    are cut off when it expires.
+    """
+
+    retrier: Optional[Retrier] = None
+    breaker: Optional[CircuitBreaker] = None
+    fallback: Optional[str] = None
+
+    def bind_tools(self, tools, **kwargs):
+        return guarded_model(
+            self.bound.bind_tools(tools, **kwargs), self.retrier, self.breaker, self.fallback
+        )
+
+    def invoke(self, input, config=None, **kwargs):
+        deadline = deadline_from(config)
+        time_left(deadline)
+        call = super().invoke
+        if self.breaker is not None:
+            call = functools.partial(self.breaker.call, call)
+        try:
+            if self.retrier is None:
+                return call(input, config, **kwargs)
+            return self.retrier.call(
+                call, input, config, operation="llm", deadline=deadline, **kwargs
+            )
+        except CircuitOpenError:
+            if self.fallback is None:
+                raise
+            return AIMessage(content=self.fallback)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        deadline = deadline_from(config)
+        left = time_left(deadline)
+        call = super().ainvoke
+        if self.breaker is not None:
+            call = functools.partial(self.breaker.acall, call)
+        if self.retrier is None:
+            attempts = call(input, config, **kwargs)
+        else:
+            attempts = self.retrier.acall(
+                call, input, config, operation="llm", deadline=deadline, **kwargs
+            )
+        try:
+            return await asyncio.wait_for(attempts, left)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Request deadline exceeded during a model call") from None
+        except CircuitOpenError:
+            if self.fallback is None:
+                raise
+            return AIMessage(content=self.fallback)
+
+
+def guarded_model(model: Runnable, retrier: Optional[Retrier] = None,
+                  breaker: Optional[CircuitBreaker] = None,
+                  fallback: Optional[str] = None) -> Runnable:
+    """
+    Wrap a (tool-bound) chat model with retries, a circuit breaker and deadline checks.
+
+    ``fallback`` defaults to ``LLM_FALLBACK_MESSAGE``; without one an open
+    circuit raises ``CircuitOpenError``.
+    """
+    fallback = fallback if fallback is not None else (os.getenv("LLM_FALLBACK_MESSAGE") or None)
+    if not isinstance(model, RunnableBinding):
+        return GuardedModel(bound=model, kwargs={}, retrier=retrier, breaker=breaker,
+                            fallback=fallback)
+    return GuardedModel(bound=model.bound, kwargs=model.kwargs, config=model.config,
+                        config_factories=model.config_factories,
+                        retrier=retrier, breaker=breaker, fallback=fallback)
@@ -0,0 +1,322 @@
+"""
+LLM response cache
+
+``LLMResponseCache`` plugs into LangChain's model cache hook
+(``BaseChatModel.cache``), so both agents consult it inside their normal
+model call: a hit skips the provider request entirely, while callbacks,
+tool-call tracking and streaming consumers still see the response.
+
+Keys are built from the normalized message history (message, tool-call and
+run ids, whitespace and provider metadata stripped) plus LangChain's
+``llm_string``, which already covers the model parameters and the bound tool
+schema. Two lookup modes:
+
+- ``exact``: the normalized history must match
+- ``semantic``: additionally, when the history before the latest user
+  message matches exactly, a latest message whose embedding is within
+  ``similarity_threshold`` (cosine) of a cached one is a hit
+
+Entries live in a pluggable backend: ``MemoryCacheBackend`` (in-process,
+LRU + TTL) or ``RedisCacheBackend`` (shared across replicas, TTL).
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from . import metrics
+
+# Keys removed from serialized messages before hashing: they differ between
+# otherwise identical conversations
+_VOLATILE_KEYS = {"tool_call_id", "response_metadata", "usage_metadata", "additional_kwargs"}
+
+
+def normalize_prompt(prompt: str) -> List[Any]:
+    """Turn LangChain's serialized prompt into a canonical, id-free structure."""
+    def clean(value):
+        if isinstance(value, dict):
+            return {
+                k: clean(v) for k, v in value.items()
+                if k not in _VOLATILE_KEYS and not (k == "id" and not isinstance(v, list))
+            }
+        if isinstance(value, list):
+            return [clean(v) for v in value]
+        if isinstance(value, str):
+            return " ".join(value.split())
+        return value
+
+    return clean(json.loads(prompt))
+
+
+def _digest(*parts: Any) -> str:
+    data = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _last_human(messages: List[Any]) -> Tuple[List[Any], Optional[str]]:
+    """Split off the latest human message text, if the prompt ends with one."""
+    if messages and isinstance(messages[-1], dict):
+        kwargs = messages[-1].get("kwargs", {})
+        if kwargs.get("type") == "human" and isinstance(kwargs.get("content"), str):
+            return messages[:-1], kwargs["content"]
+    return messages, None
+
+
+def hashing_embedding(text: str, dimensions: int = 256) -> List[float]:
+    """
+    Local, dependency-free embedding: hashed word and character-trigram counts.
+
+    Good enough to match rephrasings that share most of their wording; pass
+    a real embedding function for anything smarter.
+    """
+    vector = [0.0] * dimensions
+    words = re.findall(r"\w+", text.lower())
+    features = words + [w[i:i + 3] for w in words for i in range(max(1, len(w) - 2))]
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        vector[h % dimensions] += 1.0 if (h >> 63) else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+
+class MemoryCacheBackend:
+    """In-process LRU store with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Redis store shared across replicas; eviction via TTL and Redis maxmemory policy."""
+
+    # Network round trip: async lookups run in a worker thread
+    blocking = True
+
+    def __init__(
+        self,
+        client,
+        key_prefix: str = "langgraph:llm-cache",
+        ttl_seconds: Optional[int] = 3600,
+    ):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(f"{self.key_prefix}:{key}")
+        if not raw:
+            return None
+        # Only langchain_core classes (messages, generations) are revived from the shared store
+        return loads(raw.decode() if isinstance(raw, bytes) else raw, allowed_objects="core")
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(f"{self.key_prefix}:{key}", dumps(value), ex=self.ttl_seconds)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(f"{self.key_prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+class LLMResponseCache(BaseCache):
+    """LangChain model cache with normalized keys and optional semantic matching."""
+
+    def __init__(
+        self,
+        backend=None,
+        mode: str = "exact",
+        similarity_threshold: float = 0.92,
+        embed: Callable[[str], List[float]] = hashing_embedding,
+        max_semantic_entries: int = 1024,
+    ):
+        if mode not in ("exact", "semantic"):
+            raise ValueError("mode must be 'exact' or 'semantic'")
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.mode = mode
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self.max_semantic_entries = max_semantic_entries
+        # context key -> [(embedding, exact key)], newest last; kept in-process
+        self._semantic: "OrderedDict[str, List[Tuple[List[float], str]]]" = OrderedDict()
+        self._semantic_size = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _keys(self, prompt: str, llm_string: str) -> Tuple[str, str, Optional[str]]:
+        messages = normalize_prompt(prompt)
+        exact = _digest(llm_string, messages)
+        context, question = _last_human(messages)
+        return exact, _digest(llm_string, context), question
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        exact, context, question = self._keys(prompt, llm_string)
+        value = self.backend.get(exact)
+        kind = "hit"
+        if value is None and self.mode == "semantic" and question is not None:
+            match = self._nearest(context, self.embed(question))
+            if match is not None:
+                value = self.backend.get(match)
+                kind = "semantic_hit"
+        if value is None:
+            self._record("misses", "miss")
+            return None
+        self._record("hits" if kind == "hit" else "semantic_hits", kind)
+        return [self._fresh(generation) for generation in value]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        exact, context, question = self._keys(prompt, llm_string)
+        self.backend.set(exact, list(return_val))
+        if self.mode == "semantic" and question is not None:
+            self._remember(context, self.embed(question), exact)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear()
+        with self._lock:
+            self._semantic.clear()
+            self._semantic_size = 0
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if getattr(self.backend, "blocking", False):
+            return await asyncio.to_thread(self.lookup, prompt, llm_string)
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if getattr(self.backend, "blocking", False):
+            await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+        else:
+            self.update(prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _record(self, stat: str, result: str) -> None:
+        self.stats[stat] += 1
+        metrics.observe_llm_cache(result)
+
+    @staticmethod
+    def _fresh(generation: Generation) -> Generation:
+        """Copy a cached generation so it is stored as a new message without stale usage."""
+        message = getattr(generation, "message", None)
+        if message is None:
+            return generation
+        return generation.model_copy(
+            update={"message": message.model_copy(update={"id": None, "usage_metadata": None})}
+        )
+
+    def _nearest(self, context: str, vector: List[float]) -> Optional[str]:
+        with self._lock:
+            candidates = list(self._semantic.get(context, ()))
+        best, best_key = self.similarity_threshold, None
+        for candidate, key in candidates:
+            score = _cosine(vector, candidate)
+            if score >= best:
+                best, best_key = score, key
+        return best_key
+
+    def _remember(self, context: str, vector: List[float], key: str) -> None:
+        with self._lock:
+            bucket = self._semantic.setdefault(context, [])
+            bucket.append((vector, key))
+            self._semantic.move_to_end(context)
+            self._semantic_size += 1
+            while self._semantic_size > self.max_semantic_entries:
+                oldest_context, oldest = next(iter(self._semantic.items()))
+                oldest.pop(0)
+                self._semantic_size -= 1
+                if not oldest:
+                    del self._semantic[oldest_context]
+
+
+def create_llm_cache(redis_url: Optional[str] = None) -> Optional[LLMResponseCache]:
+    """
+    Build the response cache from environment settings (off unless LLM_CACHE is set).
+
+    LLM_CACHE                    "exact" or "semantic" enables the cache
+    LLM_CACHE_BACKEND            "memory" (default) or "redis" (uses REDIS_URL)
+    LLM_CACHE_MAX_ENTRIES        in-process entry limit (default 1024)
+    LLM_CACHE_TTL_SECONDS        entry lifetime (default 3600, 0 keeps entries until evicted)
+    LLM_CACHE_SIMILARITY         cosine threshold for semantic hits (default 0.92)
+    """
+    mode = os.getenv("LLM_CACHE", "").strip().lower()
+    if mode in ("", "0", "false", "off", "none"):
+        return None
+    ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600") or 0) or None
+    backend_name = os.getenv("LLM_CACHE_BACKEND", "memory").strip().lower()
+    redis_url = redis_url or os.getenv("REDIS_URL")
+    if backend_name == "redis":
+        if not redis_url:
+            raise ValueError("LLM_CACHE_BACKEND=redis requires REDIS_URL")
+        import redis
+
+        from .checkpointers import get_connection_pool
+        backend = RedisCacheBackend(
+            redis.Redis(connection_pool=get_connection_pool(redis_url)),
+            ttl_seconds=int(ttl) if ttl else None,
+        )
+    else:
+        backend = MemoryCacheBackend(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=ttl,
+        )
+    return LLMResponseCache(
+        backend,
+        mode="exact" if mode in ("1", "true", "on", "exact") else mode,
+        similarity_threshold=float(os.getenv("LLM_CACHE_SIMILARITY", "0.92")),
+    )
@@ -0,0 +1,402 @@
+"""
+Prometheus metrics for the agents and the API
+
+Metrics are collected when ``prometheus_client`` is installed and
+``METRICS_ENABLED`` is not turned off. When disabled, nothing is attached:
+``callbacks()`` returns an empty list, ``instrument_checkpointer`` returns
+the saver unchanged and the API skips its middleware, so the hot paths pay
+nothing.
+
+Collected series:
+
+    http_request_duration_seconds{route,method,status}
+    graph_node_duration_seconds{node}
+    llm_request_duration_seconds{model}
+    llm_tokens_total{model,type}
+    llm_errors_total{model}
+    llm_cache_requests_total{result}
+    tool_duration_seconds{tool}
+    tool_errors_total{tool}
+    checkpointer_operation_duration_seconds{backend,operation}
+    checkpointer_evictions_total{reason}
+    active_streams{route}
+    admission_in_flight
+    admission_queue_depth
+    admission_wait_seconds{priority}
+    admission_rejections_total{priority,reason}
+    retries_total{operation,outcome}
+    circuit_breaker_state{name}
+    circuit_breaker_rejections_total{name}
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    prometheus_client = None
+
+ENABLED = prometheus_client is not None and os.getenv(
+    "METRICS_ENABLED", "true"
+).strip().lower() not in ("0", "false", "no", "off")
+
+# Sub-millisecond buckets for checkpoint I/O, seconds-long ones for LLM calls
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+if ENABLED:
+    registry = prometheus_client.CollectorRegistry()
+    prometheus_client.ProcessCollector(registry=registry)
+
+    REQUEST_DURATION = prometheus_client.Histogram(
+        "http_request_duration_seconds", "HTTP request latency by route",
+        ["route", "method", "status"], buckets=SLOW_BUCKETS, registry=registry,
+    )
+    NODE_DURATION = prometheus_client.Histogram(
+        "graph_node_duration_seconds", "Graph node execution time",
+        ["node"], buckets=SLOW_BUCKETS, registry=registry,
+    )
+    LLM_DURATION = prometheus_client.Histogram(
+        "llm_request_duration_seconds", "LLM call latency",
+        ["model"], buckets=SLOW_BUCKETS, registry=registry,
+    )
+    LLM_TOKENS = prometheus_client.Counter(
+        "llm_tokens_total", "LLM tokens by direction",
+        ["model", "type"], registry=registry,
+    )
+    LLM_ERRORS = prometheus_client.Counter(
+        "llm_errors_total", "Failed LLM calls",
+        ["model"], registry=registry,
+    )
+    LLM_CACHE_REQUESTS = prometheus_client.Counter(
+        "llm_cache_requests_total", "LLM response cache lookups by result",
+        ["result"], registry=registry,
+    )
+    TOOL_DURATION = prometheus_client.Histogram(
+        "tool_duration_seconds", "Tool execution time",
+        ["tool"], buckets=FAST_BUCKETS + SLOW_BUCKETS[5:], registry=registry,
+    )
+    TOOL_ERRORS = prometheus_client.Counter(
+        "tool_errors_total", "Tool calls that raised or returned an error",
+        ["tool"], registry=registry,
+    )
+    TOOL_CACHE_REQUESTS = prometheus_client.Counter(
+        "tool_cache_requests_total", "Tool result cache lookups by tool and result",
+        ["tool", "result"], registry=registry,
+    )
+    CHECKPOINT_DURATION = prometheus_client.Histogram(
+        "checkpointer_operation_duration_seconds", "Checkpointer read/write time",
+        ["backend", "operation"], buckets=FAST_BUCKETS, registry=registry,
+    )
+    CHECKPOINT_EVICTIONS = prometheus_client.Counter(
+        "checkpointer_evictions_total", "Checkpoints or threads dropped by the bounded saver",
+        ["reason"], registry=registry,
+    )
+    ACTIVE_STREAMS = prometheus_client.Gauge(
+        "active_streams", "Open streaming responses",
+        ["route"], registry=registry,
+    )
+    ADMISSION_IN_FLIGHT = prometheus_client.Gauge(
+        "admission_in_flight", "Chat requests currently admitted",
+        registry=registry,
+    )
+    ADMISSION_QUEUE_DEPTH = prometheus_client.Gauge(
+        "admission_queue_depth", "Chat requests waiting for a slot",
+        registry=registry,
+    )
+    ADMISSION_WAIT = prometheus_client.Histogram(
+        "admission_wait_seconds", "Time queued before admission",
+        ["priority"], buckets=SLOW_BUCKETS, registry=registry,
+    )
+    ADMISSION_REJECTIONS = prometheus_client.Counter(
+        "admission_rejections_total", "Chat requests turned away by admission control",
+        ["priority", "reason"], registry=registry,
+    )
+    RETRIES = prometheus_client.Counter(
+        "retries_total", "Retry decisions after a failed LLM or tool call",
+        ["operation", "outcome"], registry=registry,
+    )
+    CIRCUIT_STATE = prometheus_client.Gauge(
+        "circuit_breaker_state",
+        "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open)",
+        ["name"], registry=registry,
+    )
+    CIRCUIT_REJECTIONS = prometheus_client.Counter(
+        "circuit_breaker_rejections_total", "Calls failed fast by an open circuit",
+        ["name"], registry=registry,
+    )
+else:
+    registry = None
+
+
+def render() -> Tuple[bytes, str]:
+    """Return the exposition payload and its content type."""
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def observe_request(route: str, method: str, status: int, seconds: float) -> None:
+    REQUEST_DURATION.labels(route, method, str(status)).observe(seconds)
+
+
+def observe_llm_cache(result: str) -> None:
+    """Count an LLM cache lookup (``hit``, ``semantic_hit`` or ``miss``)."""
+    if ENABLED:
+        LLM_CACHE_REQUESTS.labels(result).inc()
+
+
+def observe_tool_cache(tool: str, result: str) -> None:
+    """Count a tool result cache lookup (``hit`` or ``miss``)."""
+    if ENABLED:
+        TOOL_CACHE_REQUESTS.labels(tool, result).inc()
+
+
+def observe_tool_timeout(tool: str) -> None:
+    """Count a tool call abandoned after its timeout as a tool error."""
+    if ENABLED:
+        TOOL_ERRORS.labels(tool).inc()
+
+
+def observe_checkpoint_eviction(reason: str, count: int = 1) -> None:
+    """Count evictions by the bounded saver (``history``, ``ttl``, ``lru`` or ``bytes``)."""
+    if ENABLED:
+        CHECKPOINT_EVICTIONS.labels(reason).inc(count)
+
+
+@contextmanager
+def track_stream(route: str):
+    """Count an open stream for the lifetime of the block."""
+    if not ENABLED:
+        yield
+        return
+    gauge = ACTIVE_STREAMS.labels(route)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+def observe_admission(in_flight: int, queued: int) -> None:
+    if ENABLED:
+        ADMISSION_IN_FLIGHT.set(in_flight)
+        ADMISSION_QUEUE_DEPTH.set(queued)
+
+
+def observe_admission_wait(priority: str, seconds: float) -> None:
+    if ENABLED:
+        ADMISSION_WAIT.labels(priority).observe(seconds)
+
+
+def observe_admission_rejection(priority: str, reason: str) -> None:
+    if ENABLED:
+        ADMISSION_REJECTIONS.labels(priority, reason).inc()
+
+
+def observe_retry(operation: str, outcome: str) -> None:
+    """
+    Count a retry decision: ``retried``, ``exhausted``, ``budget``, ``deadline``
+    or ``non_retryable``.
+    """
+    if ENABLED:
+        RETRIES.labels(operation, outcome).inc()
+
+
+_CIRCUIT_STATES = {"CLOSED": 0, "HALF_OPEN": 1, "OPEN": 2}
+
+
+def observe_circuit_state(name: str, state: str) -> None:
+    if ENABLED:
+        CIRCUIT_STATE.labels(name).set(_CIRCUIT_STATES[state])
+
+
+def observe_circuit_rejection(name: str) -> None:
+    if ENABLED:
+        CIRCUIT_REJECTIONS.labels(name).inc()
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times graph nodes, LLM calls and tools from LangChain callback events."""
+
+    run_inline = True
+
+    def __init__(self):
+        # run_id -> (label, start time)
+        self._nodes: Dict[UUID, Tuple[str, float]] = {}
+        self._llms: Dict[UUID, Tuple[str, float]] = {}
+        self._tools: Dict[UUID, Tuple[str, float]] = {}
+
+    # Graph nodes are the chain runs named after their node, one per superstep
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, tags: Optional[List[str]] = None,
+                       metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        is_step = any(t.startswith("graph:step:") for t in tags or ())
+        if node is not None and kwargs.get("name") == node and is_step:
+            self._nodes[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._nodes.pop(run_id, None)
+        if started:
+            NODE_DURATION.labels(started[0]).observe(time.perf_counter() - started[1])
+
+    on_chain_error = on_chain_end
+
+    # LLM calls
+
+    def _llm_start(self, run_id: UUID, metadata: Optional[Dict[str, Any]]) -> None:
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._llms[run_id] = (model, time.perf_counter())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        self._llm_start(run_id, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID,
+                     metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        self._llm_start(run_id, metadata)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._llms.pop(run_id, None)
+        if not started:
+            return
+        model = started[0]
+        LLM_DURATION.labels(model).observe(time.perf_counter() - started[1])
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(model, "input").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(model, "output").inc(usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._llms.pop(run_id, None)
+        if started:
+            LLM_DURATION.labels(started[0]).observe(time.perf_counter() - started[1])
+            LLM_ERRORS.labels(started[0]).inc()
+
+    # Tools
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._tools[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._tools.pop(run_id, None)
+        if started:
+            TOOL_DURATION.labels(started[0]).observe(time.perf_counter() - started[1])
+            if getattr(output, "status", None) == "error":
+                TOOL_ERRORS.labels(started[0]).inc()
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._tools.pop(run_id, None)
+        if started:
+            TOOL_DURATION.labels(started[0]).observe(time.perf_counter() - started[1])
+            TOOL_ERRORS.labels(started[0]).inc()
+
+
+_handlers: List[BaseCallbackHandler] = [MetricsCallbackHandler()] if ENABLED else []
+
+
+def callbacks() -> List[BaseCallbackHandler]:
+    """Callback handlers to add to a run's config (empty when disabled)."""
+    return list(_handlers)
+
+
+class InstrumentedSaver(BaseCheckpointSaver):
+    """Checkpointer wrapper recording the time of every read and write."""
+
+    def __init__(self, saver: BaseCheckpointSaver, backend: Optional[str] = None):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        backend = backend or type(saver).__name__
+        self._timers = {
+            op: CHECKPOINT_DURATION.labels(backend, op)
+            for op in ("get", "list", "put", "put_writes", "delete")
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        # Backend-specific helpers such as stats() stay reachable
+        if name == "saver":
+            raise AttributeError(name)
+        return getattr(self.saver, name)
+
+    @contextmanager
+    def _timed(self, op: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timers[op].observe(time.perf_counter() - start)
+
+    @property
+    def config_specs(self):
+        return self.saver.config_specs
+
+    def get_tuple(self, config):
+        with self._timed("get"):
+            return self.saver.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        with self._timed("list"):
+            items = list(self.saver.list(config, filter=filter, before=before, limit=limit))
+        yield from items
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._timed("put"):
+            return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._timed("put_writes"):
+            return self.saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        with self._timed("delete"):
+            return self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    def get_delta_channel_history(self, *, config, channels):
+        with self._timed("get"):
+            return self.saver.get_delta_channel_history(config=config, channels=channels)
+
+    async def aget_tuple(self, config):
+        with self._timed("get"):
+            return await self.saver.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        with self._timed("list"):
+            listing = self.saver.alist(config, filter=filter, before=before, limit=limit)
+            items = [item async for item in listing]
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        with self._timed("put"):
+            return await self.saver.aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        with self._timed("put_writes"):
+            return await self.saver.aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        with self._timed("delete"):
+            return await self.saver.adelete_thread(thread_id)
+
+    async def aget_delta_channel_history(self, *, config, channels):
+        with self._timed("get"):
+            return await self.saver.aget_delta_channel_history(config=config, channels=channels)
+
+
+def instrument_checkpointer(saver: BaseCheckpointSaver) -> BaseCheckpointSaver:
+    """Wrap ``saver`` with timing when metrics are enabled."""
+    if not ENABLED or isinstance(saver, InstrumentedSaver):
+        return saver
+    return InstrumentedSaver(saver)
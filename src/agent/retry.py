@@ -0,0 +1,253 @@
+"""
+Retries for LLM and tool calls
+
+``Retrier`` retries a failing call with exponential backoff, but only when
+it is worth it:
+
+- only transient errors are retried: timeouts, connection errors, 408/409/
+  429 and 5xx responses (see ``is_retryable``); a bad request fails at once
+- delays are jittered ("full" or "decorrelated" jitter) so clients that
+  failed together do not come back together, and a ``Retry-After`` from
+  the upstream is respected
+- a process-wide ``RetryBudget`` caps retries at a fraction of recent
+  calls, so a struggling upstream does not get a retry storm on top of its
+  regular load
+- a retry is never started when its backoff would end past the request's
+  deadline (``configurable["deadline"]``, a ``time.monotonic()`` timestamp)
+- the async path sleeps with ``asyncio.sleep`` and never blocks the loop
+
+Both agents retry model calls through ``llm.guarded_model``; the tool
+executor takes a ``Retrier`` for tool calls. Because retries
+happen here, the shared ``ChatOpenAI`` client is built with its own retries
+turned off (``LLM_CLIENT_MAX_RETRIES``).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from . import metrics
+from .deadlines import DeadlineExceeded
+
+# HTTP statuses worth retrying: timeout, conflict, rate limit and server errors
+RETRYABLE_STATUSES = {408, 409, 429}
+# Exception class names of transient errors in clients we do not import (openai, httpx)
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "TimeoutException", "ConnectError", "ReadError", "RemoteProtocolError",
+}
+JITTER_MODES = ("full", "decorrelated", "none")
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` is transient, i.e. the same call may succeed later."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = _status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the upstream asked us to wait (``Retry-After`` header), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to ``ratio`` of calls.
+
+    Every first attempt deposits ``ratio`` tokens and every retry spends one.
+    ``min_per_second`` tokens trickle in regardless, so low-traffic processes
+    can still retry; ``max_tokens`` bounds the burst.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, amount: float = 0.0) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens,
+                           self._tokens + amount + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend one token for a retry; False when the budget is exhausted."""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class Retrier:
+    """Retries transient failures with jittered backoff, a shared budget and deadlines."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        jitter: str = "full",
+        budget: Optional[RetryBudget] = None,
+        retryable: Callable[[BaseException], bool] = is_retryable,
+        sleep: Callable[[float], None] = time.sleep,
+        asleep: Callable[[float], Any] = asyncio.sleep,
+    ):
+        if jitter not in JITTER_MODES:
+            raise ValueError(f"jitter must be one of {', '.join(JITTER_MODES)}")
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget
+        self.retryable = retryable
+        self._sleep = sleep
+        self._asleep = asleep
+
+    def backoff(self, attempt: int, previous: float) -> float:
+        """Delay before retry number ``attempt`` (1-based); ``previous`` is the last delay."""
+        if self.jitter == "decorrelated":
+            # Grows from the previous delay rather than the attempt number
+            upper = max(self.base_delay, previous * 3)
+            return min(self.max_delay, random.uniform(self.base_delay, upper))
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling) if self.jitter == "full" else ceiling
+
+    def _next_delay(self, error: BaseException, attempt: int, previous: float,
+                    deadline: Optional[float], operation: str) -> Optional[float]:
+        """Delay before the next attempt, or None when ``error`` should be raised."""
+        if not self.retryable(error):
+            outcome = "non_retryable"
+        elif attempt > self.max_retries:
+            outcome = "exhausted"
+        else:
+            delay = self.backoff(attempt, previous)
+            delay = max(delay, retry_after(error) or 0.0)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                outcome = "deadline"
+            elif self.budget is not None and not self.budget.withdraw():
+                outcome = "budget"
+            else:
+                metrics.observe_retry(operation, "retried")
+                return delay
+        metrics.observe_retry(operation, outcome)
+        return None
+
+    def call(self, fn: Callable[..., Any], *args: Any, operation: str = "call",
+             deadline: Optional[float] = None, **kwargs: Any) -> Any:
+        """Call ``fn`` and retry it on transient errors (blocking sleeps)."""
+        if self.budget is not None:
+            self.budget.deposit()
+        attempt, delay = 0, self.base_delay
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                delay = self._next_delay(e, attempt, delay, deadline, operation)
+                if delay is None:
+                    raise
+            self._sleep(delay)
+
+    async def acall(self, fn: Callable[..., Any], *args: Any, operation: str = "call",
+                    deadline: Optional[float] = None, **kwargs: Any) -> Any:
+        """Await ``fn`` and retry it on transient errors without blocking the event loop."""
+        if self.budget is not None:
+            self.budget.deposit()
+        attempt, delay = 0, self.base_delay
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                delay = self._next_delay(e, attempt, delay, deadline, operation)
+                if delay is None:
+                    raise
+            await self._asleep(delay)
+
+
+_default: Optional[Retrier] = None
+_default_lock = threading.Lock()
+_budget: Optional[RetryBudget] = None
+_budget_lock = threading.Lock()
+
+
+def create_retrier(prefix: str = "LLM", default_retries: int = 3) -> Optional[Retrier]:
+    """
+    Build a retrier from ``<prefix>_*`` environment settings; None when retries are off.
+
+    <prefix>_MAX_RETRIES           retries after the first attempt (0 disables)
+    <prefix>_RETRY_BASE_DELAY      first backoff ceiling in seconds (default 0.5)
+    <prefix>_RETRY_MAX_DELAY       longest backoff in seconds (default 20)
+    <prefix>_RETRY_JITTER          full (default), decorrelated or none
+    RETRY_BUDGET_RATIO             retries allowed per call, shared by every retrier (default 0.2)
+    RETRY_BUDGET_MIN_PER_SECOND    retries always allowed per second (default 1)
+    """
+    max_retries = int(os.getenv(f"{prefix}_MAX_RETRIES", str(default_retries)))
+    if max_retries <= 0:
+        return None
+    return Retrier(
+        max_retries=max_retries,
+        base_delay=float(os.getenv(f"{prefix}_RETRY_BASE_DELAY", "0.5")),
+        max_delay=float(os.getenv(f"{prefix}_RETRY_MAX_DELAY", "20")),
+        jitter=os.getenv(f"{prefix}_RETRY_JITTER", "full").strip().lower(),
+        budget=get_retry_budget(),
+    )
+
+
+def get_retry_budget() -> RetryBudget:
+    """Return the process-wide retry budget shared by LLM and tool retries."""
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = RetryBudget(
+                    ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.2")),
+                    min_per_second=float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1")),
+                )
+    return _budget
+
+
+def get_llm_retrier() -> Optional[Retrier]:
+    """Return the process-wide retrier for model calls (``LLM_*`` settings)."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = create_retrier("LLM") or Retrier(max_retries=0)
+    return _default if _default.max_retries > 0 else None
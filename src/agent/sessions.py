@@ -0,0 +1,308 @@
+"""
+Per-session serialization of agent turns
+
+Two turns on the same ``session_id`` (checkpointer thread) must not run at
+once: both would load the same checkpoint, pay for the same context and race
+on the writes. ``SessionLocks`` runs turns of one session one after another,
+in arrival order, while different sessions stay fully parallel.
+
+Sync turns (threads) and async turns (event loops) share one lock per
+session, so a blocking ``chat`` and an ``achat`` on the same session are
+serialized too. Locks live in a table keyed by session that only holds
+sessions with a turn running or waiting, so its size is bounded by in-flight
+work rather than by the number of sessions ever seen. For multi-replica deployments a
+``RedisSessionLock`` is taken on top of the local lock, so a session is
+serialized across every process sharing the Redis instance.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+# Delete the lock only if we still own it
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SessionBusyError(TimeoutError):
+    """Raised when a session stays locked by another turn for longer than the wait timeout."""
+
+
+class RedisSessionLock:
+    """
+    Distributed session lock: ``SET NX PX`` with an owner token, released by
+    compare-and-delete. The TTL only protects against crashed holders and
+    should exceed the longest turn.
+    """
+
+    def __init__(
+        self,
+        client,
+        key_prefix: str = "langgraph:session-lock",
+        ttl_seconds: float = 120.0,
+        poll_interval: float = 0.05,
+    ):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:{session_id}"
+
+    def try_acquire(self, session_id: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self.client.set(self._key(session_id), token, nx=True, px=int(self.ttl_seconds * 1000)):
+            return token
+        return None
+
+    def acquire(self, session_id: str, timeout: Optional[float]) -> str:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            token = self.try_acquire(session_id)
+            if token is not None:
+                return token
+            if deadline is not None and time.monotonic() >= deadline:
+                raise SessionBusyError(f"Session '{session_id}' is busy on another replica")
+            time.sleep(self.poll_interval)
+
+    async def aacquire(self, session_id: str, timeout: Optional[float]) -> str:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            token = await asyncio.to_thread(self.try_acquire, session_id)
+            if token is not None:
+                return token
+            if deadline is not None and time.monotonic() >= deadline:
+                raise SessionBusyError(f"Session '{session_id}' is busy on another replica")
+            await asyncio.sleep(self.poll_interval)
+
+    def release(self, session_id: str, token: str) -> None:
+        self.client.eval(RELEASE_SCRIPT, 1, self._key(session_id), token)
+
+    async def arelease(self, session_id: str, token: str) -> None:
+        await asyncio.to_thread(self.release, session_id, token)
+
+
+class _Waiter:
+    __slots__ = ("event", "future", "loop", "granted")
+
+    def __init__(self, event=None, future=None, loop=None):
+        self.event = event
+        self.future = future
+        self.loop = loop
+        # Set (under the table lock) when the lock is handed to this waiter
+        self.granted = False
+
+
+def _resolve(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Entry:
+    """
+    One session's lock, shared by sync and async turns. Release hands it
+    straight to the oldest waiter (waking a thread or resolving a future on
+    the waiter's loop), so turns run in arrival order whichever side they
+    come from.
+    """
+
+    __slots__ = ("held", "waiters", "users")
+
+    def __init__(self):
+        self.held = False
+        self.waiters: Deque[_Waiter] = deque()
+        # Turns holding or waiting for the lock; the entry is dropped at zero
+        self.users = 0
+
+
+class SessionLocks:
+    """Serializes turns per session; optionally across replicas through ``distributed``."""
+
+    def __init__(
+        self, timeout: Optional[float] = 60.0, distributed: Optional[RedisSessionLock] = None
+    ):
+        self.timeout = timeout
+        self.distributed = distributed
+        # One table for sync turns (threads) and async turns (event loops) alike
+        self._table: Dict[str, _Entry] = {}
+        self._table_lock = threading.Lock()
+
+    @property
+    def active_sessions(self) -> int:
+        """Sessions with a turn running or waiting (the size of the lock table)."""
+        return len(self._table)
+
+    def _checkout(self, session_id: str) -> _Entry:
+        with self._table_lock:
+            entry = self._table.get(session_id)
+            if entry is None:
+                entry = self._table[session_id] = _Entry()
+            entry.users += 1
+            return entry
+
+    def _checkin(self, session_id: str, entry: _Entry) -> None:
+        with self._table_lock:
+            entry.users -= 1
+            if entry.users == 0 and self._table.get(session_id) is entry:
+                del self._table[session_id]
+
+    def _try_acquire(self, entry: _Entry, waiter: _Waiter) -> bool:
+        """Take the lock if it is free, otherwise queue ``waiter``."""
+        with self._table_lock:
+            if not entry.held:
+                entry.held = True
+                return True
+            entry.waiters.append(waiter)
+            return False
+
+    def _give_up(self, entry: _Entry, waiter: _Waiter) -> bool:
+        """Stop waiting; True if the lock was handed over meanwhile (the caller owns it)."""
+        with self._table_lock:
+            if waiter.granted:
+                return True
+            entry.waiters.remove(waiter)
+            return False
+
+    def _release(self, entry: _Entry) -> None:
+        with self._table_lock:
+            while entry.waiters:
+                waiter = entry.waiters.popleft()
+                if waiter.event is not None:
+                    waiter.granted = True
+                    waiter.event.set()
+                    return
+                try:
+                    waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+                except RuntimeError:
+                    # Its event loop is gone; nobody is waiting there any more
+                    continue
+                waiter.granted = True
+                return
+            entry.held = False
+
+    def _acquire(self, session_id: str, entry: _Entry) -> None:
+        waiter = _Waiter(event=threading.Event())
+        if self._try_acquire(entry, waiter):
+            return
+        if waiter.event.wait(self.timeout) or self._give_up(entry, waiter):
+            return
+        raise SessionBusyError(f"Session '{session_id}' is busy")
+
+    async def _aacquire(self, session_id: str, entry: _Entry) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(future=loop.create_future(), loop=loop)
+        if self._try_acquire(entry, waiter):
+            return
+        try:
+            await asyncio.wait_for(waiter.future, self.timeout)
+        except BaseException as e:
+            # Timed out or cancelled; if the lock arrived anyway, pass it on
+            if self._give_up(entry, waiter):
+                self._release(entry)
+            if isinstance(e, asyncio.TimeoutError):
+                raise SessionBusyError(f"Session '{session_id}' is busy") from None
+            raise
+
+    @contextmanager
+    def hold(self, session_id: str) -> Iterator[None]:
+        """Run the block as the only turn of ``session_id`` (blocking)."""
+        entry = self._checkout(session_id)
+        try:
+            self._acquire(session_id, entry)
+            try:
+                token = (
+                    self.distributed.acquire(session_id, self.timeout) if self.distributed else None
+                )
+                try:
+                    yield
+                finally:
+                    if token is not None:
+                        self.distributed.release(session_id, token)
+            finally:
+                self._release(entry)
+        finally:
+            self._checkin(session_id, entry)
+
+    @asynccontextmanager
+    async def ahold(self, session_id: str) -> AsyncIterator[None]:
+        """Run the block as the only turn of ``session_id``; waiters are served in arrival order."""
+        entry = self._checkout(session_id)
+        try:
+            await self._aacquire(session_id, entry)
+            try:
+                token = (
+                    await self.distributed.aacquire(session_id, self.timeout)
+                    if self.distributed
+                    else None
+                )
+                try:
+                    yield
+                finally:
+                    if token is not None:
+                        await self.distributed.arelease(session_id, token)
+            finally:
+                self._release(entry)
+        finally:
+            self._checkin(session_id, entry)
+
+    def locked_stream(self, session_id: str, stream: Iterator[Any]) -> Iterator[Any]:
+        """Hold the session lock while ``stream`` is consumed."""
+        with self.hold(session_id):
+            yield from stream
+
+    async def alocked_stream(
+        self, session_id: str, stream: AsyncIterator[Any]
+    ) -> AsyncIterator[Any]:
+        """Hold the session lock while the async ``stream`` is consumed."""
+        async with self.ahold(session_id):
+            async for item in stream:
+                yield item
+
+
+_default: Optional[SessionLocks] = None
+_default_lock = threading.Lock()
+
+
+def create_session_locks(redis_url: Optional[str] = None) -> SessionLocks:
+    """
+    Build session locks from environment settings.
+
+    SESSION_LOCKS                  "local" (default) or "redis" (uses REDIS_URL, serializes
+                                   across replicas)
+    SESSION_LOCK_TIMEOUT_SECONDS   longest wait for a busy session (default 60, 0 waits forever)
+    SESSION_LOCK_TTL_SECONDS       Redis lock lifetime, should exceed the longest turn (default 120)
+    """
+    timeout = float(os.getenv("SESSION_LOCK_TIMEOUT_SECONDS", "60") or 0) or None
+    distributed = None
+    if os.getenv("SESSION_LOCKS", "local").strip().lower() == "redis":
+        redis_url = redis_url or os.getenv("REDIS_URL")
+        if not redis_url:
+            raise ValueError("SESSION_LOCKS=redis requires REDIS_URL")
+        import redis
+
+        from .checkpointers import get_connection_pool
+        distributed = RedisSessionLock(
+            redis.Redis(connection_pool=get_connection_pool(redis_url)),
+            ttl_seconds=float(os.getenv("SESSION_LOCK_TTL_SECONDS", "120")),
+        )
+    return SessionLocks(timeout=timeout, distributed=distributed)
+
+
+def get_session_locks() -> SessionLocks:
+    """Return the process-wide session locks shared by every agent variant."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = create_session_locks()
+    return _default
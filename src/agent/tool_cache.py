@@ -0,0 +1,239 @@
+"""
+Tool result memoization
+
+Pure tools (same arguments, same answer) opt in with ``@cacheable`` and
+their results are then shared across calls and sessions:
+
+    @cacheable(ttl=600)
+    @tool
+    def lookup_rate(currency: str) -> str:
+        ...
+
+The tools node consults ``ToolResultCache`` before running a call (see
+``ToolExecutor`` in ``tool_execution.py``), so every tool registered with a
+policy gets caching in both agents without further wiring. Keys are the tool
+name plus its arguments validated through the tool's schema (defaults
+filled, types coerced, keys sorted). Entries are evicted by LRU, TTL and a
+total size cap; error results are never stored.
+
+``CachedToolExecutor`` runs registry tools directly through the same cache.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+
+from . import metrics
+
+
+class CachePolicy:
+    """How one tool's results are cached."""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ):
+        # None uses the cache's default TTL
+        self.ttl_seconds = ttl_seconds
+        # Optional extra normalization of the validated arguments
+        self.key = key
+
+
+# Tools whose results may be cached, by tool name
+CACHE_POLICIES: Dict[str, CachePolicy] = {}
+
+
+def cacheable(ttl: Optional[float] = None, key: Optional[Callable[[Dict[str, Any]], Any]] = None):
+    """Mark a tool as pure so its results are cached; use on top of ``@tool``."""
+    def decorator(t: BaseTool) -> BaseTool:
+        CACHE_POLICIES[t.name] = CachePolicy(ttl, key)
+        return t
+    return decorator
+
+
+def normalize_args(t: Optional[BaseTool], args: Dict[str, Any]) -> Any:
+    """Validate ``args`` through the tool's schema so equivalent calls share a key."""
+    schema = getattr(t, "args_schema", None)
+    if isinstance(schema, type) and hasattr(schema, "model_validate"):
+        try:
+            return schema.model_validate(args).model_dump(mode="json")
+        except ValueError:
+            pass
+    return args
+
+
+def _key(name: str, args: Any) -> str:
+    data = json.dumps(args, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class ToolResultCache:
+    """Thread-safe LRU of tool results with per-entry TTL and a total size cap."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 300,
+        max_bytes: int = 16 * 1024 * 1024,
+        policies: Optional[Dict[str, CachePolicy]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.policies = CACHE_POLICIES if policies is None else policies
+        # (tool, key) -> (expires, size, content, artifact)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, Any, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def key_for(
+        self, name: str, args: Dict[str, Any], t: Optional[BaseTool] = None
+    ) -> Optional[Tuple[str, str]]:
+        """Cache key for a call, or None when the tool has not opted in."""
+        policy = self.policies.get(name)
+        if policy is None:
+            return None
+        normalized = normalize_args(t, args)
+        if policy.key is not None:
+            normalized = policy.key(normalized)
+        return name, _key(name, normalized)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[Any, Any]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] and item[0] < time.monotonic():
+                self._drop(key)
+                item = None
+            if item is None:
+                self.stats["misses"] += 1
+            else:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+        metrics.observe_tool_cache(key[0], "miss" if item is None else "hit")
+        return None if item is None else (item[2], item[3])
+
+    def set(self, key: Tuple[str, str], content: Any, artifact: Any = None) -> None:
+        size = len(content if isinstance(content, str) else repr(content))
+        size += len(repr(artifact) if artifact else "")
+        if size > self.max_bytes:
+            return
+        policy = self.policies.get(key[0])
+        ttl = policy.ttl_seconds if policy and policy.ttl_seconds is not None else self.ttl_seconds
+        expires = time.monotonic() + ttl if ttl else 0.0
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, size, content, artifact)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, tool_name: Optional[str] = None) -> int:
+        """Drop every entry (or every entry of ``tool_name``); returns how many were dropped."""
+        with self._lock:
+            keys = [k for k in self._entries if tool_name is None or k[0] == tool_name]
+            for key in keys:
+                self._drop(key)
+        return len(keys)
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        self._bytes -= self._entries.pop(key)[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    # Tools node integration
+
+    def lookup(self, request) -> Tuple[Optional[Tuple[str, str]], Optional[ToolMessage]]:
+        """Return the call's key and, on a hit, the cached answer as a ``ToolMessage``."""
+        call = request.tool_call
+        key = self.key_for(call["name"], call["args"], request.tool)
+        if key is None:
+            return None, None
+        cached = self.get(key)
+        if cached is None:
+            return key, None
+        content, artifact = cached
+        return key, ToolMessage(
+            content=content, artifact=artifact, name=call["name"], tool_call_id=call["id"]
+        )
+
+    def store(self, key: Optional[Tuple[str, str]], result: Any) -> None:
+        if key is not None and isinstance(result, ToolMessage) and result.status != "error":
+            self.set(key, result.content, result.artifact)
+
+
+class CachedToolExecutor:
+    """Run registry tools by name, serving repeated calls of cacheable tools from the cache."""
+
+    def __init__(
+        self,
+        cache_size: int = 1024,
+        ttl: Optional[float] = 300,
+        max_bytes: int = 16 * 1024 * 1024,
+        tools: Optional[Dict[str, BaseTool]] = None,
+        cache: Optional[ToolResultCache] = None,
+    ):
+        if cache is None:
+            cache = ToolResultCache(max_entries=cache_size, ttl_seconds=ttl, max_bytes=max_bytes)
+        self.cache = cache
+        self._tools = tools
+
+    @property
+    def tools(self) -> Dict[str, BaseTool]:
+        if self._tools is None:
+            from .tools import TOOLS
+            return TOOLS
+        return self._tools
+
+    def execute(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        t = self.tools.get(tool_name)
+        if t is None:
+            raise KeyError(f"Unknown tool: {tool_name}")
+        key = self.cache.key_for(tool_name, args, t)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached[0]
+        result = t.invoke(args)
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        return {**self.cache.stats, "entries": len(self.cache), "bytes": self.cache.size_bytes}
+
+    def invalidate_cache(self, tool_name: Optional[str] = None) -> int:
+        return self.cache.invalidate(tool_name)
+
+
+def create_tool_cache() -> Optional[ToolResultCache]:
+    """
+    Build the shared tool result cache from environment settings.
+
+    TOOL_CACHE                   "false" disables caching (default on for opted-in tools)
+    TOOL_CACHE_MAX_ENTRIES       entry limit (default 1024)
+    TOOL_CACHE_TTL_SECONDS       default entry lifetime (default 300, 0 keeps entries until evicted)
+    TOOL_CACHE_MAX_BYTES         total size cap (default 16 MiB)
+    """
+    if os.getenv("TOOL_CACHE", "true").strip().lower() in ("0", "false", "off", "none"):
+        return None
+    return ToolResultCache(
+        max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv("TOOL_CACHE_TTL_SECONDS", "300") or 0) or None,
+        max_bytes=int(os.getenv("TOOL_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+    )
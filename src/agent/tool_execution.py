@@ -0,0 +1,324 @@
+"""
+Concurrent tool execution for the agents' tools node
+
+When the model asks for several tools in one message, ``ToolNode`` already
+fans the calls out (``asyncio.gather`` on the async path, a thread pool on
+the sync path) and returns the results in call order. ``ToolExecutor``
+tightens that up:
+
+- sync tools called from the async path run on one bounded, process-wide
+  thread pool instead of the event loop's default executor
+- every call gets a timeout (per-tool overrides allowed), shortened to the
+  time left before the request deadline; a call that runs over is answered
+  with an error ``ToolMessage`` so the model can react, and the rest of the
+  batch is unaffected. A timed-out call that has not started is cancelled;
+  one already running cannot be stopped and keeps its pool thread, so once
+  such abandoned calls hold every thread, new pool calls are refused at
+  once instead of queueing behind them
+- calls to tools with a cache policy are answered from the shared
+  ``ToolResultCache`` when possible (see ``tool_cache.py``)
+- with a ``Retrier`` (``TOOL_MAX_RETRIES``, off by default since tools may
+  have side effects), calls that raise a transient error are retried within
+  the timeout
+- each tool has its own circuit breaker (``"tool:<name>"``); raised errors
+  and timeouts count against it, and while it is open calls are answered
+  with an error ``ToolMessage`` right away
+
+``create_tool_node`` builds the ``ToolNode`` used by both agents.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import weakref
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.prebuilt import ToolNode
+
+from . import metrics
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from .deadlines import deadline_from, time_left
+from .retry import Retrier, create_retrier
+from .tool_cache import ToolResultCache, create_tool_cache
+
+# Parameters LangChain injects into tool functions; such tools keep the default path
+_INJECTED_PARAMS = {"callbacks", "run_manager", "config"}
+
+
+class ToolExecutor:
+    """
+    Bounded thread pool, per-call timeouts, result caching, retries and
+    circuit breakers for tool calls.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        timeout: Optional[float] = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        cache: Optional[ToolResultCache] = None,
+        retrier: Optional[Retrier] = None,
+        circuit_breakers: Optional[Callable[[str], Optional[CircuitBreaker]]] = None,
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.cache = cache
+        self.retrier = retrier
+        # Tool name -> breaker (or None); no breakers when unset
+        self.circuit_breakers = circuit_breakers
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tool"
+        )
+        # Timed-out calls still holding a pool thread, and the coroutines of pooled tools
+        self.abandoned = 0
+        self._abandoned_lock = threading.Lock()
+        self._pooled: "weakref.WeakSet[Callable]" = weakref.WeakSet()
+
+    # Pool
+
+    def _submit(self, fn: Callable, *args) -> Tuple[concurrent.futures.Future, Dict[str, bool]]:
+        """Run ``fn`` on the pool; the returned state lets a caller give up on it later."""
+        state = {"done": False, "abandoned": False}
+
+        def run():
+            try:
+                return fn(*args)
+            finally:
+                with self._abandoned_lock:
+                    state["done"] = True
+                    if state["abandoned"]:
+                        self.abandoned -= 1
+
+        return self.pool.submit(contextvars.copy_context().run, run), state
+
+    def _abandon(self, future: concurrent.futures.Future, state: Dict[str, bool]) -> None:
+        """Stop waiting for a pool call: cancel it if queued, else count its thread as lost."""
+        if future.cancel():
+            return
+        with self._abandoned_lock:
+            if not state["done"] and not state["abandoned"]:
+                state["abandoned"] = True
+                self.abandoned += 1
+
+    def saturated(self) -> bool:
+        """True while abandoned calls hold every pool thread, so nothing new could start."""
+        return self.abandoned >= self.max_workers
+
+    def _saturated(self, request) -> ToolMessage:
+        call = request.tool_call
+        metrics.observe_tool_timeout(call["name"])
+        return ToolMessage(
+            content=(
+                f"Error: tool '{call['name']}' was not run: all {self.max_workers} tool workers "
+                "are stuck in timed-out calls"
+            ),
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def timeout_for(self, tool_name: str) -> Optional[float]:
+        return self.timeouts.get(tool_name, self.timeout)
+
+    def _time_budget(self, request) -> Tuple[Optional[float], Optional[float], bool]:
+        """``(timeout, deadline, capped)``: the call's timeout, capped by the request deadline."""
+        timeout = self.timeout_for(request.tool_call["name"])
+        deadline = deadline_from(None)
+        left = time_left(deadline)
+        if left is not None and (timeout is None or left < timeout):
+            return left, deadline, True
+        return timeout, deadline, False
+
+    def _timed_out(self, request, timeout: float) -> ToolMessage:
+        call = request.tool_call
+        metrics.observe_tool_timeout(call["name"])
+        return ToolMessage(
+            content=f"Error: tool '{call['name']}' timed out after {timeout:g}s",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _unavailable(self, request, error: CircuitOpenError) -> ToolMessage:
+        call = request.tool_call
+        return ToolMessage(
+            content=f"Error: tool '{call['name']}' is unavailable ({error})",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _breaker_for(self, request) -> Optional[CircuitBreaker]:
+        if self.circuit_breakers is None:
+            return None
+        return self.circuit_breakers(request.tool_call["name"])
+
+    def _guarded(self, breaker: CircuitBreaker, timed_out: Dict[str, bool], execute: Callable,
+                 request):
+        """
+        ``breaker.call`` for the sync path. Once the caller has timed out and
+        recorded the failure, a late finish gives its admission back instead of
+        recording a second outcome for the same call.
+        """
+        breaker.allow()
+        error: Optional[BaseException] = None
+        try:
+            return execute(request)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._abandoned_lock:
+                if timed_out["recorded"]:
+                    breaker.release()
+                else:
+                    breaker.__exit__(type(error), error, None)
+
+    def _execute(self, request, execute: Callable, breaker: Optional[CircuitBreaker],
+                 deadline: Optional[float], timed_out: Dict[str, bool]):
+        if breaker is None:
+            call = execute
+        else:
+            call = functools.partial(self._guarded, breaker, timed_out, execute)
+        if self.retrier is None:
+            return call(request)
+        return self.retrier.call(call, request, operation="tool", deadline=deadline)
+
+    async def _aexecute(self, request, execute: Callable, breaker: Optional[CircuitBreaker],
+                        deadline: Optional[float]):
+        call = execute if breaker is None else functools.partial(breaker.acall, execute)
+        if self.retrier is None:
+            return await call(request)
+        return await self.retrier.acall(call, request, operation="tool", deadline=deadline)
+
+    # ToolNode hooks
+
+    def wrap_tool_call(self, request, execute: Callable):
+        """Sync path: run the call on the pool and wait at most the timeout."""
+        key, cached = self.cache.lookup(request) if self.cache is not None else (None, None)
+        if cached is not None:
+            return cached
+        if self.saturated():
+            return self._saturated(request)
+        timeout, deadline, capped = self._time_budget(request)
+        breaker = self._breaker_for(request)
+        # Set once the timeout below has recorded this call's outcome
+        timed_out = {"recorded": False}
+        future, state = self._submit(
+            self._execute, request, execute, breaker, deadline, timed_out
+        )
+        try:
+            result = future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self._abandon(future, state)
+            if breaker is not None and not capped:
+                with self._abandoned_lock:
+                    timed_out["recorded"] = True
+                    breaker.record_failure()
+            return self._timed_out(request, timeout)
+        except CircuitOpenError as e:
+            return self._unavailable(request, e)
+        if key is not None:
+            self.cache.store(key, result)
+        return result
+
+    async def awrap_tool_call(self, request, execute: Callable):
+        """Async path: await the call with the timeout."""
+        key, cached = self.cache.lookup(request) if self.cache is not None else (None, None)
+        if cached is not None:
+            return cached
+        if getattr(request.tool, "coroutine", None) in self._pooled and self.saturated():
+            return self._saturated(request)
+        timeout, deadline, capped = self._time_budget(request)
+        breaker = self._breaker_for(request)
+        try:
+            result = await asyncio.wait_for(
+                self._aexecute(request, execute, breaker, deadline), timeout
+            )
+        except asyncio.TimeoutError:
+            if breaker is not None and not capped:
+                breaker.record_failure()
+            return self._timed_out(request, timeout)
+        except CircuitOpenError as e:
+            return self._unavailable(request, e)
+        if key is not None:
+            self.cache.store(key, result)
+        return result
+
+    # Tools
+
+    def pooled(self, tool: BaseTool) -> BaseTool:
+        """
+        Give a sync-only tool an async implementation that runs on the pool.
+
+        Tools that already have a coroutine, are not ``StructuredTool``s, or
+        take injected callbacks/config are returned unchanged.
+        """
+        if not isinstance(tool, StructuredTool) or tool.coroutine is not None or tool.func is None:
+            return tool
+        if _INJECTED_PARAMS & set(inspect.signature(tool.func).parameters):
+            return tool
+        func = tool.func
+
+        async def run_on_pool(*args, **kwargs):
+            future, state = self._submit(functools.partial(func, *args, **kwargs))
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # Timed out (or the turn was cancelled): the thread may still be busy
+                self._abandon(future, state)
+                raise
+
+        self._pooled.add(run_on_pool)
+        return tool.model_copy(update={"coroutine": run_on_pool})
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+_default: Optional[ToolExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_tool_executor() -> ToolExecutor:
+    """
+    Return the process-wide executor, configured from the environment.
+
+    TOOL_MAX_WORKERS         threads for sync tools (default 8)
+    TOOL_TIMEOUT_SECONDS     per-call timeout (default 30, 0 disables)
+    TOOL_CACHE*              result cache settings, see ``create_tool_cache``
+    TOOL_MAX_RETRIES         retries of transient tool errors (default 0), see ``create_retrier``
+    CIRCUIT_*                per-tool circuit breakers, see ``create_circuit_breaker``
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                timeout = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30") or 0)
+                _default = ToolExecutor(
+                    max_workers=int(os.getenv("TOOL_MAX_WORKERS", "8")),
+                    timeout=timeout or None,
+                    cache=create_tool_cache(),
+                    retrier=create_retrier("TOOL", default_retries=0),
+                    circuit_breakers=lambda name: get_circuit_breaker(f"tool:{name}"),
+                )
+    return _default
+
+
+def create_tool_node(
+    tools: Sequence[BaseTool], executor: Optional[ToolExecutor] = None
+) -> ToolNode:
+    """Build a ``ToolNode`` that runs ``tools`` concurrently through ``executor``."""
+    executor = executor or get_tool_executor()
+    return ToolNode(
+        [executor.pooled(t) for t in tools],
+        wrap_tool_call=executor.wrap_tool_call,
+        awrap_tool_call=executor.awrap_tool_call,
+    )
@@ -0,0 +1,72 @@
+"""
+Tool registry shared by every agent variant
+
+Tools are defined once here and looked up by name, so the custom and
+modern agents (and anything built on them) expose exactly the same tools.
+Pure tools are marked ``@cacheable`` so repeated calls are served from the
+tool result cache.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.tools import BaseTool, tool
+
+from .calculator import CalculatorError, evaluate, format_number
+from .tool_cache import cacheable
+
+
+@tool
+def get_current_time() -> str:
+    """Get the current date and time."""
+    return f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+
+
+@cacheable()
+@tool
+def calculate(expression: str) -> str:
+    """Calculate a mathematical expression safely.
+
+    Supports + - * / // % ^, sqrt(x), "x%" and "x% of y".
+    """
+    try:
+        # Whitelisted, bounded evaluation - never eval() model-supplied input
+        result = format_number(evaluate(expression))
+        return f"Result: {expression} = {result}"
+    except CalculatorError as e:
+        return f"Error calculating {expression}: {str(e)}"
+
+
+@cacheable()
+@tool
+def echo(message: str) -> str:
+    """Echo back the input message."""
+    return f"Echo: {message}"
+
+
+# Registry of available tools by name
+TOOLS: Dict[str, BaseTool] = {}
+
+# Tools every agent gets unless told otherwise, in this order
+DEFAULT_TOOLS = ["get_current_time", "calculate", "echo"]
+
+
+def register_tool(t: BaseTool) -> BaseTool:
+    """Add ``t`` to the registry; usable as a decorator on top of ``@tool``."""
+    if t.name in TOOLS and TOOLS[t.name] is not t:
+        raise ValueError(f"A different tool named '{t.name}' is already registered")
+    TOOLS[t.name] = t
+    return t
+
+
+def get_tools(names: Optional[Iterable[str]] = None) -> List[BaseTool]:
+    """Return registered tools by name (the default set when ``names`` is None)."""
+    names = DEFAULT_TOOLS if names is None else list(names)
+    missing = [name for name in names if name not in TOOLS]
+    if missing:
+        raise KeyError(f"Unknown tools: {', '.join(missing)}")
+    return [TOOLS[name] for name in names]
+
+
+for _tool in (get_current_time, calculate, echo):
+    register_tool(_tool)
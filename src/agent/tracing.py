@@ -0,0 +1,262 @@
+"""
+Node-level execution tracing
+
+A ``Tracer`` turns LangChain callback events into spans: one root span per
+graph run and one child span per node execution (the same runs the
+``graph_node_duration_seconds`` metric times). Finished spans go to a
+fixed-size ring buffer, so a long-running process keeps the most recent
+``capacity`` spans and never grows; older ones are counted as dropped.
+Sampling is decided when a turn starts: an unsampled turn runs without the
+handler at all, so it pays nothing.
+
+Spans are exported as OpenTelemetry (OTLP/JSON) ``resourceSpans`` documents,
+either appended to a local JSONL file (``FileSpanExporter``) or posted to a
+collector (``HttpSpanExporter``, e.g. ``http://localhost:4318/v1/traces``).
+
+Runs are traced without changing the agents: ``with tracer.activate():``
+adds the tracer's handler to every run configured in that context (and the
+threads and tasks started from it).
+"""
+
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+SERVICE_NAME = "langgraph-agent"
+
+# OTLP span kinds / status codes
+_KIND_INTERNAL = 1
+_STATUS_OK, _STATUS_ERROR = 1, 2
+
+
+class Span:
+    """One finished graph run (``parent_id`` None) or node execution."""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error"
+    )
+
+    def __init__(self, trace_id: str, span_id: str, parent_id: Optional[str], name: str,
+                 start_ns: int, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns = start_ns
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": (
+                {"code": _STATUS_ERROR, "message": self.error} if self.error
+                else {"code": _STATUS_OK}
+            ),
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+def to_otlp_json(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """An OTLP/JSON ``ExportTraceServiceRequest`` body for ``spans``."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in spans]}],
+    }]}
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON document per export to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(to_otlp_json(spans), separators=(",", ":"))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class HttpSpanExporter:
+    """Posts OTLP/JSON to a collector's ``/v1/traces`` endpoint."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        response = httpx.post(self.endpoint, json=to_otlp_json(spans), timeout=self.timeout)
+        response.raise_for_status()
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records graph runs and their node executions as spans on a ``Tracer``."""
+
+    # Only dictionary updates and clock reads: cheap enough to run inline
+    run_inline = True
+    ignore_llm = ignore_retriever = ignore_agent = ignore_chat_model = True
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        # run_id -> open span
+        self._open: Dict[UUID, Span] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, tags: Optional[List[str]] = None,
+                       metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        if parent_run_id is None:
+            attributes = {}
+            session = (metadata or {}).get("thread_id")
+            if session is not None:
+                attributes["session.id"] = session
+            self._open[run_id] = Span(run_id.hex, run_id.hex[16:], None,
+                                      kwargs.get("name") or "graph", time.time_ns(), attributes)
+            return
+        root = self._open.get(parent_run_id)
+        if root is None or root.parent_id is not None:
+            return
+        # The graph's direct children named after their node are the node executions
+        node = metadata.get("langgraph_node") if metadata else None
+        if node is not None and kwargs.get("name") == node:
+            attributes = {
+                "langgraph.node": node,
+                "langgraph.step": metadata.get("langgraph_step", 0),
+            }
+            self._open[run_id] = Span(root.trace_id, run_id.hex[16:], root.span_id, node,
+                                      time.time_ns(), attributes)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        span.end_ns = time.time_ns()
+        self.tracer.record(span)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._open.get(run_id)
+        if span is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        self.on_chain_end(None, run_id=run_id)
+
+
+class Tracer:
+    """Keeps the last ``capacity`` finished spans of sampled runs and exports them."""
+
+    def __init__(self, capacity: int = 2048, sample_rate: float = 1.0, exporter: Any = None):
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.dropped = 0
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.handler = TracingCallbackHandler(self)
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            if len(self._spans) == self.capacity:
+                self.dropped += 1
+            self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        """Buffered spans, oldest first."""
+        with self._lock:
+            return list(self._spans)
+
+    def drain(self) -> List[Span]:
+        """Take every buffered span out of the buffer."""
+        with self._lock:
+            spans = list(self._spans)
+            self._spans.clear()
+            return spans
+
+    def flush(self) -> int:
+        """Export and remove the buffered spans; returns how many were exported."""
+        if self.exporter is None:
+            return 0
+        spans = self.drain()
+        if spans:
+            self.exporter.export(spans)
+        return len(spans)
+
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        """Trace every run started inside this block (if the block is sampled)."""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            yield self
+            return
+        token = _active_handler.set(self.handler)
+        try:
+            yield self
+        finally:
+            _active_handler.reset(token)
+
+
+# Handler added by LangChain to every run configured while a tracer is active
+_active_handler: ContextVar[Optional[TracingCallbackHandler]] = ContextVar(
+    "agent_tracing_handler", default=None
+)
+register_configure_hook(_active_handler, inheritable=True)
+
+
+def create_tracer() -> Tracer:
+    """
+    Build a tracer from environment settings.
+
+    TRACING_BUFFER_SIZE     spans kept in memory (default 2048)
+    TRACING_SAMPLE_RATE     share of runs traced (default 1)
+    TRACING_EXPORT_FILE     append OTLP/JSON to this file on flush
+    TRACING_EXPORT_URL      post OTLP/JSON to this collector URL on flush
+    """
+    exporter = None
+    if os.getenv("TRACING_EXPORT_URL"):
+        exporter = HttpSpanExporter(os.environ["TRACING_EXPORT_URL"])
+    elif os.getenv("TRACING_EXPORT_FILE"):
+        exporter = FileSpanExporter(os.environ["TRACING_EXPORT_FILE"])
+    tracer = Tracer(
+        capacity=int(os.getenv("TRACING_BUFFER_SIZE", "2048")),
+        sample_rate=float(os.getenv("TRACING_SAMPLE_RATE", "1")),
+        exporter=exporter,
+    )
+    if exporter is not None:
+        # Spans still buffered at shutdown are exported too
+        atexit.register(tracer.flush)
+    return tracer
@@ -0,0 +1,188 @@
+"""
+Admission control for the chat endpoints
+
+Caps how many chat requests a worker runs at once. Requests beyond the cap
+wait in a bounded priority queue (interactive streams ahead of standard and
+batch callers) and are answered quickly when the worker is saturated:
+
+- 429 with ``Retry-After`` when the wait queue is full
+- 503 with ``Retry-After`` when a request waited ``queue_timeout`` seconds,
+  or was pushed out of a full queue by a higher-priority request
+
+A streaming request holds its slot until the stream ends, so in-flight work
+(and the upstream LLM connections behind it) stays bounded.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..agent import metrics
+
+# Lower rank is served first
+PRIORITIES = {"interactive": 0, "standard": 1, "batch": 2}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted."""
+
+    def __init__(self, status: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded, prioritized wait queue (one per event loop/worker)."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 64,
+        max_queue: int = 256,
+        queue_timeout: float = 10.0,
+        retry_after: float = 2.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._active = 0
+        # Heap of (rank, arrival, priority, future)
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+
+    @property
+    def in_flight(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, status: int, reason: str, priority: str) -> AdmissionRejected:
+        metrics.observe_admission_rejection(priority, reason)
+        return AdmissionRejected(status, reason, self.retry_after)
+
+    def _report(self) -> None:
+        metrics.observe_admission(self._active, len(self._waiters))
+
+    async def acquire(self, priority: str = "standard") -> None:
+        """Wait for a slot; raises ``AdmissionRejected`` when the worker is saturated."""
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._report()
+            return
+
+        rank = PRIORITIES[priority]
+        if len(self._waiters) >= self.max_queue:
+            lowest = max(self._waiters, default=None)
+            if lowest is None or lowest[0] <= rank:
+                raise self._reject(429, "queue_full", priority)
+            # Shed the lowest-priority waiter to make room
+            self._waiters.remove(lowest)
+            heapq.heapify(self._waiters)
+            lowest[3].set_exception(self._reject(503, "shed", lowest[2]))
+
+        entry = (rank, next(self._arrivals), priority, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        self._report()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(entry[3], self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(503, "queue_timeout", priority) from None
+        except asyncio.CancelledError:
+            # Slot handed over just as the caller went away: pass it on
+            if entry[3].done() and not entry[3].cancelled() and entry[3].exception() is None:
+                self.release()
+            raise
+        finally:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            self._report()
+        metrics.observe_admission_wait(priority, time.perf_counter() - started)
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the highest-priority waiter."""
+        while self._waiters:
+            _, _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                self._report()
+                return
+        self._active -= 1
+        self._report()
+
+
+class AdmissionMiddleware:
+    """
+    Applies an ``AdmissionController`` to the routes in ``priorities``.
+
+    Plain ASGI so the slot is held for the whole response, streams included.
+    """
+
+    def __init__(self, app, controller: AdmissionController, priorities: Dict[str, str]):
+        self.app = app
+        self.controller = controller
+        self.priorities = priorities
+
+    async def __call__(self, scope, receive, send):
+        priority = self.priorities.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(priority)
+        except AdmissionRejected as e:
+            await send_rejection(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+async def send_rejection(send, rejection: AdmissionRejected) -> None:
+    if rejection.status == 429:
+        detail = "Server is at capacity, retry later"
+    else:
+        detail = "Server is overloaded, retry later"
+    body = json.dumps({"detail": detail, "reason": rejection.reason}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": rejection.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(rejection.retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_admission_controller() -> Optional[AdmissionController]:
+    """
+    Build the limiter from environment settings (per worker process).
+
+    ADMISSION_MAX_CONCURRENT         chat requests run at once (default 64, 0 disables)
+    ADMISSION_MAX_QUEUE              requests allowed to wait (default 256)
+    ADMISSION_QUEUE_TIMEOUT_SECONDS  longest wait before a 503 (default 10)
+    ADMISSION_RETRY_AFTER_SECONDS    Retry-After sent with rejections (default 2)
+    """
+    max_concurrent = int(os.getenv("ADMISSION_MAX_CONCURRENT", "64"))
+    if max_concurrent <= 0:
+        return None
+    return AdmissionController(
+        max_concurrent=max_concurrent,
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "256")),
+        queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10")),
+        retry_after=float(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2")),
+    )
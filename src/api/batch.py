@@ -0,0 +1,70 @@
+"""
+Bulk chat execution for the batch endpoint
+
+``run_batch`` runs many items through an async handler with a fixed number
+of workers and yields one record per item as soon as it completes, tagged
+with the item's original index. A failing item produces an error record and
+does not affect the others. Records are handed over through a bounded queue,
+so a slow reader pauses the workers instead of buffering every result.
+After the last item a summary record follows with the same counters as
+``BatchProcessingNode.process_batch``.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Sequence
+
+# Finished records waiting for the reader before workers pause
+BUFFER_SIZE = 64
+
+
+async def run_batch(
+    items: Sequence[Any],
+    handle: Callable[[Any], Awaitable[Any]],
+    concurrency: int,
+    buffer_size: int = BUFFER_SIZE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield ``{"index", "success", "result" | "error", "processing_time"}``
+    records in completion order.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+    pending = iter(range(len(items)))
+
+    async def worker():
+        # Workers share one index iterator, so each item is taken exactly once
+        for index in pending:
+            started = time.perf_counter()
+            try:
+                record = {"index": index, "success": True, "result": await handle(items[index])}
+            except Exception as e:
+                record = {"index": index, "success": False, "error": str(e) or type(e).__name__}
+            record["processing_time"] = round(time.perf_counter() - started, 6)
+            await queue.put(record)
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(items))))]
+    successful = 0
+    try:
+        for _ in range(len(items)):
+            record = await queue.get()
+            successful += record["success"]
+            yield record
+        yield {"summary": {
+            "total_items": len(items),
+            "successful_items": successful,
+            "failed_items": len(items) - successful,
+            "processing_time": round(time.perf_counter() - started, 6),
+        }}
+    finally:
+        # Reader finished or went away: stop any work still running
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def ndjson(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Encode records as newline-delimited JSON."""
+    async for record in records:
+        yield json.dumps(record, default=str) + "\n"
@@ -0,0 +1,195 @@
+"""
+Single-flight coalescing of duplicate chat requests
+
+Retries and double-submits of a chat request that is still running attach
+to the first call instead of starting another LLM round trip, and a
+completed result is replayed for a short window afterwards.
+
+Requests are matched by the ``Idempotency-Key`` header (scoped to the
+route) or, when ``IDEMPOTENCY_AUTO_KEY`` is on, by route + session id +
+message for requests that name a session. Reusing a key with a different
+payload is rejected. JSON endpoints share one result; SSE endpoints share
+one event stream, replayed from the start to late subscribers. A shared
+stream is cancelled when its last subscriber goes away. Failures are not
+cached, so a retry after an error runs again.
+
+Entries are per worker process.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when an idempotency key is reused with a different request."""
+
+
+def request_fingerprint(route: str, **payload: Any) -> str:
+    data = json.dumps([route, payload], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class _Flight:
+    __slots__ = (
+        "fingerprint", "expires", "task", "events", "done", "error", "updated", "subscribers"
+    )
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        # Set once completed; None while in flight
+        self.expires: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # Stream flights only
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.updated = asyncio.Event()
+        self.subscribers = 0
+
+
+class SingleFlight:
+    """Coalesces in-flight duplicates and replays completed results for ``ttl_seconds``."""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 1024, auto_key: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.auto_key = auto_key
+        self._flights: Dict[str, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def key_for(self, route: str, idempotency_key: Optional[str], session_id: Optional[str],
+                fingerprint: str) -> Optional[str]:
+        """Flight key for a request, or None when it should not be coalesced."""
+        if idempotency_key:
+            return f"{route}:key:{idempotency_key}"
+        if self.auto_key and session_id:
+            return f"{route}:auto:{fingerprint}"
+        return None
+
+    def attached(self, key: str, fingerprint: str) -> bool:
+        """Whether a request would attach to an existing flight; raises on a payload mismatch."""
+        return self._lookup(key, fingerprint) is not None
+
+    def _lookup(self, key: str, fingerprint: str) -> Optional[_Flight]:
+        now = time.monotonic()
+        expired = [
+            k for k, f in self._flights.items() if f.expires is not None and f.expires <= now
+        ]
+        for k in expired:
+            del self._flights[k]
+        flight = self._flights.get(key)
+        if flight is not None and flight.fingerprint != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        return flight
+
+    def _start(self, key: str, fingerprint: str) -> _Flight:
+        if len(self._flights) >= self.max_entries:
+            completed = [k for k, f in self._flights.items() if f.expires is not None]
+            for old in completed[:len(self._flights) - self.max_entries + 1]:
+                del self._flights[old]
+        flight = self._flights[key] = _Flight(fingerprint)
+        return flight
+
+    def _finish(self, key: str, flight: _Flight, failed: bool) -> None:
+        if failed or self.ttl_seconds <= 0:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        else:
+            flight.expires = time.monotonic() + self.ttl_seconds
+
+    async def run(self, key: str, fingerprint: str,
+                  factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Return ``(result, replayed)`` for the request identified by ``key``.
+
+        The first caller starts ``factory`` in its own task so callers that go
+        away do not cancel it for the others.
+        """
+        flight = self._lookup(key, fingerprint)
+        if flight is not None:
+            return await asyncio.shield(flight.task), True
+
+        flight = self._start(key, fingerprint)
+        flight.task = asyncio.ensure_future(factory())
+
+        def finished(task: asyncio.Task) -> None:
+            failed = task.cancelled() or task.exception() is not None
+            self._finish(key, flight, failed)
+
+        flight.task.add_done_callback(finished)
+        return await asyncio.shield(flight.task), False
+
+    async def stream(self, key: str, fingerprint: str,
+                     factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Subscribe to the shared event stream for ``key``, starting it if needed."""
+        flight = self._lookup(key, fingerprint)
+        if flight is None:
+            flight = self._start(key, fingerprint)
+            flight.task = asyncio.ensure_future(self._produce(key, flight, factory))
+
+        flight.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(flight.events):
+                    yield flight.events[position]
+                    position += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                updated = flight.updated
+                await updated.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more: stop the agent and forget the partial stream
+                self._finish(key, flight, failed=True)
+                flight.task.cancel()
+
+    async def _produce(self, key: str, flight: _Flight,
+                       factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for event in factory():
+                flight.events.append(event)
+                self._notify(flight)
+        except asyncio.CancelledError:
+            self._finish(key, flight, failed=True)
+            raise
+        except Exception as e:
+            flight.error = e
+            self._finish(key, flight, failed=True)
+        else:
+            self._finish(key, flight, failed=False)
+        finally:
+            flight.done = True
+            self._notify(flight)
+
+    @staticmethod
+    def _notify(flight: _Flight) -> None:
+        updated, flight.updated = flight.updated, asyncio.Event()
+        updated.set()
+
+
+def create_single_flight() -> SingleFlight:
+    """
+    Build the request coalescer from environment settings.
+
+    IDEMPOTENCY_TTL_SECONDS    how long completed results are replayed (default 60, 0 only
+                               coalesces in-flight requests)
+    IDEMPOTENCY_MAX_ENTRIES    completed results kept (default 1024)
+    IDEMPOTENCY_AUTO_KEY       also coalesce identical session + message requests without a
+                               key (default false)
+    """
+    return SingleFlight(
+        ttl_seconds=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "60") or 0),
+        max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1024")),
+        auto_key=os.getenv("IDEMPOTENCY_AUTO_KEY", "false").strip().lower()
+        in ("1", "true", "yes", "on"),
+    )
@@ -0,0 +1,45 @@
+"""
+ASGI middleware for the agent API
+"""
+
+import time
+
+from ..agent import metrics
+
+
+def route_label(scope) -> str:
+    """Route template (``/chat/stream``) for metric labels, never the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records ``http_request_duration_seconds`` per route, method and status.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware`` so streaming responses are
+    passed through untouched; their latency covers the whole stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.observe_request(route_label(scope), scope["method"], status, elapsed)
@@ -2,15 +2,17 @@
 Pydantic models for the API
 """
 
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
+
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str
     session_id: Optional[str] = "default"
 
+
 class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
     response: str
@@ -19,14 +21,27 @@ class ChatResponse(BaseModel):
     metadata: Dict[str, Any]
     timestamp: datetime
 
+
+class BatchChatRequest(BaseModel):
+    """Request model for the batch chat endpoint."""
+    items: List[ChatRequest] = Field(..., min_length=1)
+    # Items run at once; capped by BATCH_CONCURRENCY
+    concurrency: Optional[int] = Field(None, ge=1)
+
+
 class HealthResponse(BaseModel):
     """Health check response model."""
     status: str
     timestamp: datetime
     version: str
 
+
+# "tokens" streams LLM tokens as generated, "updates" one chunk per finished node
+StreamMode = Literal["tokens", "updates"]
+
+
 class StreamChunk(BaseModel):
     """Streaming response chunk model."""
-    chunk_type: str  # "agent", "tools", "end"
+    chunk_type: str  # "token", "agent", "tools", "error", "end"
     content: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
@@ -2,129 +2,389 @@
 FastAPI routes for the agent API
 """
 
+import asyncio
+import logging
 import os
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import AsyncGenerator
-from fastapi import FastAPI, HTTPException
+from typing import Awaitable, Optional
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
-import json
 
-from .models import ChatRequest, ChatResponse, HealthResponse, StreamChunk
-from ..agent.core import LangGraphAgent
-from ..agent.modern import ModernLangGraphAgent
+from .admission import AdmissionMiddleware, create_admission_controller
+from .batch import ndjson, run_batch
+from .idempotency import IdempotencyConflict, create_single_flight, request_fingerprint
+from .middleware import MetricsMiddleware
+from .models import (
+    BatchChatRequest,
+    ChatRequest,
+    ChatResponse,
+    HealthResponse,
+    StreamMode,
+)
+from .streaming import sse_response
+from .trace import TraceMiddleware, create_trace_recorder
+from ..agent import metrics
+from ..agent.circuit_breaker import CircuitOpenError, retry_after_header
+from ..agent.deadlines import DeadlineExceeded, deadline_after
+from ..agent.factory import AgentFactory
+from ..agent.sessions import SessionBusyError
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the enabled agents in the background so /health answers right away."""
+    if os.getenv("AGENT_PRELOAD", "true").strip().lower() not in ("0", "false", "no", "off"):
+        global warm_up
+        warm_up = asyncio.get_running_loop().run_in_executor(None, agents.warm_up)
+        warm_up.add_done_callback(_log_warm_up_failure)
+    yield
+    if trace_recorder is not None:
+        trace_recorder.close()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="LangGraph Agent API",
     description="A generic LangGraph agent framework",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Initialize agents
+# Bound concurrent chat work per worker; streams are served ahead of plain requests
+admission = create_admission_controller()
+if admission is not None:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        priorities={
+            "/chat/stream": "interactive",
+            "/chat/stream/modern": "interactive",
+            "/chat": "standard",
+            "/chat/modern": "standard",
+            "/chat/batch": "batch",
+        },
+    )
+
+# Record chat traffic for offline replay (TRACE_FILE); sees admission rejections too
+trace_recorder = create_trace_recorder()
+if trace_recorder is not None:
+    app.add_middleware(TraceMiddleware, recorder=trace_recorder)
+
+# Per-route latency (outermost, so rejections are timed too); skipped when metrics are disabled
+if metrics.ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Agents are built on first use; AGENT_VARIANTS limits which ones are served.
+# CHECKPOINT_URL (e.g. sqlite:///data/checkpoints.db) stores checkpoints elsewhere than REDIS_URL
 redis_url = os.getenv("REDIS_URL")
-agent = LangGraphAgent(redis_url=redis_url)
-modern_agent = ModernLangGraphAgent(redis_url=redis_url)
+agents = AgentFactory(redis_url=os.getenv("CHECKPOINT_URL") or redis_url)
+
+# Startup build of the agents (AGENT_PRELOAD); /health reports "degraded" if it failed
+warm_up: Optional[asyncio.Future] = None
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up_error() -> Optional[BaseException]:
+    if warm_up is None or not warm_up.done() or warm_up.cancelled():
+        return None
+    return warm_up.exception()
+
+
+def _log_warm_up_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Building the agents at startup failed", exc_info=future.exception())
+
+
+# Bulk requests: items per batch and items run at once
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Longest a chat turn may take (0 disables); X-Request-Timeout can only shorten it
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120") or 0)
+# How often a plain chat request checks whether its client is still there
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Duplicate in-flight requests (Idempotency-Key) share one agent run
+single_flight = create_single_flight()
+
+_VARIANT_ATTRS = {"agent": "custom", "modern_agent": "modern"}
+
+
+def __getattr__(name: str):
+    # Keep ``routes.agent`` / ``routes.modern_agent`` working without eager construction
+    if name in _VARIANT_ATTRS:
+        return agents.get(_VARIANT_ATTRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_agent(variant: str):
+    """Return the agent for ``variant`` or 404 when this deployment does not serve it."""
+    if not agents.is_enabled(variant):
+        raise HTTPException(status_code=404, detail=f"The {variant} agent is not enabled")
+    return agents.get(variant)
+
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
     return HealthResponse(
-        status="healthy",
+        status="degraded" if _warm_up_error() is not None else "healthy",
         timestamp=datetime.now(),
         version="1.0.0"
     )
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    payload, content_type = metrics.render()
+    return Response(content=payload, media_type=content_type)
+
+
+def request_deadline(timeout: Optional[float]) -> Optional[float]:
+    """
+    Deadline for a request: the ``X-Request-Timeout`` header (seconds) can
+    shorten the server's ``REQUEST_TIMEOUT_SECONDS`` but not extend it.
+    """
+    seconds = REQUEST_TIMEOUT_SECONDS or None
+    if timeout is not None and timeout > 0:
+        seconds = min(timeout, seconds) if seconds else timeout
+    return deadline_after(seconds)
+
+
+async def cancel_on_disconnect(http_request: Request, work: Awaitable):
+    """Await ``work``, cancelling it when the client goes away first."""
+    task = asyncio.ensure_future(work)
+
+    async def disconnected():
+        while not await http_request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            # Let the turn close its checkpoint before answering
+            await asyncio.wait({task})
+    if task.cancelled():
+        raise HTTPException(status_code=499, detail="Client closed the request")
+    return task.result()
+
+
+async def answer(chat_agent, message: str, session_id: str,
+                 deadline: Optional[float] = None) -> ChatResponse:
+    """Run one chat turn and build the response."""
+    result = await chat_agent.achat(message, session_id, deadline=deadline)
+    return ChatResponse(
+        response=result["agent_response"],
+        session_id=session_id,
+        tools_used=result.get("tools_used", []),
+        metadata=result.get("metadata", {}),
+        timestamp=datetime.now()
+    )
+
+
+def flight_key(route: str, request: ChatRequest, idempotency_key: Optional[str], **extra) -> tuple:
+    """Single-flight key and payload fingerprint for a chat request (key None: not coalesced)."""
+    fingerprint = request_fingerprint(
+        route, message=request.message, session_id=request.session_id, **extra
+    )
+    key = single_flight.key_for(route, idempotency_key, request.session_id, fingerprint)
+    return key, fingerprint
+
+
+async def coalesced_answer(route: str, chat_agent, request: ChatRequest, response: Response,
+                           idempotency_key: Optional[str],
+                           deadline: Optional[float] = None) -> ChatResponse:
+    session_id = request.session_id or str(uuid.uuid4())
+    key, fingerprint = flight_key(route, request, idempotency_key)
+    if key is None:
+        return await answer(chat_agent, request.message, session_id, deadline)
+    result, replayed = await single_flight.run(
+        key, fingerprint, lambda: answer(chat_agent, request.message, session_id, deadline)
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, response: Response, http_request: Request,
+               idempotency_key: Optional[str] = Header(None),
+               x_request_timeout: Optional[float] = Header(None)):
     """Chat with the agent (custom implementation)."""
+    chat_agent = get_agent("custom")
+    deadline = request_deadline(x_request_timeout)
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-        result = agent.chat(request.message, session_id)
-        
-        return ChatResponse(
-            response=result["agent_response"],
-            session_id=session_id,
-            tools_used=result.get("tools_used", []),
-            metadata=result.get("metadata", {}),
-            timestamp=datetime.now()
+        return await cancel_on_disconnect(http_request, coalesced_answer(
+            "/chat", chat_agent, request, response, idempotency_key, deadline
+        ))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SessionBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "1"})
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": retry_after_header(e)}
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except HTTPException:
+        # e.g. 499 from cancel_on_disconnect
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @app.post("/chat/modern", response_model=ChatResponse)
-async def chat_modern(request: ChatRequest):
+async def chat_modern(request: ChatRequest, response: Response, http_request: Request,
+                      idempotency_key: Optional[str] = Header(None),
+                      x_request_timeout: Optional[float] = Header(None)):
     """Chat with the modern agent (using prebuilt components)."""
+    chat_agent = get_agent("modern")
+    deadline = request_deadline(x_request_timeout)
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-        result = modern_agent.chat(request.message, session_id)
-        
-        return ChatResponse(
-            response=result["agent_response"],
-            session_id=session_id,
-            tools_used=result.get("tools_used", []),
-            metadata=result.get("metadata", {}),
-            timestamp=datetime.now()
+        return await cancel_on_disconnect(http_request, coalesced_answer(
+            "/chat/modern", chat_agent, request, response, idempotency_key, deadline
+        ))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SessionBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "1"})
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": retry_after_header(e)}
         )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except HTTPException:
+        # e.g. 499 from cancel_on_disconnect
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest,
+                     x_request_timeout: Optional[float] = Header(None)):
+    """
+    Run many chat requests through the custom agent with bounded concurrency.
+
+    Responds with NDJSON: one ``{"index", "success", "result" | "error",
+    "processing_time"}`` line per item in completion order, then a
+    ``{"summary": {...}}`` line. Items without a ``session_id`` get their own session.
+    Every item shares the batch's deadline (``X-Request-Timeout``).
+    """
+    chat_agent = get_agent("custom")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"A batch may contain at most {BATCH_MAX_ITEMS} items"
+        )
+    concurrency = min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    deadline = request_deadline(x_request_timeout)
+
+    async def handle(item: ChatRequest) -> dict:
+        explicit = "session_id" in item.model_fields_set and item.session_id
+        session_id = item.session_id if explicit else str(uuid.uuid4())
+        response = await answer(chat_agent, item.message, session_id, deadline)
+        return response.model_dump(mode="json")
+
+    return StreamingResponse(
+        ndjson(run_batch(request.items, handle, concurrency)),
+        media_type="application/x-ndjson"
+    )
+
+
+async def chat_events(chat_agent, message: str, session_id: str, mode: str,
+                      deadline: Optional[float] = None):
+    """
+    Translate an agent stream into chat chunks.
+
+    ``tokens`` mode forwards LLM tokens from the agent node as they arrive;
+    ``updates`` mode emits one chunk per completed node.
+    """
+    if mode == "tokens":
+        async for stream_mode, payload in chat_agent.astream_chat(
+            message, session_id, stream_mode=["messages", "updates"], deadline=deadline
+        ):
+            if stream_mode == "messages":
+                token, metadata = payload
+                content = token.content
+                is_text = isinstance(content, str) and content
+                if metadata.get("langgraph_node") == "agent" and is_text:
+                    yield {"chunk_type": "token", "content": content}
+            elif "tools" in payload:
+                yield {"chunk_type": "tools", "content": "Executing tools..."}
+    else:
+        async for chunk in chat_agent.astream_chat(message, session_id, deadline=deadline):
+            if "agent" in chunk:
+                agent_data = chunk["agent"]
+                if "messages" in agent_data:
+                    last_message = agent_data["messages"][-1]
+                    if hasattr(last_message, 'content') and last_message.content:
+                        yield {"chunk_type": "agent", "content": last_message.content}
+
+            if "tools" in chunk:
+                yield {"chunk_type": "tools", "content": "Executing tools..."}
+
+    yield {"chunk_type": "end", "content": "Stream complete"}
+
+
+def coalesced_stream(route: str, http_request: Request, chat_agent, request: ChatRequest, mode: str,
+                     idempotency_key: Optional[str], deadline: Optional[float] = None):
+    session_id = request.session_id or str(uuid.uuid4())
+
+    def events():
+        return chat_events(chat_agent, request.message, session_id, mode, deadline)
+
+    key, fingerprint = flight_key(route, request, idempotency_key, mode=mode)
+    if key is None:
+        return sse_response(http_request, events())
+    replayed = single_flight.attached(key, fingerprint)
+    response = sse_response(http_request, single_flight.stream(key, fingerprint, events))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
 @app.post("/chat/stream")
-async def stream_chat(request: ChatRequest):
+async def stream_chat(request: ChatRequest, http_request: Request, mode: StreamMode = "tokens",
+                      idempotency_key: Optional[str] = Header(None),
+                      x_request_timeout: Optional[float] = Header(None)):
     """Stream chat responses (custom implementation)."""
+    chat_agent = get_agent("custom")
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-        
-        async def generate_stream():
-            for chunk in agent.stream_chat(request.message, session_id):
-                if "agent" in chunk:
-                    agent_data = chunk["agent"]
-                    if "messages" in agent_data:
-                        last_message = agent_data["messages"][-1]
-                        if hasattr(last_message, 'content') and last_message.content:
-                            yield f"data: {json.dumps({'chunk_type': 'agent', 'content': last_message.content})}\n\n"
-                
-                if "tools" in chunk:
-                    yield f"data: {json.dumps({'chunk_type': 'tools', 'content': 'Executing tools...'})}\n\n"
-            
-            yield f"data: {json.dumps({'chunk_type': 'end', 'content': 'Stream complete'})}\n\n"
-        
-        return StreamingResponse(
-            generate_stream(),
-            media_type="text/plain",
-            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
-        )
+        return coalesced_stream("/chat/stream", http_request, chat_agent, request, mode,
+                                idempotency_key, request_deadline(x_request_timeout))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @app.post("/chat/stream/modern")
-async def stream_chat_modern(request: ChatRequest):
+async def stream_chat_modern(request: ChatRequest, http_request: Request,
+                             mode: StreamMode = "tokens",
+                             idempotency_key: Optional[str] = Header(None),
+                             x_request_timeout: Optional[float] = Header(None)):
     """Stream chat responses (modern implementation)."""
+    chat_agent = get_agent("modern")
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-        
-        async def generate_stream():
-            for chunk in modern_agent.stream_chat(request.message, session_id):
-                if "agent" in chunk:
-                    agent_data = chunk["agent"]
-                    if "messages" in agent_data:
-                        last_message = agent_data["messages"][-1]
-                        if hasattr(last_message, 'content') and last_message.content:
-                            yield f"data: {json.dumps({'chunk_type': 'agent', 'content': last_message.content})}\n\n"
-                
-                if "tools" in chunk:
-                    yield f"data: {json.dumps({'chunk_type': 'tools', 'content': 'Executing tools...'})}\n\n"
-            
-            yield f"data: {json.dumps({'chunk_type': 'end', 'content': 'Stream complete'})}\n\n"
-        
-        return StreamingResponse(
-            generate_stream(),
-            media_type="text/plain",
-            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
-        )
+        return coalesced_stream("/chat/stream/modern", http_request, chat_agent, request, mode,
+                                idempotency_key, request_deadline(x_request_timeout))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -133,8 +393,10 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "chat": "/chat",
             "chat_modern": "/chat/modern",
+            "chat_batch": "/chat/batch",
             "stream": "/chat/stream",
             "stream_modern": "/chat/stream/modern",
             "docs": "/docs"
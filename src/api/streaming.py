@@ -0,0 +1,91 @@
+"""
+Server-Sent Events helpers for the streaming chat endpoints
+"""
+
+import asyncio
+import json
+from contextlib import suppress
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from ..agent.metrics import track_stream
+from .middleware import route_label
+
+# Seconds of silence before a keep-alive comment is sent to the client
+HEARTBEAT_INTERVAL = 15.0
+
+# Events buffered between the agent and a slow client before the agent is paused
+QUEUE_SIZE = 64
+
+_DONE = object()
+
+
+def format_event(data: Dict[str, Any], event_id: int) -> str:
+    """Encode one chunk as an SSE frame with an id."""
+    return f"id: {event_id}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(
+    request: Request,
+    events: AsyncIterator[Dict[str, Any]],
+    heartbeat_interval: float = HEARTBEAT_INTERVAL,
+    queue_size: int = QUEUE_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Relay ``events`` to the client as SSE frames.
+
+    The agent stream runs in its own task behind a bounded queue so that
+    heartbeats keep flowing while the model is thinking. When the client goes
+    away (or the response is torn down) the producer task is cancelled, which
+    cancels the in-flight LLM request instead of letting it run to completion.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def produce():
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put({"chunk_type": "error", "content": str(e)})
+        await queue.put(_DONE)
+
+    with track_stream(route_label(request.scope)):
+        producer = asyncio.create_task(produce())
+        event_id = 0
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat_interval)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if event is _DONE:
+                    break
+                event_id += 1
+                yield format_event(event, event_id)
+        finally:
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+
+
+def sse_response(
+    request: Request,
+    events: AsyncIterator[Dict[str, Any]],
+    heartbeat_interval: float = HEARTBEAT_INTERVAL,
+) -> StreamingResponse:
+    """Wrap an agent event iterator in a ``text/event-stream`` response."""
+    return StreamingResponse(
+        event_stream(request, events, heartbeat_interval),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -0,0 +1,369 @@
+"""
+Request trace recording and replay
+
+``TraceMiddleware`` writes one JSON line per chat request to a trace file
+(``TRACE_FILE``): when it arrived (seconds since recording started), the
+route, session and request shape, the status, time to first byte and total
+duration, plus how it interleaved with other requests (requests in flight,
+its position within the session and whether that session already had one
+running). Message text is only kept with ``TRACE_CAPTURE_MESSAGES=true``;
+otherwise its length is recorded and replay sends filler of the same size.
+Sampling (``TRACE_SAMPLE_RATE``) is per session, so sampled sessions are
+recorded whole.
+
+``replay`` re-drives a trace against an app at the recorded pace (scaled
+by ``speed``). Requests on the same session keep their recorded order by
+default: each waits for the previous one on its session, as the original
+client did, and that wait is reported separately from the request latency.
+``summarize`` compares the replay with the recording.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from .middleware import route_label
+
+# Request bodies larger than this are not parsed for the trace
+MAX_BODY_BYTES = 64 * 1024
+# Sessions whose turn counters are kept (least recently seen are dropped)
+MAX_TRACKED_SESSIONS = 10_000
+
+
+def _sampled(session_id: Optional[str], rate: float) -> bool:
+    if rate >= 1:
+        return True
+    key = session_id or str(time.monotonic_ns())
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < rate
+
+
+class TraceRecorder:
+    """Appends trace records to a JSONL file; safe to share between threads."""
+
+    def __init__(self, path: str, sample_rate: float = 1.0, capture_messages: bool = False):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.capture_messages = capture_messages
+        self.started = time.monotonic()
+        self.in_flight = 0
+        # session -> [turns seen, running]
+        self._sessions: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def begin(self, session_id: Optional[str]) -> Dict[str, Any]:
+        """Interleaving fields for a request that just arrived."""
+        with self._lock:
+            self.in_flight += 1
+            fields = {"t": round(time.monotonic() - self.started, 6), "in_flight": self.in_flight}
+            if session_id is not None:
+                state = self._sessions.pop(session_id, None) or [0, 0]
+                fields.update(turn=state[0], session_overlap=state[1] > 0)
+                state[0] += 1
+                state[1] += 1
+                self._sessions[session_id] = state
+                if len(self._sessions) > MAX_TRACKED_SESSIONS:
+                    self._sessions.popitem(last=False)
+            return fields
+
+    def end(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self.in_flight -= 1
+            state = self._sessions.get(record.get("session_id"))
+            if state is not None:
+                state[1] = max(0, state[1] - 1)
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def create_trace_recorder() -> Optional[TraceRecorder]:
+    """
+    Build the recorder from environment settings; None when tracing is off.
+
+    TRACE_FILE               JSONL file to append to (unset disables recording)
+    TRACE_SAMPLE_RATE        share of sessions recorded (default 1)
+    TRACE_CAPTURE_MESSAGES   keep message text instead of its length (default false)
+    """
+    path = os.getenv("TRACE_FILE")
+    if not path:
+        return None
+    return TraceRecorder(
+        path,
+        sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1")),
+        capture_messages=os.getenv("TRACE_CAPTURE_MESSAGES", "false").strip().lower()
+        in ("1", "true", "yes", "on"),
+    )
+
+
+def _request_shape(body: bytes, capture_messages: bool) -> Dict[str, Any]:
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        return {}
+    if not isinstance(payload, dict):
+        return {}
+    shape: Dict[str, Any] = {"session_id": payload.get("session_id")}
+    if "items" in payload:
+        items = payload["items"] if isinstance(payload["items"], list) else []
+        shape["items"] = [
+            {"session_id": i.get("session_id"), "message_chars": len(str(i.get("message", "")))}
+            for i in items if isinstance(i, dict)
+        ]
+        if capture_messages:
+            for out, item in zip(shape["items"], items):
+                out["message"] = item.get("message")
+    else:
+        message = str(payload.get("message", ""))
+        shape["message_chars"] = len(message)
+        if capture_messages:
+            shape["message"] = message
+    return shape
+
+
+class TraceMiddleware:
+    """
+    Records each request to ``paths`` with ``recorder``.
+
+    Plain ASGI (like ``MetricsMiddleware``): the body is read up front, to
+    sample by session, and handed to the app unchanged; streamed responses
+    pass through untouched.
+    """
+
+    def __init__(self, app, recorder: TraceRecorder, paths: Iterable[str] = ("/chat",)):
+        self.app = app
+        self.recorder = recorder
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        # The body must be known before the request starts, to sample by session
+        received: List[dict] = []
+        while True:
+            message = await receive()
+            received.append(message)
+            if message["type"] != "http.request" or not message.get("more_body", False):
+                break
+        body = b"".join(m.get("body", b"") for m in received if m["type"] == "http.request")
+
+        async def replay_body():
+            # Hand the app what was already read, then the live channel (disconnects)
+            if received:
+                return received.pop(0)
+            return await receive()
+
+        shape = {}
+        if len(body) <= MAX_BODY_BYTES:
+            shape = _request_shape(body, self.recorder.capture_messages)
+        session_id = shape.get("session_id")
+        if not _sampled(session_id, self.recorder.sample_rate):
+            await self.app(scope, replay_body, send)
+            return
+
+        headers = {
+            k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])
+        }
+        record: Dict[str, Any] = self.recorder.begin(session_id)
+        record.update(method=scope["method"], path=scope["path"],
+                      query=scope.get("query_string", b"").decode())
+        record.update(shape)
+        if "x-request-timeout" in headers:
+            record["timeout"] = headers["x-request-timeout"]
+        if "idempotency-key" in headers:
+            record["idempotency_key"] = headers["idempotency-key"]
+
+        status = 500
+        first_byte: Optional[float] = None
+        size = 0
+        start = time.perf_counter()
+
+        async def send_and_measure(message):
+            nonlocal status, first_byte, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, send_and_measure)
+        finally:
+            record.update(
+                route=route_label(scope),
+                status=status,
+                duration=round(time.perf_counter() - start, 6),
+                first_byte=round(first_byte, 6) if first_byte is not None else None,
+                bytes=size,
+            )
+            self.recorder.end(record)
+
+
+# Replay
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Trace records ordered by arrival."""
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda r: r["t"])
+
+
+def _message(record: Dict[str, Any], index: int) -> str:
+    if record.get("message") is not None:
+        return record["message"]
+    # Deterministic filler of the recorded length
+    text = f"replayed request {index} "
+    chars = record.get("message_chars", 0)
+    return (text * (chars // len(text) + 1))[:max(1, chars)]
+
+
+def _replay_body(record: Dict[str, Any], index: int, session_prefix: str) -> Dict[str, Any]:
+    def session(sid):
+        return f"{session_prefix}{sid}" if sid else None
+
+    if "items" in record:
+        items = []
+        for j, item in enumerate(record["items"]):
+            body = {"message": _message(item, index * 1000 + j)}
+            if item.get("session_id"):
+                body["session_id"] = session(item["session_id"])
+            items.append(body)
+        return {"items": items}
+    body = {"message": _message(record, index)}
+    if record.get("session_id"):
+        body["session_id"] = session(record["session_id"])
+    return body
+
+
+async def replay(client, records: List[Dict[str, Any]], speed: float = 1.0,
+                 preserve_order: bool = True,
+                 session_prefix: str = "replay:") -> List[Dict[str, Any]]:
+    """
+    Send ``records`` through ``client`` (an ``httpx.AsyncClient`` on the app)
+    at ``speed`` times the recorded pace and return one result per record.
+
+    Each result has the replayed ``status``, ``duration`` and ``first_byte``,
+    the time the request waited for its session (``session_wait``) and the
+    recorded values for comparison.
+    """
+    start = time.monotonic()
+    # The trace clock starts with the recorder, not with the first request
+    origin = min((r["t"] for r in records), default=0.0)
+    previous: Dict[str, asyncio.Future] = {}
+
+    async def one(index: int, record: Dict[str, Any],
+                  before: Optional[asyncio.Future]) -> Dict[str, Any]:
+        await asyncio.sleep(max(0.0, start + (record["t"] - origin) / speed - time.monotonic()))
+        scheduled = time.monotonic()
+        if before is not None:
+            await asyncio.wait({before})
+        waited = time.monotonic() - scheduled
+
+        headers = {}
+        if record.get("timeout") is not None:
+            headers["X-Request-Timeout"] = str(record["timeout"])
+        if record.get("idempotency_key"):
+            headers["Idempotency-Key"] = f"{session_prefix}{record['idempotency_key']}"
+        url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+
+        first_byte = None
+        sent = time.perf_counter()
+        body = _replay_body(record, index, session_prefix)
+        async with client.stream(record.get("method", "POST"), url, json=body,
+                                 headers=headers) as response:
+            async for _ in response.aiter_raw():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - sent
+        return {
+            "index": index,
+            "path": record["path"],
+            "session_id": record.get("session_id"),
+            "turn": record.get("turn"),
+            "status": response.status_code,
+            "duration": time.perf_counter() - sent,
+            "first_byte": first_byte,
+            "session_wait": waited,
+            "finished": time.monotonic() - start,
+            "recorded_status": record.get("status"),
+            "recorded_duration": record.get("duration"),
+            "recorded_first_byte": record.get("first_byte"),
+        }
+
+    tasks = []
+    for index, record in enumerate(records):
+        sid = record.get("session_id")
+        before = previous.get(sid) if preserve_order and sid else None
+        task = asyncio.ensure_future(one(index, record, before))
+        if sid:
+            previous[sid] = task
+        tasks.append(task)
+    return list(await asyncio.gather(*tasks))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def _latencies(values: Iterable[Optional[float]]) -> Dict[str, float]:
+    values = [v for v in values if v is not None]
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def _turn_bucket(turn: Optional[int]) -> str:
+    if turn is None:
+        return "?"
+    return str(turn + 1) if turn < 2 else "3-5" if turn < 5 else "6+"
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Replayed vs recorded latency and throughput, status changes, session
+    waits, and latency by position within the session (later turns read and
+    write a longer checkpointed history).
+    """
+    if not results:
+        return {"requests": 0}
+    wall = max(r["finished"] for r in results)
+    by_turn: Dict[str, List[float]] = {}
+    for r in results:
+        by_turn.setdefault(_turn_bucket(r["turn"]), []).append(r["duration"])
+    return {
+        "requests": len(results),
+        "wall": wall,
+        "throughput": len(results) / wall if wall else 0.0,
+        "replayed": _latencies(r["duration"] for r in results),
+        "recorded": _latencies(r["recorded_duration"] for r in results),
+        "first_byte": _latencies(r["first_byte"] for r in results),
+        "recorded_first_byte": _latencies(r["recorded_first_byte"] for r in results),
+        "status_changes": sum(
+            1 for r in results if r["recorded_status"] not in (None, r["status"])
+        ),
+        "errors": sum(1 for r in results if r["status"] >= 400),
+        "session_busy": sum(1 for r in results if r["status"] == 409),
+        "session_wait": _latencies(r["session_wait"] for r in results if r["session_id"]),
+        "by_turn": {
+            bucket: _latencies(values)["p50"] for bucket, values in sorted(by_turn.items())
+        },
+    }
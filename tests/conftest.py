@@ -0,0 +1,41 @@
+"""
+Shared fixtures for the agent and API unit tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from tests.fakes import FakeChatModel
+
+
+@pytest.fixture
+def fake_model():
+    """Factory fixture for scripted fake chat models."""
+    def _make(replies=None, latency: float = 0.0) -> FakeChatModel:
+        return FakeChatModel(replies=list(replies or []), latency=latency)
+    return _make
+
+
+@pytest.fixture(autouse=True)
+def clear_tool_cache():
+    """Tool results are cached process-wide; start every test with an empty cache."""
+    from src.agent.tool_execution import get_tool_executor
+
+    cache = get_tool_executor().cache
+    if cache is not None:
+        cache.invalidate()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def close_circuit_breakers():
+    """Breakers are process-wide; failures injected by one test must not open them for the next."""
+    from src.agent.circuit_breaker import reset_circuit_breakers
+
+    reset_circuit_breakers()
+    yield
@@ -0,0 +1,232 @@
+"""
+Test doubles shared by the agent and API unit tests
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model stand-in that replays scripted replies after a fixed delay."""
+
+    replies: List[Any] = []
+    latency: float = 0.0
+    # Messages received by each call, oldest first
+    prompts: List[Any] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    def _next_reply(self) -> AIMessage:
+        if not self.replies:
+            return AIMessage(content="ok")
+        reply = self.replies.pop(0)
+        return reply if isinstance(reply, AIMessage) else AIMessage(content=str(reply))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.prompts.append(messages)
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_reply())])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.prompts.append(messages)
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_reply())])
+
+    def _chunks(self, reply: AIMessage):
+        if reply.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(reply.tool_calls)
+            ]))
+            return
+        for i, word in enumerate(reply.content.split(" ")):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + word))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        time.sleep(self.latency)
+        for chunk in self._chunks(self._next_reply()):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._next_reply()):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def use_model(agent, model: BaseChatModel) -> None:
+    """Point an existing agent at ``model`` and rebuild its graph."""
+    agent.llm = model
+    if hasattr(agent, "graph"):
+        agent.graph = agent._create_graph()
+    else:
+        agent.agent = agent._create_agent()
+
+
+def _b(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of redis-py used by the agents."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.round_trips = 0
+        self.lock = threading.RLock()
+
+    # Strings
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = _b(value)
+        if ex or px:
+            self.expiry[key] = ex or px / 1000
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self.data.pop(key, None) is not None
+            self.expiry.pop(key, None)
+        return removed
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+        return key in self.data
+
+    # Sorted sets (members ordered lexicographically, scores ignored)
+    def zadd(self, key, mapping):
+        members = self.data.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            added += _b(member) not in members
+            members[_b(member)] = score
+        return added
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def zrange(self, key, start, end):
+        members = sorted(self.data.get(key, {}))
+        end = len(members) if end == -1 else end + 1
+        return members[start:end]
+
+    def zrevrange(self, key, start, end):
+        members = sorted(self.data.get(key, {}), reverse=True)
+        end = len(members) if end == -1 else end + 1
+        return members[start:end]
+
+    def zrevrangebylex(self, key, max, min, start=None, num=None):
+        def bound(value):
+            value = _b(value)
+            if value in (b"+", b"-"):
+                return None, True
+            return value[1:], value.startswith(b"[")
+
+        upper, upper_inclusive = bound(max)
+        lower, lower_inclusive = bound(min)
+        members = [
+            m for m in sorted(self.data.get(key, {}), reverse=True)
+            if (upper is None or m < upper or (upper_inclusive and m == upper))
+            and (lower is None or m > lower or (lower_inclusive and m == lower))
+        ]
+        if start is not None:
+            members = members[start:start + num if num is not None and num >= 0 else None]
+        return members
+
+    def zrem(self, key, *members):
+        zset = self.data.get(key, {})
+        return sum(zset.pop(_b(m), None) is not None for m in members)
+
+    # Sets
+    def sadd(self, key, *values):
+        members = self.data.setdefault(key, set())
+        before = len(members)
+        members.update(_b(v) for v in values)
+        return len(members) - before
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    # Hashes
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[_b(field)] = _b(value)
+        return 1
+
+    def hsetnx(self, key, field, value):
+        fields = self.data.setdefault(key, {})
+        if _b(field) in fields:
+            return 0
+        fields[_b(field)] = _b(value)
+        return 1
+
+    def hvals(self, key):
+        return list(self.data.get(key, {}).values())
+
+    # Scripts: only the compare-and-delete used by the session lock is emulated
+    def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        if self.data.get(keys[0]) == _b(argv[0]):
+            del self.data[keys[0]]
+            self.expiry.pop(keys[0], None)
+            return 1
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def __getattribute__(self, name):
+        attr = object.__getattribute__(self, name)
+        if callable(attr) and not name.startswith("_") and name not in ("pipeline",):
+            def call(*args, **kwargs):
+                with object.__getattribute__(self, "lock"):
+                    self.round_trips += 1
+                    return attr(*args, **kwargs)
+            return call
+        return attr
+
+
+class FakePipeline:
+    """Queues commands and runs them in one simulated round trip."""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self.client.lock:
+            self.client.round_trips += 1
+            results = [
+                object.__getattribute__(self.client, name)(*args, **kwargs)
+                for name, args, kwargs in self.commands
+            ]
+        self.commands = []
+        return results
@@ -0,0 +1,164 @@
+"""
+Tests for admission control on the chat endpoints
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from src.agent import metrics
+from src.api.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejected,
+    create_admission_controller,
+)
+
+
+def make_app(controller, delay=0.1):
+    app = FastAPI()
+    state = {"running": 0, "peak": 0}
+
+    @app.post("/work")
+    async def work():
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(delay)
+        state["running"] -= 1
+        return {"ok": True}
+
+    @app.post("/stream")
+    async def stream():
+        async def body():
+            for i in range(3):
+                await asyncio.sleep(delay / 3)
+                yield f"{i} in flight={controller.in_flight}\n"
+        return StreamingResponse(body(), media_type="text/plain")
+
+    @app.get("/free")
+    async def free():
+        return {"in_flight": controller.in_flight}
+
+    app.add_middleware(AdmissionMiddleware, controller=controller,
+                       priorities={"/work": "standard", "/stream": "interactive"})
+    return app, state
+
+
+def post_many(app, paths):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post(p) for p in paths))
+    return asyncio.run(run())
+
+
+def test_concurrency_is_capped_and_excess_requests_wait():
+    controller = AdmissionController(max_concurrent=2, max_queue=10)
+    app, state = make_app(controller)
+
+    responses = post_many(app, ["/work"] * 6)
+
+    assert [r.status_code for r in responses] == [200] * 6
+    assert state["peak"] == 2
+    assert (controller.in_flight, controller.queue_depth) == (0, 0)
+
+
+def test_full_queue_is_rejected_with_429_and_retry_after():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, retry_after=3)
+    app, _ = make_app(controller)
+
+    statuses = sorted(r.status_code for r in post_many(app, ["/work"] * 4))
+    rejected = [r for r in post_many(app, ["/work"] * 3) if r.status_code == 429][0]
+
+    assert statuses == [200, 200, 429, 429]
+    assert rejected.headers["retry-after"] == "3"
+    assert rejected.json()["reason"] == "queue_full"
+
+
+def test_waiting_past_the_queue_timeout_returns_503():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+    app, _ = make_app(controller, delay=0.2)
+
+    responses = post_many(app, ["/work"] * 2)
+
+    assert sorted(r.status_code for r in responses) == [200, 503]
+    assert controller.in_flight == 0
+
+
+def test_unlisted_routes_bypass_the_limiter():
+    controller = AdmissionController(max_concurrent=1)
+    app, _ = make_app(controller)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/free")
+    assert asyncio.run(run()).json() == {"in_flight": 0}
+
+
+def test_stream_holds_its_slot_until_it_ends():
+    controller = AdmissionController(max_concurrent=1)
+    app, _ = make_app(controller)
+
+    response = post_many(app, ["/stream"])[0]
+
+    assert "in flight=1" in response.text
+    assert controller.in_flight == 0
+
+
+def test_interactive_requests_are_served_first_and_can_shed_batch_waiters():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=2)
+        order = []
+
+        async def request(priority, name):
+            try:
+                await controller.acquire(priority)
+            except AdmissionRejected as e:
+                order.append((name, e.status, e.reason))
+                return
+            order.append(name)
+            await asyncio.sleep(0.01)
+            controller.release()
+
+        await controller.acquire()
+        tasks = [asyncio.create_task(request("batch", "batch-1"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("batch", "batch-2")))
+        await asyncio.sleep(0)
+        # Queue is full: the interactive request pushes out the newest batch waiter
+        tasks.append(asyncio.create_task(request("interactive", "stream")))
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+        return order, controller
+
+    order, controller = asyncio.run(run())
+    assert order == [("batch-2", 503, "shed"), "stream", "batch-1"]
+    assert controller.in_flight == 0
+
+
+@pytest.mark.skipif(not metrics.ENABLED, reason="prometheus_client not installed")
+def test_rejections_are_exported():
+    def rejected():
+        return metrics.registry.get_sample_value(
+            "admission_rejections_total", {"priority": "standard", "reason": "queue_full"}) or 0.0
+
+    before = rejected()
+    controller = AdmissionController(max_concurrent=1, max_queue=0)
+    app, _ = make_app(controller)
+    post_many(app, ["/work"] * 3)
+
+    assert rejected() == before + 2
+
+
+def test_create_admission_controller_from_env(monkeypatch):
+    monkeypatch.setenv("ADMISSION_MAX_CONCURRENT", "0")
+    assert create_admission_controller() is None
+    monkeypatch.setenv("ADMISSION_MAX_CONCURRENT", "8")
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE", "4")
+    controller = create_admission_controller()
+    assert (controller.max_concurrent, controller.max_queue) == (8, 4)
@@ -0,0 +1,84 @@
+"""
+Tests for the non-blocking achat/astream_chat execution path
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.agent.core import LangGraphAgent
+from src.agent.modern import ModernLangGraphAgent
+from tests.fakes import use_model
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_achat_runs_tools_and_returns_payload(agent_cls, fake_model):
+    agent = agent_cls()
+    use_model(agent, fake_model([
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"message": "hi"}, "id": "call_1"}]),
+        "done",
+    ]))
+
+    result = asyncio.run(agent.achat("echo hi", "s1"))
+
+    assert result["agent_response"] == "done"
+    assert result["session_id"] == "s1"
+    assert result["tools_used"] == ["echo"]
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_astream_chat_yields_node_updates(agent_cls, fake_model):
+    agent = agent_cls()
+    use_model(agent, fake_model(["hello"]))
+
+    async def collect():
+        return [chunk async for chunk in agent.astream_chat("hi", "s1")]
+
+    chunks = asyncio.run(collect())
+
+    assert any("agent" in chunk for chunk in chunks)
+
+
+def test_chat_route_does_not_block_event_loop(fake_model):
+    from src.api import routes
+
+    use_model(routes.agent, fake_model(latency=0.2))
+
+    async def burst():
+        transport = httpx.ASGITransport(app=routes.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post("/chat", json={"message": "hi", "session_id": f"s{i}"})
+                for i in range(10)
+            ))
+            return time.perf_counter() - start, responses
+
+    elapsed, responses = asyncio.run(burst())
+
+    assert all(r.status_code == 200 for r in responses)
+    # Ten sequential 200ms calls would take 2s; concurrent ones overlap.
+    assert elapsed < 1.0
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_tools_used_reflects_only_current_turn(agent_cls, fake_model):
+    agent = agent_cls()
+    use_model(agent, fake_model([
+        AIMessage(content="", tool_calls=[
+            {"name": "echo", "args": {"message": "a"}, "id": "call_1"},
+            {"name": "get_current_time", "args": {}, "id": "call_2"},
+            {"name": "echo", "args": {"message": "b"}, "id": "call_3"},
+        ]),
+        "first turn",
+        "second turn",
+    ]))
+
+    first = agent.chat("use tools", "turns")
+    second = asyncio.run(agent.achat("no tools now", "turns"))
+
+    assert first["tools_used"] == ["echo", "get_current_time"]
+    assert second["tools_used"] == []
@@ -0,0 +1,106 @@
+"""
+Tests for the batch chat endpoint
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+
+from src.api.batch import run_batch
+from tests.fakes import use_model
+
+
+def post_batch(app, body):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/batch", json=body)
+    response = asyncio.run(run())
+    return response, [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_streams_ndjson_with_original_indices(fake_model):
+    from src.api import routes
+
+    use_model(routes.agent, fake_model(latency=0.1))
+    items = [{"message": f"item {i}"} for i in range(6)]
+
+    started = time.perf_counter()
+    response, records = post_batch(routes.app, {"items": items, "concurrency": 3})
+    elapsed = time.perf_counter() - started
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    *results, summary = records
+    assert sorted(r["index"] for r in results) == list(range(6))
+    assert all(r["success"] and r["result"]["response"] == "ok" for r in results)
+    # Items without a session id do not share one
+    assert len({r["result"]["session_id"] for r in results}) == 6
+    assert summary["summary"]["total_items"] == 6
+    assert summary["summary"]["successful_items"] == 6
+    assert 0.15 < elapsed < 0.5
+
+
+def test_failures_are_isolated(fake_model, monkeypatch):
+    from src.api import routes
+
+    agent = routes.agent
+    use_model(agent, fake_model())
+    original = agent.achat
+
+    async def achat(message, session_id, deadline=None):
+        if message == "bad":
+            raise RuntimeError("model unavailable")
+        return await original(message, session_id)
+
+    monkeypatch.setattr(agent, "achat", achat)
+    _, records = post_batch(routes.app, {"items": [{"message": "good"}, {"message": "bad"}, {"message": "fine"}]})
+
+    failed = [r for r in records[:-1] if not r["success"]]
+    assert failed == [{"index": 1, "success": False, "error": "model unavailable",
+                       "processing_time": failed[0]["processing_time"]}]
+    assert records[-1]["summary"]["failed_items"] == 1
+
+
+def test_oversized_and_empty_batches_are_rejected(monkeypatch):
+    from src.api import routes
+
+    monkeypatch.setattr(routes, "BATCH_MAX_ITEMS", 2)
+    assert post_batch(routes.app, {"items": [{"message": "x"}] * 3})[0].status_code == 413
+    assert post_batch(routes.app, {"items": []})[0].status_code == 422
+
+
+def test_run_batch_yields_in_completion_order_with_bounded_workers():
+    running = {"now": 0, "peak": 0}
+
+    async def handle(delay):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(delay)
+        running["now"] -= 1
+        return delay
+
+    async def collect():
+        return [r async for r in run_batch([0.2, 0.05, 0.1, 0.01], handle, concurrency=2)]
+
+    records = asyncio.run(collect())
+    assert [r["index"] for r in records[:-1]] == [1, 2, 3, 0]
+    assert running["peak"] == 2
+
+
+def test_closing_the_stream_cancels_remaining_work():
+    started = []
+
+    async def handle(item):
+        started.append(item)
+        await asyncio.sleep(0.05)
+        return item
+
+    async def run():
+        records = run_batch(list(range(100)), handle, concurrency=4, buffer_size=1)
+        await records.__anext__()
+        await records.aclose()
+
+    asyncio.run(run())
+    assert len(started) < 10
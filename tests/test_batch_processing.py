@@ -0,0 +1,130 @@
+"""
+Tests for the BatchProcessingNode engine
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+
+import pytest
+
+from src.agent.custom_nodes import BatchProcessingNode
+
+
+def double(item):
+    if item == 3:
+        raise ValueError("three")
+    return item * 2
+
+
+async def adouble(item):
+    await asyncio.sleep(0.001)
+    return double(item)
+
+
+@pytest.mark.parametrize("backend", BatchProcessingNode.BACKENDS)
+def test_results_are_in_input_order_with_errors_isolated(backend):
+    processor = adouble if backend == "async" else double
+    node = BatchProcessingNode(batch_size=3, backend=backend, processor=processor, max_workers=2)
+
+    result = node.process_batch(range(10))
+
+    assert result["total_items"] == 10
+    assert (result["successful_items"], result["failed_items"]) == (9, 1)
+    assert result["results"] == [0, 2, 4, None, 8, 10, 12, 14, 16, 18]
+    assert result["errors"] == [{"index": 3, "error": "ValueError: three"}]
+    assert result["processing_time"] > 0
+
+
+def test_default_processor_marks_items():
+    result = BatchProcessingNode(batch_size=3, parallel=True).process_batch([{"id": 1}])
+    assert result["results"] == [{"id": 1, "processed": True}]
+
+
+def test_async_backend_runs_sync_processors_in_threads():
+    node = BatchProcessingNode(batch_size=2, backend="async")
+
+    result = node.process_batch([{"id": i} for i in range(5)])
+    assert result["successful_items"] == 5
+    assert result["results"][4] == {"id": 4, "processed": True}
+
+    async def run():
+        return await node.aprocess_batch([{"id": 1}])
+    assert asyncio.run(run())["results"] == [{"id": 1, "processed": True}]
+
+
+def test_sync_stream_of_async_backend_refuses_a_running_loop():
+    node = BatchProcessingNode(backend="async", processor=adouble)
+
+    async def run():
+        return list(node.stream(range(3)))
+    with pytest.raises(RuntimeError, match="astream"):
+        asyncio.run(run())
+
+
+def test_thread_backend_runs_chunks_concurrently():
+    def slow(item):
+        time.sleep(0.05)
+        return item
+
+    node = BatchProcessingNode(batch_size=1, backend="thread", processor=slow, max_workers=8)
+    started = time.perf_counter()
+    node.process_batch(range(8))
+    assert time.perf_counter() - started < 0.3
+
+
+def test_input_is_pulled_lazily_with_bounded_pending_chunks():
+    pulled = []
+    release = threading.Event()
+
+    def items():
+        for i in itertools.count():
+            pulled.append(i)
+            yield i
+
+    def blocked(item):
+        release.wait(1)
+        return item
+
+    node = BatchProcessingNode(batch_size=2, backend="thread", processor=blocked, max_workers=1, max_pending=2)
+    stream = node.stream(items())
+    time.sleep(0.05)
+    # Nothing runs until iteration starts
+    assert pulled == []
+    release.set()
+    first = next(stream)
+    stream.close()
+
+    assert first["success"]
+    # At most max_pending chunks (plus the one being refilled) were drawn from an infinite input
+    assert len(pulled) <= 3 * node.batch_size + 1
+
+
+def test_progress_is_reported_per_chunk():
+    seen = []
+    node = BatchProcessingNode(batch_size=4, processor=double, on_progress=seen.append)
+
+    node.process_batch(range(10))
+
+    assert [p["completed"] for p in seen] == [4, 8, 10]
+    assert seen[-1] == {"submitted": 10, "completed": 10, "failed": 1}
+
+
+def test_astream_yields_partial_results():
+    node = BatchProcessingNode(batch_size=2, backend="async", processor=adouble)
+
+    async def run():
+        records = []
+        async for record in node.astream(range(4)):
+            records.append(record)
+        return records, await node.aprocess_batch(range(4))
+
+    records, summary = asyncio.run(run())
+    assert sorted(r["index"] for r in records) == [0, 1, 2, 3]
+    assert summary["failed_items"] == 1
+
+
+def test_invalid_backend_is_rejected():
+    with pytest.raises(ValueError, match="backend"):
+        BatchProcessingNode(backend="gpu")
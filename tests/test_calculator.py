@@ -0,0 +1,99 @@
+"""
+Tests for the safe calculator behind the calculate tool
+"""
+
+import pytest
+
+from src.agent.calculator import Calculator, CalculatorError, evaluate, format_number
+from src.agent.core import calculate as core_calculate
+from src.agent.modern import calculate as modern_calculate
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("2 + 3", 5),
+    ("7 - 10", -3),
+    ("6 * 7", 42),
+    ("7 / 2", 3.5),
+    ("7 // 2", 3),
+    ("10 % 3", 1),
+    ("2 ^ 3", 8),
+    ("2 ** 10", 1024),
+    ("-(2 + 3) * 4", -20),
+    ("sqrt(16)", 4.0),
+    ("20% of 100", 20.0),
+    ("50%", 0.5),
+    ("round(pi, 2)", 3.14),
+    ("max(1, 5, 3)", 5),
+])
+def test_evaluates_supported_expressions(expression, expected):
+    assert evaluate(expression) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "().__class__.__bases__",
+    "open('/etc/passwd')",
+    "[1, 2]",
+    "'a' * 3",
+    "True + 1",
+    "x + 1",
+    "lambda: 1",
+    "1 if 2 else 3",
+    "round(1.5, ndigits=0)",
+])
+def test_rejects_non_arithmetic(expression):
+    with pytest.raises(CalculatorError):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("9**9**9", "exponent"),
+    ("2 ** 5000", "bits"),
+    ("10**1000 * 10**1000 * 10**1000 * 10**1000 * 10**1000", "bits"),
+    ("1 / 0", "division by zero"),
+    ("sqrt(-1)", "domain"),
+    ("10.0 ** 400", "range"),
+    ("(-8) ** (1/3)", "complex"),
+    ("abs((-8) ** 0.5)", "complex"),
+    ("1e308 * 10", "range"),
+    ("1e309 - 1e309", "range"),
+])
+def test_limits_and_math_errors(expression, message):
+    with pytest.raises(CalculatorError, match=message):
+        evaluate(expression)
+
+
+def test_operation_and_length_limits():
+    calc = Calculator(max_length=50, max_operations=5)
+    with pytest.raises(CalculatorError, match="operations"):
+        calc.evaluate("1+1+1+1+1+1+1")
+    with pytest.raises(CalculatorError, match="characters"):
+        calc.evaluate("1" * 51)
+
+
+def test_timeout_stops_evaluation():
+    calc = Calculator(timeout=-1)
+    with pytest.raises(CalculatorError, match="timed out"):
+        calc.evaluate("1 + 1")
+
+
+def test_compiled_expressions_are_cached():
+    calc = Calculator(cache_size=8)
+    for _ in range(3):
+        assert calc.evaluate("2 ^ 8") == 256
+    info = calc.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+
+def test_format_number():
+    assert format_number(4.0) == "4"
+    assert format_number(2.5) == "2.5"
+    assert format_number(1e20) == "1e+20"
+
+
+@pytest.mark.parametrize("tool", [core_calculate, modern_calculate])
+def test_calculate_tool_output(tool):
+    assert tool.invoke({"expression": "sqrt(16)"}) == "Result: sqrt(16) = 4"
+    assert tool.invoke({"expression": "9**9**9"}).startswith("Error calculating 9**9**9:")
+    complex_root = tool.invoke({"expression": "(-8)**(1/3)"})
+    assert complex_root == "Error calculating (-8)**(1/3): complex result"
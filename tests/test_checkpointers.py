@@ -0,0 +1,436 @@
+"""
+Tests for the checkpointer backends
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.agent.checkpointers import (
+    BoundedMemorySaver,
+    FileSaver,
+    RedisSaver,
+    SqliteSaver,
+    create_checkpointer,
+)
+from src.agent.core import LangGraphAgent
+from tests.fakes import FakeRedis, use_model
+
+
+def make_agent(fake_model, checkpointer, replies=None):
+    agent = LangGraphAgent(checkpointer=checkpointer)
+    use_model(agent, fake_model(replies))
+    return agent
+
+
+def test_history_truncation_keeps_conversation(fake_model):
+    saver = BoundedMemorySaver(max_history=2)
+    agent = make_agent(fake_model, saver, [f"reply {i}" for i in range(10)])
+
+    for i in range(5):
+        agent.chat(f"turn {i}", "t1")
+    blobs_after_5 = len(saver.blobs)
+    for i in range(5, 10):
+        result = agent.chat(f"turn {i}", "t1")
+
+    # The latest checkpoint still carries the whole conversation
+    assert len(result["messages"]) == 20
+    assert len(saver.storage["t1"][""]) == 2
+    assert len(saver.blobs) == blobs_after_5
+    assert saver.stats()["evictions"]["history"] > 0
+
+
+def test_lru_eviction_caps_threads(fake_model):
+    saver = BoundedMemorySaver(max_history=1, max_threads=3)
+    agent = make_agent(fake_model, saver)
+
+    for i in range(10):
+        agent.chat("hi", f"thread-{i}")
+
+    stats = saver.stats()
+    assert stats["threads"] == 3
+    assert stats["evictions"]["lru"] == 7
+    assert set(saver.storage) == {"thread-7", "thread-8", "thread-9"}
+    assert all(key[0] in saver.storage for key in saver.blobs)
+
+
+def test_ttl_eviction_drops_idle_threads(fake_model):
+    saver = BoundedMemorySaver(max_history=1, ttl_seconds=0.05)
+    agent = make_agent(fake_model, saver)
+
+    agent.chat("hi", "idle")
+    time.sleep(0.1)
+    agent.chat("hi", "active")
+
+    assert "idle" not in saver.storage
+    assert saver.stats()["evictions"]["ttl"] == 1
+
+
+def test_byte_budget_stays_flat_under_sustained_load(fake_model):
+    saver = BoundedMemorySaver(max_history=2, max_bytes=20_000)
+    agent = make_agent(fake_model, saver)
+
+    async def load():
+        for i in range(200):
+            await agent.achat("x" * 200, f"session-{i % 50}")
+
+    asyncio.run(load())
+
+    stats = saver.stats()
+    assert stats["bytes"] <= 20_000
+    assert stats["evictions"]["bytes"] > 0
+    recounted = sum(saver._thread_bytes.values())
+    assert recounted == stats["bytes"]
+
+
+def test_delete_thread_removes_all_state(fake_model):
+    saver = BoundedMemorySaver()
+    agent = make_agent(fake_model, saver)
+    agent.chat("hi", "gone")
+
+    saver.delete_thread("gone")
+
+    assert saver.get_tuple({"configurable": {"thread_id": "gone"}}) is None
+    assert not saver.blobs and not saver.writes
+    assert saver.stats()["bytes"] == 0
+
+
+def test_redis_saver_round_trips_conversation(fake_model):
+    client = FakeRedis()
+    saver = RedisSaver(client=client, max_history=3)
+    agent = make_agent(fake_model, saver, [
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"message": "x"}, "id": "call_1"}]),
+        "first",
+        "second",
+    ])
+
+    agent.chat("one", "r1")
+    result = asyncio.run(agent.achat("two", "r1"))
+
+    assert [m.content for m in result["messages"]][-1] == "second"
+    assert len(result["messages"]) == 6
+    assert client.zcard(saver._index_key("r1", "")) == 3
+    history = list(saver.list({"configurable": {"thread_id": "r1"}}))
+    assert [h.checkpoint["id"] for h in history] == sorted((h.checkpoint["id"] for h in history), reverse=True)
+
+
+def test_redis_saver_is_shared_across_agents_and_survives_restart(fake_model):
+    client = FakeRedis()
+    first = make_agent(fake_model, RedisSaver(client=client), ["hello"])
+    first.chat("hi", "shared")
+
+    # A second replica (or a restarted pod) sees the same conversation
+    second = make_agent(fake_model, RedisSaver(client=client), ["again"])
+    result = second.chat("hi again", "shared")
+
+    assert [m.content for m in result["messages"]] == ["hi", "hello", "hi again", "again"]
+
+
+def test_redis_saver_pipelines_checkpoint_writes(fake_model):
+    client = FakeRedis()
+    saver = RedisSaver(client=client, max_history=None)
+    config = {"configurable": {"thread_id": "p", "checkpoint_ns": ""}}
+    checkpoint = {"v": 1, "id": "0001", "ts": "", "channel_values": {"messages": ["x" * 5000]},
+                  "channel_versions": {}, "versions_seen": {}, "updated_channels": None}
+
+    before = client.round_trips
+    next_config = saver.put(config, checkpoint, {}, {})
+    saver.put_writes(next_config, [("a", 1), ("b", 2), ("c", 3)], task_id="t")
+
+    assert client.round_trips - before == 2
+    loaded = saver.get_tuple(next_config)
+    assert loaded.checkpoint["channel_values"]["messages"] == ["x" * 5000]
+    assert [w[1:] for w in loaded.pending_writes] == [("a", 1), ("b", 2), ("c", 3)]
+    # Large payloads are compressed
+    assert len(client.get(saver._checkpoint_key("p", "", "0001"))) < 1000
+
+
+def test_redis_saver_delete_thread_and_ttl(fake_model):
+    client = FakeRedis()
+    saver = RedisSaver(client=client, ttl_seconds=60)
+    make_agent(fake_model, saver).chat("hi", "ttl")
+
+    assert client.expiry and all(ttl == 60 for ttl in client.expiry.values())
+    saver.delete_thread("ttl")
+    assert not [k for k in client.data if "{ttl}" in k]
+
+
+def _checkpoint(checkpoint_id, value="x"):
+    return {"v": 1, "id": checkpoint_id, "ts": "", "channel_values": {"value": value},
+            "channel_versions": {}, "versions_seen": {}, "updated_channels": None}
+
+
+def test_redis_saver_lists_history_in_pages(monkeypatch):
+    from src.agent.checkpointers import redis_saver
+
+    monkeypatch.setattr(redis_saver, "LIST_PAGE_SIZE", 4)
+    client = FakeRedis()
+    saver = RedisSaver(client=client, max_history=None)
+    config = {"configurable": {"thread_id": "long", "checkpoint_ns": ""}}
+    for i in range(10):
+        saver.put(config, _checkpoint(f"{i:04}"), {"step": i}, {})
+    thread = {"configurable": {"thread_id": "long"}}
+
+    def ids(**kwargs):
+        before = client.round_trips
+        listed = [t.checkpoint["id"] for t in saver.list(thread, **kwargs)]
+        return listed, client.round_trips - before
+
+    # Namespaces, one index page, one pipelined load: only the listed checkpoints are read
+    assert ids(limit=2) == (["0009", "0008"], 3)
+    before = {"configurable": {"thread_id": "long", "checkpoint_ns": "", "checkpoint_id": "0005"}}
+    assert ids(before=before, limit=3) == (["0004", "0003", "0002"], 3)
+    listed, _ = ids()
+    assert listed == [f"{i:04}" for i in reversed(range(10))]
+    assert ids(filter={"step": 1}, limit=1)[0] == ["0001"]
+    assert ids(before=before)[0] == ["0004", "0003", "0002", "0001", "0000"]
+
+
+def test_file_saver_round_trips_and_survives_restart(fake_model, tmp_path):
+    saver = FileSaver(str(tmp_path))
+    agent = make_agent(fake_model, saver, [
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"message": "x"}, "id": "call_1"}]),
+        "first",
+    ])
+    agent.chat("one", "f1")
+    asyncio.run(agent.achat("two", "f1"))
+    saver.close()
+
+    # A restarted process reads the same files
+    restarted = make_agent(fake_model, FileSaver(str(tmp_path)), ["again"])
+    result = restarted.chat("three", "f1")
+
+    assert [m.content for m in result["messages"]][-2:] == ["three", "again"]
+    history = list(restarted.checkpointer.list({"configurable": {"thread_id": "f1"}}))
+    assert [h.checkpoint["id"] for h in history] == sorted((h.checkpoint["id"] for h in history), reverse=True)
+    assert history[0].parent_config["configurable"]["checkpoint_id"] == history[1].checkpoint["id"]
+
+
+def test_file_saver_recovers_from_a_torn_tail(tmp_path):
+    saver = FileSaver(str(tmp_path), durability="none")
+    config = {"configurable": {"thread_id": "torn", "checkpoint_ns": ""}}
+    saver.put(config, _checkpoint("0001", "kept"), {}, {})
+    saver.put(config, _checkpoint("0002", "lost"), {}, {})
+    saver.close()
+
+    # Crash mid-append: half the last record made it to the log, its index entry did not
+    _, log_path, idx_path = saver._paths("torn")
+    with open(log_path, "r+b") as f:
+        f.truncate(os.path.getsize(log_path) - 10)
+    with open(idx_path, "r+b") as f:
+        f.truncate(os.path.getsize(idx_path) - 20)
+
+    reopened = FileSaver(str(tmp_path))
+    latest = reopened.get_tuple({"configurable": {"thread_id": "torn"}})
+    assert latest.checkpoint["channel_values"] == {"value": "kept"}
+    assert reopened.stats()["recoveries"] == 1
+    reopened.put(config, _checkpoint("0003", "new"), {}, {})
+    assert reopened.get_tuple(config).checkpoint["id"] == "0003"
+
+
+def test_file_saver_rebuilds_a_missing_index(tmp_path):
+    saver = FileSaver(str(tmp_path))
+    config = {"configurable": {"thread_id": "idx", "checkpoint_ns": ""}}
+    next_config = saver.put(config, _checkpoint("0001"), {}, {})
+    saver.put_writes(next_config, [("a", 1), ("b", 2)], task_id="t")
+    saver.close()
+    os.remove(saver._paths("idx")[2])
+
+    loaded = FileSaver(str(tmp_path)).get_tuple(config)
+    assert [w[1:] for w in loaded.pending_writes] == [("a", 1), ("b", 2)]
+
+
+def test_file_saver_recovery_only_blocks_its_own_thread(tmp_path, monkeypatch):
+    from src.agent.checkpointers import file_saver
+
+    saver = FileSaver(str(tmp_path), durability="none")
+    slow = {"configurable": {"thread_id": "slow", "checkpoint_ns": ""}}
+    saver.put(slow, _checkpoint("0001", "slow"), {}, {})
+    saver.close()
+
+    reopened = FileSaver(str(tmp_path), durability="none")
+    recovering, resume = threading.Event(), threading.Event()
+    recover = file_saver._ThreadFiles.recover
+
+    def stalled_recover(files):
+        if files.log_path == reopened._paths("slow")[1]:
+            recovering.set()
+            resume.wait(5)
+        return recover(files)
+
+    monkeypatch.setattr(file_saver._ThreadFiles, "recover", stalled_recover)
+    results = []
+    openers = [threading.Thread(target=lambda: results.append(reopened.get_tuple(slow))) for _ in range(2)]
+    for t in openers:
+        t.start()
+    assert recovering.wait(5)
+
+    # Other threads open and write while "slow" is still recovering
+    other = {"configurable": {"thread_id": "other", "checkpoint_ns": ""}}
+    writer = threading.Thread(target=reopened.put, args=(other, _checkpoint("0001", "other"), {}, {}))
+    writer.start()
+    writer.join(1)
+    stalled, finished_early = writer.is_alive(), len(results)
+    resume.set()
+    assert not stalled and finished_early == 0
+    for t in openers + [writer]:
+        t.join()
+    assert [r.checkpoint["channel_values"] for r in results] == [{"value": "slow"}] * 2
+    assert reopened.get_tuple(other).checkpoint["id"] == "0001"
+    assert reopened.stats()["open_threads"] == 2
+
+
+def test_file_saver_compacts_old_checkpoints(tmp_path):
+    saver = FileSaver(str(tmp_path), max_history=2)
+    config = {"configurable": {"thread_id": "c", "checkpoint_ns": ""}}
+    for i in range(6):
+        next_config = saver.put(config, _checkpoint(f"{i:04}", "x" * 100), {}, {})
+        saver.put_writes(next_config, [("a", i)], task_id="t")
+
+    reclaimed = saver.compact("c")
+
+    assert reclaimed > 0
+    history = list(saver.list(config))
+    assert [h.checkpoint["id"] for h in history] == ["0005", "0004"]
+    assert history[0].pending_writes == [("t", "a", 5)]
+    saver.put(config, _checkpoint("0006"), {}, {})
+    assert saver.get_tuple(config).checkpoint["id"] == "0006"
+
+
+def test_file_saver_group_commit_shares_fsyncs(tmp_path):
+    saver = FileSaver(str(tmp_path))
+    config = saver.put({"configurable": {"thread_id": "g", "checkpoint_ns": ""}}, _checkpoint("0001"), {}, {})
+
+    async def parallel_tasks():
+        await asyncio.gather(*(saver.aput_writes(config, [("a", i)], task_id=f"t{i}") for i in range(20)))
+    asyncio.run(parallel_tasks())
+
+    stats = saver.stats()
+    assert stats["synced_records"] == 21
+    assert stats["fsyncs"] <= 21
+    assert len(saver.get_tuple(config).pending_writes) == 20
+
+
+def test_file_saver_cleanup_and_delete(tmp_path):
+    directory = tmp_path / "checkpoints"
+    saver = FileSaver(str(directory))
+    for thread_id in ("a", "b", "c"):
+        saver.put({"thread_id": thread_id}, {"counter": 1}, {})
+
+    saver.delete_thread("a")
+    assert saver.get({"thread_id": "a"}) is None
+    assert saver.get({"thread_id": "b"}) == {"counter": 1}
+    assert saver.cleanup(older_than=3600) == 0
+    assert saver.cleanup() == 2
+    assert not directory.exists()
+
+
+def test_sqlite_saver_round_trips_and_survives_restart(fake_model, tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = SqliteSaver(path, max_history=3)
+    agent = make_agent(fake_model, saver, [
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"message": "x"}, "id": "call_1"}]),
+        "first",
+    ])
+    agent.chat("one", "s1")
+    asyncio.run(agent.achat("two", "s1"))
+    saver.close()
+
+    restarted = make_agent(fake_model, SqliteSaver(path, max_history=3), ["again"])
+    result = restarted.chat("three", "s1")
+
+    assert [m.content for m in result["messages"]][-2:] == ["three", "again"]
+    history = list(restarted.checkpointer.list({"configurable": {"thread_id": "s1", "checkpoint_ns": ""}}))
+    assert len(history) == 3
+    assert [h.checkpoint["id"] for h in history] == sorted((h.checkpoint["id"] for h in history), reverse=True)
+
+
+def test_sqlite_saver_batches_concurrent_sessions_into_shared_commits(tmp_path):
+    saver = SqliteSaver(str(tmp_path / "checkpoints.db"))
+
+    async def sessions():
+        configs = await asyncio.gather(*(
+            saver.aput({"configurable": {"thread_id": f"b{i}", "checkpoint_ns": ""}}, _checkpoint("0001"), {}, {})
+            for i in range(50)
+        ))
+        await asyncio.gather(*(saver.aput_writes(c, [("a", 1), ("a", 2)], task_id="t") for c in configs))
+    asyncio.run(sessions())
+
+    stats = saver.stats()
+    assert stats["requests"] == 100 and stats["failed_requests"] == 0
+    assert stats["commits"] < 100 and stats["largest_batch"] > 1
+    loaded = saver.get_tuple({"configurable": {"thread_id": "b7"}})
+    assert [w[1:] for w in loaded.pending_writes] == [("a", 1), ("a", 2)]
+
+
+def test_sqlite_saver_first_write_wins_and_failures_stay_isolated(tmp_path):
+    saver = SqliteSaver(str(tmp_path / "checkpoints.db"))
+    config = saver.put({"configurable": {"thread_id": "w", "checkpoint_ns": ""}}, _checkpoint("0001"), {}, {})
+    saver.put_writes(config, [("a", "first")], task_id="t")
+    saver.put_writes(config, [("a", "retry")], task_id="t")
+
+    bad = saver._submit(lambda conn: conn.execute("INSERT INTO missing VALUES (1)"))
+    good = saver._submit(lambda conn: conn.execute("DELETE FROM writes WHERE task_id = 'none'"))
+    with pytest.raises(sqlite3.OperationalError):
+        bad.result()
+    good.result()
+
+    assert saver.get_tuple(config).pending_writes == [("t", "a", "first")]
+
+
+def test_sqlite_saver_delete_thread_and_plain_configs(tmp_path):
+    saver = SqliteSaver(str(tmp_path / "checkpoints.db"))
+    saver.put({"thread_id": "gone"}, {"counter": 1}, {})
+    assert saver.get({"thread_id": "gone"}) == {"counter": 1}
+
+    saver.delete_thread("gone")
+    assert saver.get({"thread_id": "gone"}) is None
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_sqlite_saver_fails_fast_once_closed_or_when_the_writer_dies(tmp_path, monkeypatch):
+    saver = SqliteSaver(str(tmp_path / "closed.db"))
+    saver.close()
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        saver.put({"thread_id": "late"}, {"counter": 1}, {})
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        saver.get({"thread_id": "late"})
+
+    dying = SqliteSaver(str(tmp_path / "dying.db"))
+    monkeypatch.setattr(dying, "_commit", lambda conn, batch: 1 / 0)
+    first = dying._submit(lambda conn: None)
+    with pytest.raises(sqlite3.ProgrammingError, match="stopped"):
+        first.result(timeout=5)
+    with pytest.raises(sqlite3.ProgrammingError):
+        dying.delete_thread("any")
+
+
+def test_create_checkpointer_selects_redis_when_url_set():
+    saver = create_checkpointer("redis://localhost:6379/0")
+    other = create_checkpointer("redis://localhost:6379/0")
+
+    assert isinstance(saver, RedisSaver)
+    assert saver.client.connection_pool is other.client.connection_pool
+    assert isinstance(create_checkpointer(None), BoundedMemorySaver)
+
+
+def test_create_checkpointer_selects_files_when_dir_set(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setenv("CHECKPOINT_FSYNC", "none")
+
+    saver = create_checkpointer(None)
+
+    assert isinstance(saver, FileSaver) and saver.durability == "none"
+    assert isinstance(create_checkpointer("redis://localhost:6379/0"), RedisSaver)
+
+
+def test_create_checkpointer_selects_sqlite_for_sqlite_urls(tmp_path):
+    saver = create_checkpointer(f"sqlite:///{tmp_path}/agent.db")
+
+    assert isinstance(saver, SqliteSaver) and saver.path == f"{tmp_path}/agent.db"
+    assert saver._writer_conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
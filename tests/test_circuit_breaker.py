@@ -0,0 +1,195 @@
+"""
+Tests for circuit breakers around the model client and tools
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from src.agent import metrics
+from src.agent.circuit_breaker import CircuitBreaker, CircuitOpenError, create_circuit_breaker
+from src.agent.core import LangGraphAgent
+from src.agent.modern import ModernLangGraphAgent
+from src.agent.retry import Retrier, is_retryable
+from src.agent.tool_execution import ToolExecutor, create_tool_node
+from tests.fakes import use_model
+from tests.test_retry import FlakyModel
+from tests.test_tool_execution import graph_for
+
+
+def fail(breaker, times, error=ConnectionError):
+    for _ in range(times):
+        with pytest.raises(error):
+            with breaker:
+                raise error()
+
+
+def test_opens_on_failure_rate_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3, failure_rate=0.5, window_size=10, reset_timeout=10)
+    for _ in range(4):
+        breaker.call(lambda: "ok")
+    fail(breaker, 3)
+    # 3 failures out of 7 calls is below the 50% rate
+    assert breaker.state == "CLOSED"
+    fail(breaker, 1)
+    assert breaker.state == "OPEN"
+
+    started = time.perf_counter()
+    with pytest.raises(CircuitOpenError, match="Circuit breaker is OPEN") as info:
+        breaker.call(lambda: time.sleep(1))
+    assert time.perf_counter() - started < 0.1
+    assert 9 < info.value.retry_after <= 10
+
+
+def test_half_open_trials_close_or_reopen_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05, success_threshold=2)
+    fail(breaker, 2)
+    time.sleep(0.06)
+    assert breaker.state == "HALF_OPEN"
+
+    fail(breaker, 1)
+    assert breaker.state == "OPEN"
+
+    time.sleep(0.06)
+    breaker.call(lambda: "ok")
+    assert breaker.state == "HALF_OPEN"
+    breaker.call(lambda: "ok")
+    assert breaker.state == "CLOSED"
+
+
+def test_half_open_admits_limited_trial_calls():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01, half_open_max_calls=1)
+    fail(breaker, 1)
+    time.sleep(0.02)
+
+    async def run():
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+        return await asyncio.gather(breaker.acall(slow), breaker.acall(slow), return_exceptions=True)
+
+    first, second = asyncio.run(run())
+    assert first == "ok"
+    assert isinstance(second, CircuitOpenError)
+
+
+def test_ignored_errors_do_not_trip_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, is_failure=is_retryable)
+    fail(breaker, 3, error=ValueError)
+    assert breaker.state == "CLOSED"
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_open_model_circuit_fails_fast(agent_cls):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, is_failure=is_retryable)
+    agent = agent_cls(retrier=Retrier(max_retries=5, base_delay=0), circuit_breaker=breaker)
+    model = FlakyModel(failures=100)
+    use_model(agent, model)
+
+    with pytest.raises(CircuitOpenError):
+        agent.chat("hi", f"down-{agent_cls.__name__}")
+    # Retries stop as soon as the circuit opens
+    assert model.calls == 2
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(agent.achat("hi", f"adown-{agent_cls.__name__}"))
+    assert model.calls == 2
+
+
+def test_open_model_circuit_can_answer_with_a_fallback(monkeypatch):
+    monkeypatch.setenv("LLM_FALLBACK_MESSAGE", "The assistant is temporarily unavailable.")
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    agent = LangGraphAgent(circuit_breaker=breaker)
+    use_model(agent, FlakyModel(failures=0))
+
+    assert agent.chat("hi", "fallback")["agent_response"] == "The assistant is temporarily unavailable."
+
+
+def test_open_tool_circuit_answers_with_an_error_message():
+    calls = []
+
+    def flaky_search(q: str) -> str:
+        """Search backend that is down."""
+        calls.append(q)
+        raise ConnectionError("backend down")
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, name="tool:flaky_search")
+    executor = ToolExecutor(circuit_breakers=lambda name: breaker)
+    graph = graph_for(create_tool_node([StructuredTool.from_function(flaky_search)], executor))
+    message = AIMessage(content="", tool_calls=[{"name": "flaky_search", "args": {"q": "x"}, "id": "1"}])
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(graph.ainvoke({"messages": [message]}))
+    result = asyncio.run(graph.ainvoke({"messages": [message]}))
+
+    assert len(calls) == 1
+    assert result["messages"][-1].status == "error"
+    assert "Circuit breaker is OPEN" in result["messages"][-1].content
+
+
+def test_tool_timeouts_count_as_failures():
+    def hangs(q: str) -> str:
+        """Never answers in time."""
+        time.sleep(0.2)
+        return q
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    executor = ToolExecutor(timeout=0.02, circuit_breakers=lambda name: breaker)
+    graph = graph_for(create_tool_node([StructuredTool.from_function(hangs)], executor))
+    message = AIMessage(content="", tool_calls=[{"name": "hangs", "args": {"q": "x"}, "id": "1"}])
+
+    asyncio.run(graph.ainvoke({"messages": [message]}))
+    assert breaker.state == "OPEN"
+
+
+def test_sync_tool_timeout_is_recorded_once():
+    def hangs(q: str) -> str:
+        """Never answers in time."""
+        time.sleep(0.2)
+        return q
+
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    executor = ToolExecutor(timeout=0.02, circuit_breakers=lambda name: breaker)
+    graph = graph_for(create_tool_node([StructuredTool.from_function(hangs)], executor))
+    message = AIMessage(content="", tool_calls=[{"name": "hangs", "args": {"q": "x"}, "id": "1"}])
+
+    graph.invoke({"messages": [message]})
+    # Let the abandoned call finish; its late outcome must not be recorded too
+    time.sleep(0.3)
+    assert list(breaker._window) == [True]
+
+
+def test_open_circuit_maps_to_503(monkeypatch):
+    from src.api import routes
+
+    async def down(message, session_id, deadline=None):
+        raise CircuitOpenError("llm", 2.5)
+
+    monkeypatch.setattr(routes.agent, "achat", down)
+
+    async def run():
+        transport = httpx.ASGITransport(app=routes.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat", json={"message": "hi", "session_id": "x"})
+
+    response = asyncio.run(run())
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+
+
+@pytest.mark.skipif(not metrics.ENABLED, reason="prometheus_client not installed")
+def test_state_is_exported():
+    breaker = CircuitBreaker(failure_threshold=1, name="exported")
+    breaker.record_failure()
+    assert metrics.registry.get_sample_value("circuit_breaker_state", {"name": "exported"}) == 2
+
+
+def test_create_circuit_breaker_from_env(monkeypatch):
+    monkeypatch.setenv("CIRCUIT_FAILURE_THRESHOLD", "7")
+    assert create_circuit_breaker("x").failure_threshold == 7
+    monkeypatch.setenv("CIRCUIT_BREAKER_ENABLED", "false")
+    assert create_circuit_breaker("x") is None
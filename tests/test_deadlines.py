@@ -0,0 +1,234 @@
+"""
+Tests for per-request deadlines, step caps and cancellation of agent turns
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+from src.agent import deadlines
+from src.agent.core import LangGraphAgent
+from src.agent.deadlines import DeadlineExceeded, deadline_after
+from src.agent.modern import ModernLangGraphAgent
+from tests.fakes import FakeChatModel, use_model
+
+
+def slow_tool(latency):
+    def lookup(q: str) -> str:
+        """Slow lookup."""
+        time.sleep(latency)
+        return q
+
+    async def alookup(q: str) -> str:
+        await asyncio.sleep(latency)
+        return q
+
+    return StructuredTool.from_function(lookup, coroutine=alookup, name="lookup")
+
+
+def tool_call(i=0):
+    return AIMessage(content="Let me look that up.",
+                     tool_calls=[{"name": "lookup", "args": {"q": "x"}, "id": f"call-{i}"}])
+
+
+def agent_with(agent_cls, model, tools=None):
+    agent = agent_cls()
+    if tools is not None:
+        agent.tools = tools
+    use_model(agent, model)
+    return agent
+
+
+def assert_valid_history(messages):
+    """Every tool call is answered, so the next turn can be sent to the model."""
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    calls = {c["id"] for m in messages if isinstance(m, AIMessage) for c in m.tool_calls}
+    assert calls <= answered
+    assert isinstance(messages[-1], AIMessage) and not messages[-1].tool_calls
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_slow_model_call_is_cancelled_at_the_deadline(agent_cls):
+    agent = agent_with(agent_cls, FakeChatModel(latency=1.0))
+
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(agent.achat("hi", "slow-model", deadline=deadline_after(0.1)))
+    assert time.perf_counter() - started < 0.5
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_interrupted_turn_returns_partial_result_and_leaves_a_valid_history(agent_cls):
+    model = FakeChatModel(replies=[tool_call(), "next turn"])
+    agent = agent_with(agent_cls, model, [slow_tool(1.0)])
+    session = f"partial-{agent_cls.__name__}"
+
+    async def run():
+        started = time.perf_counter()
+        partial = await agent.achat("look it up", session, deadline=deadline_after(0.2))
+        elapsed = time.perf_counter() - started
+        return partial, elapsed, await agent.achat("again", session)
+
+    partial, elapsed, after = asyncio.run(run())
+
+    assert elapsed < 0.6
+    assert partial["metadata"]["partial"] is True
+    assert partial["metadata"]["stop_reason"] == "deadline"
+    assert partial["agent_response"].startswith("Let me look that up.")
+    assert after["agent_response"] == "next turn"
+    assert_valid_history(partial["messages"])
+
+
+def test_tool_timeout_is_shortened_to_the_time_left(monkeypatch):
+    from src.agent.tool_execution import ToolExecutor
+
+    seen = []
+    original = ToolExecutor._time_budget
+
+    def spy(self, request):
+        budget = original(self, request)
+        seen.append(budget)
+        return budget
+
+    monkeypatch.setattr(ToolExecutor, "_time_budget", spy)
+    agent = agent_with(LangGraphAgent, FakeChatModel(replies=[tool_call(), "done"]), [slow_tool(0)])
+
+    asyncio.run(agent.achat("hi", "budget", deadline=deadline_after(5)))
+
+    timeout, deadline, capped = seen[0]
+    assert capped and 0 < timeout <= 5
+
+
+def test_step_cap_stops_a_looping_agent(monkeypatch):
+    monkeypatch.setattr(deadlines, "MAX_STEPS", 4)
+    model = FakeChatModel(replies=[tool_call(i) for i in range(10)])
+    agent = agent_with(LangGraphAgent, model, [slow_tool(0)])
+
+    result = agent.chat("loop", "looping")
+
+    assert result["metadata"]["stop_reason"] == "step_limit"
+    assert len(model.prompts) <= 3
+    assert_valid_history(result["messages"])
+
+
+def test_sync_chat_refuses_model_calls_past_the_deadline():
+    model = FakeChatModel()
+    agent = agent_with(LangGraphAgent, model)
+
+    with pytest.raises(DeadlineExceeded):
+        agent.chat("hi", "expired", deadline=time.monotonic() - 1)
+    assert model.prompts == []
+
+
+def test_stream_ends_with_deadline_exceeded():
+    agent = agent_with(LangGraphAgent, FakeChatModel(replies=[tool_call(), "late"]), [slow_tool(1.0)])
+
+    async def run():
+        updates = []
+        with pytest.raises(DeadlineExceeded):
+            async for update in agent.astream_chat("hi", "stream-deadline", deadline=deadline_after(0.2)):
+                updates.append(update)
+        return updates, await agent.graph.aget_state({"configurable": {"thread_id": "stream-deadline"}})
+
+    updates, state = asyncio.run(run())
+    assert "agent" in updates[0]
+    assert_valid_history(state.values["messages"])
+
+
+def post(app, headers):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat", json={"message": "hi", "session_id": "timeout"}, headers=headers)
+    return asyncio.run(run())
+
+
+def test_request_timeout_header_maps_to_504(monkeypatch):
+    from src.api import routes
+
+    use_model(routes.agent, FakeChatModel(latency=1.0))
+    started = time.perf_counter()
+    response = post(routes.app, {"X-Request-Timeout": "0.1"})
+
+    assert response.status_code == 504
+    assert time.perf_counter() - started < 0.6
+
+
+def test_header_can_only_shorten_the_server_timeout(monkeypatch):
+    from src.api import routes
+
+    monkeypatch.setattr(routes, "REQUEST_TIMEOUT_SECONDS", 10.0)
+    assert routes.request_deadline(600) - time.monotonic() <= 10
+    assert routes.request_deadline(1) - time.monotonic() <= 1
+    monkeypatch.setattr(routes, "REQUEST_TIMEOUT_SECONDS", 0.0)
+    assert routes.request_deadline(None) is None
+
+
+def test_client_disconnect_cancels_the_turn(monkeypatch):
+    from src.api import routes
+
+    monkeypatch.setattr(routes, "DISCONNECT_POLL_SECONDS", 0.01)
+    cancelled = asyncio.Event()
+
+    class GoneRequest:
+        async def is_disconnected(self):
+            return True
+
+    async def turn():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cancelled.set()
+
+    async def run():
+        with pytest.raises(HTTPException) as info:
+            await routes.cancel_on_disconnect(GoneRequest(), turn())
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return info.value.status_code
+
+    assert asyncio.run(run()) == 499
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/modern"])
+def test_client_disconnect_maps_to_499_not_500(monkeypatch, path):
+    from src.api import routes
+
+    async def gone(http_request, work):
+        work.close()
+        raise HTTPException(status_code=499, detail="Client closed the request")
+
+    monkeypatch.setattr(routes, "cancel_on_disconnect", gone)
+
+    async def run():
+        transport = httpx.ASGITransport(app=routes.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json={"message": "hi", "session_id": "gone"})
+
+    response = asyncio.run(run())
+    assert response.status_code == 499
+    assert response.json()["detail"] == "Client closed the request"
+
+
+def test_batch_items_share_the_request_deadline():
+    from src.api import routes
+
+    use_model(routes.agent, FakeChatModel(latency=1.0))
+
+    async def run():
+        transport = httpx.ASGITransport(app=routes.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"items": [{"message": "a"}, {"message": "b"}]}
+            return await client.post("/chat/batch", json=body, headers={"X-Request-Timeout": "0.1"})
+
+    started = time.perf_counter()
+    response = asyncio.run(run())
+    records = [r for r in map(json.loads, response.text.splitlines()) if "index" in r]
+
+    assert time.perf_counter() - started < 0.8
+    assert [r["success"] for r in records] == [False, False]
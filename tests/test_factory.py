@@ -0,0 +1,110 @@
+"""
+Tests for the tool registry, shared LLM client and agent factory
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.tools import tool
+
+from src.agent import tools as tool_registry
+from src.agent.core import LangGraphAgent
+from src.agent.factory import AgentFactory, VariantDisabledError
+from src.agent.llm import get_llm
+from src.agent.modern import ModernLangGraphAgent
+
+
+def test_registry_returns_default_tools_in_order():
+    assert [t.name for t in tool_registry.get_tools()] == ["get_current_time", "calculate", "echo"]
+    assert tool_registry.get_tools(["echo"]) == [tool_registry.echo]
+    with pytest.raises(KeyError, match="nope"):
+        tool_registry.get_tools(["echo", "nope"])
+
+
+def test_registry_rejects_conflicting_names():
+    @tool
+    def echo(message: str) -> str:
+        """Another echo."""
+        return message
+
+    with pytest.raises(ValueError, match="already registered"):
+        tool_registry.register_tool(echo)
+
+
+def test_shared_llm_client_is_pooled():
+    llm = get_llm()
+    assert get_llm() is llm
+    assert isinstance(llm.http_async_client, httpx.AsyncClient)
+
+
+def test_factory_builds_lazily_and_caches():
+    factory = AgentFactory(enabled=["custom", "modern"])
+    assert factory.built() == ()
+
+    custom = factory.get("custom")
+    assert isinstance(custom, LangGraphAgent)
+    assert factory.get("custom") is custom
+    assert factory.built() == ("custom",)
+
+    modern = factory.get("modern")
+    assert isinstance(modern, ModernLangGraphAgent)
+    # Variants share the LLM client and the tool objects
+    assert modern.llm is custom.llm
+    assert modern.tools == custom.tools
+
+
+def test_factory_refuses_disabled_and_unknown_variants():
+    factory = AgentFactory(enabled=["custom"])
+    with pytest.raises(VariantDisabledError):
+        factory.get("modern")
+    with pytest.raises(ValueError, match="bogus"):
+        AgentFactory(enabled=["bogus"])
+
+
+def test_enabled_variants_from_env(monkeypatch):
+    monkeypatch.setenv("AGENT_VARIANTS", "modern")
+    assert AgentFactory().enabled == ("modern",)
+
+
+def test_disabled_variant_routes_return_404(monkeypatch, fake_model):
+    from src.api import routes
+
+    factory = AgentFactory(enabled=["custom"])
+    monkeypatch.setattr(routes, "agents", factory)
+
+    async def run():
+        transport = httpx.ASGITransport(app=routes.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (
+                await client.post("/chat/modern", json={"message": "hi"}),
+                await client.post("/chat/stream/modern", json={"message": "hi"}),
+            )
+
+    chat, stream = asyncio.run(run())
+
+    assert chat.status_code == 404 and stream.status_code == 404
+    assert factory.built() == ()
+
+
+def test_failed_warm_up_is_logged_and_reported(monkeypatch, caplog):
+    from src.api import routes
+
+    def broken():
+        raise RuntimeError("no model")
+
+    monkeypatch.setattr(routes.agents, "warm_up", broken)
+    monkeypatch.setattr(routes, "warm_up", None)
+
+    async def run():
+        async with routes.lifespan(routes.app):
+            await asyncio.wait([routes.warm_up])
+            await asyncio.sleep(0)
+            transport = httpx.ASGITransport(app=routes.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get("/health")
+
+    response = asyncio.run(run())
+
+    assert response.json()["status"] == "degraded"
+    assert "Building the agents at startup failed" in caplog.text
@@ -0,0 +1,98 @@
+"""
+Tests for the scripted fake model and LLM provider selection
+"""
+
+import asyncio
+import random
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent import llm as llm_module
+from src.agent.core import LangGraphAgent
+from src.agent.fake_llm import LatencyDistribution, ScriptedChatModel, create_fake_llm
+from src.agent.modern import ModernLangGraphAgent
+
+
+@pytest.mark.parametrize("spec, kind, params", [
+    ("0.2", "fixed", (0.2,)),
+    (0.1, "fixed", (0.1,)),
+    ("uniform:0.1,0.3", "uniform", (0.1, 0.3)),
+    ("lognormal: 0.05, 0.5", "lognormal", (0.05, 0.5)),
+    ("exponential:0.2", "exponential", (0.2,)),
+])
+def test_latency_specs_parse(spec, kind, params):
+    latency = LatencyDistribution.parse(spec)
+    assert (latency.kind, latency.params) == (kind, params)
+
+
+@pytest.mark.parametrize("spec", ["gamma:1,2", "uniform:0.1", "normal:a,b"])
+def test_bad_latency_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse(spec)
+
+
+def test_latency_samples_stay_in_range():
+    rng = random.Random(0)
+    uniform = LatencyDistribution.parse("uniform:0.1,0.3")
+    normal = LatencyDistribution.parse("normal:0.0,1.0")
+    assert all(0.1 <= uniform.sample(rng) <= 0.3 for _ in range(200))
+    assert all(normal.sample(rng) >= 0 for _ in range(200))
+
+
+def test_same_seed_and_conversation_give_the_same_delay_and_reply():
+    messages = [HumanMessage(content="hello")]
+    a = ScriptedChatModel(latency="lognormal:0.05,0.5", tool_rate=0.5, seed=7)
+    b = ScriptedChatModel(latency="lognormal:0.05,0.5", tool_rate=0.5, seed=7)
+    (delay_a, reply_a), (delay_b, reply_b) = a._plan(messages), b._plan(messages)
+    assert delay_a == delay_b
+    assert reply_a.tool_calls == reply_b.tool_calls
+
+
+def test_scripted_replies_cycle():
+    tool_call = {"name": "echo", "args": {"message": "x"}}
+    model = ScriptedChatModel(replies=["one", {"content": "", "tool_calls": [tool_call]}])
+    first, second, third = (model.invoke("hi") for _ in range(3))
+    assert first.content == "one"
+    assert second.tool_calls[0]["name"] == "echo" and second.tool_calls[0]["id"]
+    assert third.content == "one"
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_agents_run_tool_turns_on_the_fake_model(agent_cls):
+    agent = agent_cls(llm=ScriptedChatModel(tool_rate=1.0))
+    result = asyncio.run(agent.achat("ping", "fake-tools"))
+    assert result["tools_used"] == ["echo"]
+    assert result["agent_response"] == "The echo tool returned: Echo: ping"
+
+    plain = agent_cls(llm=ScriptedChatModel()).chat("ping", "fake-plain")
+    assert plain["tools_used"] == [] and plain["agent_response"] == "You said: ping"
+
+
+def test_streamed_tokens_match_the_reply():
+    model = ScriptedChatModel(replies=[AIMessage(content="a b c")])
+    assert "".join(chunk.content for chunk in model.stream("hi")) == "a b c"
+
+
+def test_provider_is_chosen_by_env(monkeypatch):
+    monkeypatch.setattr(llm_module, "_llm", None)
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("FAKE_LLM_LATENCY", "uniform:0,0.01")
+    monkeypatch.setenv("FAKE_LLM_TOOL_RATE", "0.25")
+    model = llm_module.get_llm()
+    assert isinstance(model, ScriptedChatModel)
+    assert model.tool_rate == 0.25 and repr(model._distribution) == "uniform:0,0.01"
+    assert llm_module.get_llm() is model
+
+    monkeypatch.setattr(llm_module, "_llm", None)
+    monkeypatch.setenv("LLM_PROVIDER", "nope")
+    with pytest.raises(ValueError, match="Unknown LLM_PROVIDER"):
+        llm_module.get_llm()
+
+
+def test_registered_providers_are_used(monkeypatch):
+    monkeypatch.setattr(llm_module, "_llm", None)
+    monkeypatch.setattr(llm_module, "_PROVIDERS", dict(llm_module._PROVIDERS))
+    llm_module.register_provider("scripted", lambda: create_fake_llm(replies=["hi"]))
+    monkeypatch.setenv("LLM_PROVIDER", "scripted")
+    assert llm_module.get_llm().invoke("x").content == "hi"
@@ -0,0 +1,156 @@
+"""
+Tests for conversation windowing and rolling summaries
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+from src.agent.core import LangGraphAgent
+from src.agent.history import ConversationWindow, create_context_window
+from src.agent.modern import ModernLangGraphAgent
+from tests.fakes import use_model
+
+
+def one_token_each(messages):
+    return len(messages)
+
+
+def conversation(turns):
+    messages = [SystemMessage(content="be brief", id="sys")]
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"q{i}", id=f"h{i}"))
+        messages.append(AIMessage(content=f"a{i}", id=f"a{i}"))
+    return messages
+
+
+def test_window_keeps_system_and_recent_turns():
+    window = ConversationWindow(max_tokens=6, token_counter=one_token_each)
+    messages = conversation(10) + [HumanMessage(content="latest", id="latest")]
+
+    update = window.prepare({"messages": messages})
+
+    sent = update["llm_input_messages"]
+    assert sent[0].id == "sys"
+    assert [m.id for m in sent[1:]] == ["h8", "a8", "h9", "a9", "latest"]
+    assert "summary" not in update
+
+
+def test_window_never_starts_on_a_tool_result():
+    window = ConversationWindow(max_tokens=3, token_counter=one_token_each)
+    messages = [
+        HumanMessage(content="time?", id="h0"),
+        AIMessage(content="", id="a0", tool_calls=[{"name": "get_current_time", "args": {}, "id": "c1"}]),
+        ToolMessage(content="noon", tool_call_id="c1", id="t0"),
+        AIMessage(content="It is noon", id="a1"),
+        HumanMessage(content="thanks", id="h1"),
+    ]
+
+    sent = window.prepare({"messages": messages})["llm_input_messages"]
+
+    assert [m.id for m in sent] == ["h1"]
+
+
+def test_latest_turn_is_sent_even_when_over_budget():
+    window = ConversationWindow(max_tokens=1, token_counter=lambda ms: 100 * len(ms))
+    messages = conversation(3) + [HumanMessage(content="latest", id="latest")]
+
+    sent = window.prepare({"messages": messages})["llm_input_messages"]
+
+    assert [m.id for m in sent] == ["sys", "latest"]
+
+
+def test_summary_is_cached_until_more_history_falls_out(fake_model):
+    summarizer = fake_model(["first summary", "second summary"])
+    window = ConversationWindow(max_tokens=8, summarizer=summarizer, token_counter=one_token_each)
+    state = {"messages": conversation(10) + [HumanMessage(content="next", id="next")]}
+
+    update = window.prepare(state)
+    assert update["summary"] == "first summary"
+    sent = update["llm_input_messages"]
+    assert sent[1].content.endswith("first summary")
+    # Compaction leaves headroom below the budget
+    assert len(sent) < 8
+    state.update(summary=update["summary"], summary_upto=update["summary_upto"])
+
+    # One more exchange fits in the headroom, so no new summary call
+    state["messages"] += [AIMessage(content="ans", id="ans"), HumanMessage(content="more", id="more")]
+    update = window.prepare(state)
+    assert "summary" not in update
+    assert len(summarizer.prompts) == 1
+
+
+def test_prune_removes_summarized_messages(fake_model):
+    window = ConversationWindow(
+        max_tokens=8, summarizer=fake_model(["s"]), prune_messages=True, token_counter=one_token_each
+    )
+    messages = conversation(10) + [HumanMessage(content="next", id="next")]
+
+    update = window.prepare({"messages": messages})
+
+    removed = [m.id for m in update["messages"]]
+    assert all(isinstance(m, RemoveMessage) for m in update["messages"])
+    assert "sys" not in removed and "h0" in removed and "next" not in removed
+    assert update["summary_upto"] == 1
+
+
+def test_async_prepare_matches_sync(fake_model):
+    messages = conversation(10) + [HumanMessage(content="next", id="next")]
+    sync = ConversationWindow(max_tokens=8, summarizer=fake_model(["s"]), token_counter=one_token_each)
+    async_ = ConversationWindow(max_tokens=8, summarizer=fake_model(["s"]), token_counter=one_token_each)
+
+    expected = sync.prepare({"messages": messages})
+    actual = asyncio.run(async_.aprepare({"messages": messages}))
+
+    assert [m.id for m in actual["llm_input_messages"][2:]] == [m.id for m in expected["llm_input_messages"][2:]]
+    assert actual["summary_upto"] == expected["summary_upto"]
+
+
+def test_create_context_window_reads_env(monkeypatch, fake_model):
+    # Windowing is opt-in: without a budget the full history is sent
+    monkeypatch.delenv("CONTEXT_MAX_TOKENS", raising=False)
+    assert create_context_window() is None
+    monkeypatch.setenv("CONTEXT_MAX_TOKENS", "0")
+    assert create_context_window() is None
+
+    monkeypatch.setenv("CONTEXT_MAX_TOKENS", "500")
+    monkeypatch.setenv("CONTEXT_SUMMARIZE", "true")
+    window = create_context_window(fake_model())
+    assert window.max_tokens == 500
+    assert window.summarizer is not None
+    assert window.prune_messages is False
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_agent_prompt_stays_bounded_over_long_session(agent_cls, fake_model):
+    window = ConversationWindow(max_tokens=6, token_counter=one_token_each)
+    agent = agent_cls(context_window=window)
+    model = fake_model([f"reply {i}" for i in range(30)])
+    use_model(agent, model)
+
+    for i in range(30):
+        result = agent.chat(f"turn {i}", "long")
+
+    assert result["agent_response"] == "reply 29"
+    # Full history is still checkpointed, only the prompt is windowed
+    assert len(result["messages"]) == 60
+    assert len(model.prompts[-1]) <= 6
+    assert model.prompts[-1][-1].content == "turn 29"
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_agent_prunes_checkpointed_history(agent_cls, fake_model):
+    summarizer = fake_model([f"summary {i}" for i in range(30)])
+    window = ConversationWindow(
+        max_tokens=8, summarizer=summarizer, prune_messages=True, token_counter=one_token_each
+    )
+    agent = agent_cls(context_window=window)
+    use_model(agent, fake_model([f"reply {i}" for i in range(30)]))
+
+    for i in range(30):
+        result = asyncio.run(agent.achat(f"turn {i}", "pruned"))
+
+    assert result["agent_response"] == "reply 29"
+    assert len(result["messages"]) <= 8
+    assert summarizer.prompts
@@ -0,0 +1,140 @@
+"""
+Tests for single-flight coalescing of duplicate chat requests
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.idempotency import IdempotencyConflict, SingleFlight
+from tests.fakes import use_model
+
+
+@pytest.fixture
+def routes(monkeypatch):
+    from src.api import routes
+
+    monkeypatch.setattr(routes, "single_flight", SingleFlight(ttl_seconds=60))
+    return routes
+
+
+def send(app, *requests):
+    """Send ``(path, body, headers)`` requests concurrently, then any trailing ones in order."""
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            concurrent, later = requests[0], requests[1:]
+            first = await asyncio.gather(*(client.post(p, json=b, headers=h) for p, b, h in concurrent))
+            return list(first) + [await client.post(p, json=b, headers=h) for p, b, h in later]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path,attr", [("/chat", "agent"), ("/chat/modern", "modern_agent")])
+def test_duplicate_requests_share_one_agent_run(routes, fake_model, path, attr):
+    model = fake_model(["only once", "second run"], latency=0.1)
+    use_model(getattr(routes, attr), model)
+    body, headers = {"message": "hi", "session_id": "dup"}, {"Idempotency-Key": "abc"}
+
+    responses = send(routes.app, [(path, body, headers)] * 3, (path, body, headers))
+
+    assert len(model.prompts) == 1
+    assert {r.json()["response"] for r in responses} == {"only once"}
+    assert [r.headers.get("idempotent-replayed") for r in responses].count("true") == 3
+
+
+def test_requests_without_a_key_are_not_coalesced(routes, fake_model):
+    model = fake_model(["a", "b"], latency=0.05)
+    use_model(routes.agent, model)
+    body = {"message": "hi", "session_id": "plain"}
+
+    send(routes.app, [("/chat", body, {})] * 2)
+
+    assert len(model.prompts) == 2
+
+
+def test_key_reused_with_a_different_payload_is_rejected(routes, fake_model):
+    use_model(routes.agent, fake_model(["a"]))
+    headers = {"Idempotency-Key": "reused"}
+
+    first, second = send(routes.app, [("/chat", {"message": "hi", "session_id": "k"}, headers)],
+                         ("/chat", {"message": "bye", "session_id": "k"}, headers))
+
+    assert first.status_code == 200
+    assert second.status_code == 422
+
+
+def test_auto_key_coalesces_same_session_and_message(routes, fake_model, monkeypatch):
+    monkeypatch.setattr(routes, "single_flight", SingleFlight(auto_key=True))
+    model = fake_model(["a", "b"], latency=0.05)
+    use_model(routes.agent, model)
+
+    send(routes.app, [("/chat", {"message": "hi", "session_id": "auto"}, {})] * 2)
+
+    assert len(model.prompts) == 1
+
+
+def test_duplicate_streams_share_one_event_stream(routes, fake_model):
+    model = fake_model(["streamed once", "never"], latency=0.1)
+    use_model(routes.agent, model)
+    request = ("/chat/stream", {"message": "hi", "session_id": "sse"}, {"Idempotency-Key": "s1"})
+
+    first, second, replay = send(routes.app, [request] * 2, request)
+
+    assert len(model.prompts) == 1
+    assert first.text == second.text == replay.text
+    assert "streamed" in first.text
+    assert replay.headers["idempotent-replayed"] == "true"
+
+
+def test_failures_are_not_cached():
+    flights = SingleFlight()
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await flights.run("k", "f", flaky)
+        return await flights.run("k", "f", flaky)
+
+    assert asyncio.run(run()) == ("ok", False)
+    assert len(calls) == 2
+
+
+def test_stream_is_cancelled_when_the_last_subscriber_leaves():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def events():
+        try:
+            yield 1
+            await asyncio.sleep(10)
+            yield 2
+        finally:
+            cancelled.set()
+
+    async def run():
+        subscriber = flights.stream("k", "f", events)
+        assert await subscriber.__anext__() == 1
+        await subscriber.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return len(flights)
+
+    assert asyncio.run(run()) == 0
+
+
+def test_conflict_is_detected_before_attaching():
+    flights = SingleFlight()
+
+    async def run():
+        await flights.run("k", "one", lambda: asyncio.sleep(0, "done"))
+        with pytest.raises(IdempotencyConflict):
+            flights.attached("k", "two")
+        return flights.attached("k", "one")
+
+    assert asyncio.run(run()) is True
@@ -0,0 +1,161 @@
+"""
+Tests for the LLM response cache
+"""
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.agent import metrics
+from src.agent.core import LangGraphAgent
+from src.agent.llm_cache import (
+    LLMResponseCache,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    create_llm_cache,
+    normalize_prompt,
+)
+from src.agent.modern import ModernLangGraphAgent
+from tests.fakes import FakeChatModel, FakeRedis, use_model
+
+
+def prompt(*messages):
+    return dumps(list(messages))
+
+
+def generations(text):
+    return [ChatGeneration(message=AIMessage(content=text, id="run-1",
+                                             usage_metadata={"input_tokens": 5, "output_tokens": 1, "total_tokens": 6}))]
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_repeated_prompt_is_served_from_cache(agent_cls):
+    cache = LLMResponseCache()
+    model = FakeChatModel(replies=["pong", "should not be used"], cache=cache)
+    agent = agent_cls()
+    use_model(agent, model)
+
+    first = agent.chat("ping", "probe-1")
+    second = asyncio.run(agent.achat("  ping ", "probe-2"))
+
+    assert first["agent_response"] == second["agent_response"] == "pong"
+    assert len(model.prompts) == 1
+    assert cache.stats == {"hits": 1, "semantic_hits": 0, "misses": 1}
+    # The cached reply is stored as a fresh message
+    assert second["messages"][-1].id != first["messages"][-1].id
+
+
+def test_cached_reply_appends_within_the_same_session():
+    model = FakeChatModel(replies=["pong", "pong again"], cache=LLMResponseCache())
+    agent = LangGraphAgent()
+    use_model(agent, model)
+
+    agent.chat("ping", "same")
+    result = agent.chat("ping", "same")
+
+    # Different history, so the second turn is a miss and both replies are kept
+    assert [m.content for m in result["messages"]] == ["ping", "pong", "ping", "pong again"]
+
+
+def test_key_ignores_ids_and_whitespace_but_not_content():
+    a = prompt(SystemMessage(content="be brief", id="1"), HumanMessage(content="hello  world", id="2"))
+    b = prompt(SystemMessage(content="be brief", id="x"), HumanMessage(content=" hello world ", id="y"))
+    c = prompt(SystemMessage(content="be brief"), HumanMessage(content="hello there"))
+
+    assert normalize_prompt(a) == normalize_prompt(b)
+    assert normalize_prompt(a) != normalize_prompt(c)
+
+
+def test_bound_tools_are_part_of_the_key():
+    cache = LLMResponseCache()
+    p = prompt(HumanMessage(content="what time is it"))
+    cache.update(p, "model---[('tools', ['get_current_time'])]", generations("noon"))
+
+    assert cache.lookup(p, "model---[('tools', ['get_current_time'])]")[0].message.content == "noon"
+    assert cache.lookup(p, "model---[('tools', [])]") is None
+
+
+def test_hits_drop_ids_and_usage():
+    cache = LLMResponseCache()
+    p = prompt(HumanMessage(content="hi"))
+    cache.update(p, "m", generations("hello"))
+
+    message = cache.lookup(p, "m")[0].message
+    assert message.id is None
+    assert message.usage_metadata is None
+
+
+def test_semantic_mode_matches_rephrased_question_in_same_context():
+    cache = LLMResponseCache(mode="semantic", similarity_threshold=0.8)
+    system = SystemMessage(content="You are a geography bot")
+    cache.update(prompt(system, HumanMessage(content="What is the capital of France?")), "m", generations("Paris"))
+
+    hit = cache.lookup(prompt(system, HumanMessage(content="what is the capital of france")), "m")
+    assert hit[0].message.content == "Paris"
+    assert cache.lookup(prompt(system, HumanMessage(content="How tall is Mont Blanc?")), "m") is None
+    other_context = SystemMessage(content="You are a cooking bot")
+    assert cache.lookup(prompt(other_context, HumanMessage(content="What is the capital of France?")), "m") is None
+    assert cache.stats == {"hits": 0, "semantic_hits": 1, "misses": 2}
+
+
+def test_memory_backend_lru_and_ttl():
+    backend = MemoryCacheBackend(max_entries=2, ttl_seconds=None)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("b") is None and backend.get("a") == 1 and len(backend) == 2
+
+    expiring = MemoryCacheBackend(ttl_seconds=0.05)
+    expiring.set("a", 1)
+    time.sleep(0.1)
+    assert expiring.get("a") is None
+
+
+def test_redis_backend_round_trips_generations():
+    client = FakeRedis()
+    cache = LLMResponseCache(RedisCacheBackend(client, ttl_seconds=60))
+    p = prompt(HumanMessage(content="hi"))
+
+    cache.update(p, "m", generations("hello"))
+    # A second process sharing the same Redis sees the entry
+    other = LLMResponseCache(RedisCacheBackend(client, ttl_seconds=60))
+    hit = asyncio.run(other.alookup(p, "m"))
+
+    assert hit[0].message.content == "hello"
+    assert list(client.expiry.values()) == [60]
+
+
+@pytest.mark.skipif(not metrics.ENABLED, reason="prometheus_client not installed")
+def test_hits_and_misses_are_exported():
+    def count(result):
+        return metrics.registry.get_sample_value("llm_cache_requests_total", {"result": result}) or 0.0
+
+    before = count("hit"), count("miss")
+    cache = LLMResponseCache()
+    p = prompt(HumanMessage(content="hi"))
+    cache.lookup(p, "m")
+    cache.update(p, "m", generations("hello"))
+    cache.lookup(p, "m")
+
+    assert (count("hit"), count("miss")) == (before[0] + 1, before[1] + 1)
+
+
+def test_create_llm_cache_from_env(monkeypatch):
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    assert create_llm_cache() is None
+
+    monkeypatch.setenv("LLM_CACHE", "semantic")
+    monkeypatch.setenv("LLM_CACHE_MAX_ENTRIES", "10")
+    cache = create_llm_cache()
+    assert cache.mode == "semantic"
+    assert cache.backend.max_entries == 10
+
+    monkeypatch.setenv("LLM_CACHE_BACKEND", "redis")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    with pytest.raises(ValueError, match="REDIS_URL"):
+        create_llm_cache()
@@ -0,0 +1,121 @@
+"""
+Tests for the Prometheus metrics subsystem
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.agent import metrics
+from src.agent.checkpointers import BoundedMemorySaver
+from src.agent.core import LangGraphAgent
+from tests.fakes import use_model
+
+pytestmark = pytest.mark.skipif(not metrics.ENABLED, reason="prometheus_client not installed")
+
+
+def sample(name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0.0
+
+
+def scrape(app, *requests):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for path, body in requests:
+                response = await client.post(path, json=body)
+                response.raise_for_status()
+            return await client.get("/metrics")
+    return asyncio.run(run())
+
+
+def test_metrics_endpoint_reports_routes_nodes_llm_and_tools(fake_model):
+    from src.api import routes
+
+    use_model(routes.agent, fake_model([
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"message": "x"}, "id": "call_1"}],
+                  usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15}),
+        "done",
+    ]))
+    before = {
+        "agent": sample("graph_node_duration_seconds_count", node="agent"),
+        "tools": sample("graph_node_duration_seconds_count", node="tools"),
+        "echo": sample("tool_duration_seconds_count", tool="echo"),
+        "tokens": sample("llm_tokens_total", model="unknown", type="input"),
+        "route": sample("http_request_duration_seconds_count", route="/chat", method="POST", status="200"),
+    }
+
+    response = scrape(routes.app, ("/chat", {"message": "echo x", "session_id": "metrics-1"}))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "graph_node_duration_seconds_bucket" in response.text
+    assert sample("graph_node_duration_seconds_count", node="agent") == before["agent"] + 2
+    assert sample("graph_node_duration_seconds_count", node="tools") == before["tools"] + 1
+    assert sample("tool_duration_seconds_count", tool="echo") == before["echo"] + 1
+    assert sample("llm_tokens_total", model="unknown", type="input") == before["tokens"] + 12
+    assert sample("http_request_duration_seconds_count", route="/chat", method="POST", status="200") == before["route"] + 1
+    assert sample(
+        "checkpointer_operation_duration_seconds_count", backend="BoundedMemorySaver", operation="put"
+    ) > 0
+
+
+def test_active_stream_gauge_returns_to_zero(fake_model):
+    from src.api import routes
+
+    use_model(routes.agent, fake_model(["streamed reply"]))
+
+    scrape(routes.app, ("/chat/stream", {"message": "hi", "session_id": "metrics-2"}))
+
+    assert sample("http_request_duration_seconds_count", route="/chat/stream", method="POST", status="200") > 0
+    assert sample("active_streams", route="/chat/stream") == 0
+
+
+def test_tool_errors_are_counted():
+    handler = metrics.MetricsCallbackHandler()
+    before = sample("tool_errors_total", tool="flaky")
+
+    handler.on_tool_start({"name": "flaky"}, "", run_id="r1")
+    handler.on_tool_error(RuntimeError("boom"), run_id="r1")
+
+    assert sample("tool_errors_total", tool="flaky") == before + 1
+
+
+def test_instrumented_saver_delegates_to_backend(fake_model):
+    saver = BoundedMemorySaver(max_history=2)
+    agent = LangGraphAgent(checkpointer=saver)
+    use_model(agent, fake_model(["one", "two"]))
+
+    agent.chat("hi", "t1")
+    asyncio.run(agent.achat("again", "t1"))
+
+    assert isinstance(agent.checkpointer, metrics.InstrumentedSaver)
+    assert agent.checkpointer.stats()["threads"] == 1
+    state = agent.graph.get_state({"configurable": {"thread_id": "t1"}})
+    assert [m.content for m in state.values["messages"]] == ["hi", "one", "again", "two"]
+
+
+def test_checkpointer_evictions_are_counted(fake_model):
+    before = {r: sample("checkpointer_evictions_total", reason=r) for r in ("history", "lru")}
+    saver = BoundedMemorySaver(max_history=1, max_threads=2)
+    agent = LangGraphAgent(checkpointer=saver)
+    use_model(agent, fake_model(["ok"] * 8))
+
+    for i in range(4):
+        agent.chat("hi", f"t{i}")
+
+    evictions = saver.stats()["evictions"]
+    for reason in ("history", "lru"):
+        counted = sample("checkpointer_evictions_total", reason=reason) - before[reason]
+        assert counted == evictions[reason] > 0
+
+
+def test_disabled_metrics_attach_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    monkeypatch.setattr(metrics, "_handlers", [])
+    saver = BoundedMemorySaver()
+
+    assert metrics.instrument_checkpointer(saver) is saver
+    assert metrics.callbacks() == []
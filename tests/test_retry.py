@@ -0,0 +1,175 @@
+"""
+Tests for retries of model and tool calls
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from src.agent.core import LangGraphAgent
+from src.agent.custom_nodes import RetryNode
+from src.agent.modern import ModernLangGraphAgent
+from src.agent.retry import Retrier, RetryBudget, is_retryable, retry_after
+from src.agent.tool_execution import ToolExecutor, create_tool_node
+from tests.fakes import FakeChatModel, use_model
+from tests.test_tool_execution import graph_for
+
+
+class StatusError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = httpx.Response(status, headers=headers or {})
+
+
+class FlakyModel(FakeChatModel):
+    """Fails the first ``failures`` calls with a transient error."""
+
+    failures: int = 1
+    calls: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise StatusError(503)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise StatusError(503)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+def test_error_classification():
+    assert is_retryable(ConnectionError())
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(502))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError("bad input"))
+    assert retry_after(StatusError(429, {"retry-after": "2"})) == 2.0
+
+
+def test_non_retryable_errors_fail_immediately():
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        Retrier(base_delay=0).call(bad_request)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("jitter", ["full", "decorrelated", "none"])
+def test_backoff_stays_within_bounds(jitter):
+    retrier = Retrier(base_delay=0.1, max_delay=1.0, jitter=jitter)
+    previous = retrier.base_delay
+    for attempt in range(1, 10):
+        delay = retrier.backoff(attempt, previous)
+        assert 0 <= delay <= 1.0
+        previous = delay
+    if jitter == "none":
+        assert [retrier.backoff(n, 0) for n in (1, 2, 3)] == [0.1, 0.2, 0.4]
+
+
+def test_async_retries_do_not_block_the_loop():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TimeoutError()
+        return "ok"
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        result = await Retrier(base_delay=0.05, jitter="none").acall(flaky)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    assert result == "ok" and len(attempts) == 3
+    assert ticks >= 10
+
+
+def test_budget_stops_a_retry_storm():
+    budget = RetryBudget(ratio=0.1, min_per_second=0, max_tokens=2)
+    retrier = Retrier(max_retries=5, base_delay=0, budget=budget)
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise ConnectionError()
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            retrier.call(down)
+    # 3 first attempts plus only the ~2 retries the budget allowed
+    assert len(attempts) <= 6
+
+
+def test_retry_never_outlives_the_deadline():
+    retrier = Retrier(max_retries=5, base_delay=1.0, jitter="none")
+    started = time.monotonic()
+    with pytest.raises(ConnectionError):
+        retrier.call(lambda: (_ for _ in ()).throw(ConnectionError()), deadline=started + 0.5)
+    assert time.monotonic() - started < 0.1
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_agents_retry_transient_model_errors(agent_cls):
+    agent = agent_cls(retrier=Retrier(base_delay=0.01))
+    model = FlakyModel(replies=["recovered"], failures=2)
+    use_model(agent, model)
+
+    assert agent.chat("hi", f"retry-{agent_cls.__name__}")["agent_response"] == "recovered"
+    assert asyncio.run(agent.achat("again", f"aretry-{agent_cls.__name__}"))["agent_response"] == "ok"
+    assert model.calls == 4
+
+
+def test_model_errors_surface_once_retries_are_exhausted():
+    agent = LangGraphAgent(retrier=Retrier(max_retries=1, base_delay=0))
+    use_model(agent, FlakyModel(failures=5))
+    with pytest.raises(StatusError):
+        agent.chat("hi", "exhausted")
+
+
+def test_tool_executor_retries_transient_tool_errors():
+    attempts = []
+
+    def flaky_lookup(q: str) -> str:
+        """Lookup that drops its connection once."""
+        attempts.append(q)
+        if len(attempts) == 1:
+            raise ConnectionError("reset")
+        return f"found {q}"
+
+    executor = ToolExecutor(retrier=Retrier(base_delay=0))
+    node = create_tool_node([StructuredTool.from_function(flaky_lookup)], executor)
+    message = AIMessage(content="", tool_calls=[{"name": "flaky_lookup", "args": {"q": "x"}, "id": "1"}])
+
+    result = asyncio.run(graph_for(node).ainvoke({"messages": [message]}))
+
+    assert result["messages"][-1].content == "found x"
+    assert len(attempts) == 2
+
+
+def test_retry_node():
+    node = RetryNode(max_retries=3, base_delay=0.01)
+    assert node.execute({"operation": "fail_twice"})["retry_count"] == 2
+    failed = asyncio.run(node.aexecute({"operation": "always_fail"}))
+    assert (failed["success"], failed["retry_count"]) == (False, 3)
+    assert "ConnectionError" in failed["final_error"]
@@ -0,0 +1,204 @@
+"""
+Tests for per-session serialization of agent turns
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.agent.core import LangGraphAgent
+from src.agent.modern import ModernLangGraphAgent
+from src.agent.sessions import RedisSessionLock, SessionBusyError, SessionLocks, create_session_locks
+from tests.fakes import FakeChatModel, FakeRedis, use_model
+
+
+def agent_with(agent_cls, locks, latency=0.1):
+    agent = agent_cls(session_locks=locks)
+    use_model(agent, FakeChatModel(latency=latency))
+    return agent
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_turns_on_one_session_run_in_order(agent_cls):
+    locks = SessionLocks()
+    agent = agent_with(agent_cls, locks)
+
+    async def run():
+        return await asyncio.gather(*(agent.achat(f"turn {i}", "same") for i in range(3)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+
+    assert time.perf_counter() - started >= 0.3
+    history = [m.content for m in results[-1]["messages"] if m.type == "human"]
+    assert history == ["turn 0", "turn 1", "turn 2"]
+    assert locks.active_sessions == 0
+
+
+def test_different_sessions_stay_parallel():
+    agent = agent_with(LangGraphAgent, SessionLocks())
+
+    async def run():
+        return await asyncio.gather(*(agent.achat("hi", f"session-{i}") for i in range(5)))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    assert time.perf_counter() - started < 0.3
+
+
+def test_sync_turns_are_serialized_across_threads():
+    locks = SessionLocks()
+    agent = agent_with(LangGraphAgent, locks, latency=0.05)
+    threads = [threading.Thread(target=agent.chat, args=(f"turn {i}", "threaded")) for i in range(4)]
+
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    result = agent.chat("last", "threaded")
+    assert len([m for m in result["messages"] if m.type == "human"]) == 5
+    assert locks.active_sessions == 0
+
+
+def test_sync_and_async_turns_share_the_session_lock():
+    locks = SessionLocks()
+    order = []
+
+    def sync_turn():
+        with locks.hold("mixed"):
+            order.append("sync start")
+            time.sleep(0.2)
+            order.append("sync end")
+
+    async def async_turn():
+        async with locks.ahold("mixed"):
+            order.append("async start")
+            order.append("async end")
+
+    async def run():
+        thread = threading.Thread(target=sync_turn)
+        thread.start()
+        await asyncio.sleep(0.05)
+        await async_turn()
+        thread.join()
+
+    asyncio.run(run())
+    assert order == ["sync start", "sync end", "async start", "async end"]
+    assert locks.active_sessions == 0
+
+
+def test_cancelled_waiter_passes_the_lock_on():
+    locks = SessionLocks()
+
+    async def run():
+        async with locks.ahold("s"):
+            waiter = asyncio.create_task(locks.ahold("s").__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        async with locks.ahold("s"):
+            pass
+
+    asyncio.run(asyncio.wait_for(run(), 1))
+    assert locks.active_sessions == 0
+
+
+def test_busy_session_times_out():
+    locks = SessionLocks(timeout=0.05)
+
+    async def run():
+        async with locks.ahold("s"):
+            with pytest.raises(SessionBusyError):
+                async with locks.ahold("s"):
+                    pass
+
+    asyncio.run(run())
+    assert locks.active_sessions == 0
+
+
+def test_stream_holds_the_lock_until_consumed():
+    locks = SessionLocks(timeout=0.05)
+    agent = agent_with(LangGraphAgent, locks, latency=0)
+
+    async def run():
+        stream = agent.astream_chat("hi", "streamed")
+        await stream.__anext__()
+        assert locks.active_sessions == 1
+        with pytest.raises(SessionBusyError):
+            await agent.achat("again", "streamed")
+        async for _ in stream:
+            pass
+        return await agent.achat("again", "streamed")
+
+    assert asyncio.run(run())["agent_response"] == "ok"
+
+
+def test_redis_lock_serializes_replicas():
+    client = FakeRedis()
+    replica_a = SessionLocks(distributed=RedisSessionLock(client, ttl_seconds=5, poll_interval=0.01))
+    replica_b = SessionLocks(timeout=0.05, distributed=RedisSessionLock(client, poll_interval=0.01))
+    order = []
+
+    async def turn(locks, name, hold):
+        async with locks.ahold("shared"):
+            order.append(f"{name} start")
+            await asyncio.sleep(hold)
+            order.append(f"{name} end")
+
+    async def run():
+        first = asyncio.create_task(turn(replica_a, "a", 0.2))
+        await asyncio.sleep(0.02)
+        assert list(client.expiry.values()) == [5.0]
+        with pytest.raises(SessionBusyError):
+            await turn(replica_b, "b", 0)
+        await first
+        await turn(replica_b, "b", 0)
+
+    asyncio.run(run())
+    assert order == ["a start", "a end", "b start", "b end"]
+    assert client.data == {}
+
+
+def test_redis_release_only_deletes_own_lock():
+    client = FakeRedis()
+    lock = RedisSessionLock(client)
+    token = lock.acquire("s", timeout=0)
+    lock.release("s", "someone-else")
+    assert lock.try_acquire("s") is None
+    lock.release("s", token)
+    assert lock.try_acquire("s") is not None
+
+
+def test_busy_session_maps_to_409(monkeypatch):
+    from src.api import routes
+
+    async def busy(message, session_id, deadline=None):
+        raise SessionBusyError("Session 'x' is busy")
+
+    monkeypatch.setattr(routes.agent, "achat", busy)
+
+    async def run():
+        transport = httpx.ASGITransport(app=routes.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat", json={"message": "hi", "session_id": "x"})
+
+    response = asyncio.run(run())
+    assert response.status_code == 409
+    assert response.headers["retry-after"] == "1"
+
+
+def test_create_session_locks_from_env(monkeypatch):
+    monkeypatch.setenv("SESSION_LOCK_TIMEOUT_SECONDS", "0")
+    monkeypatch.delenv("SESSION_LOCKS", raising=False)
+    locks = create_session_locks()
+    assert locks.timeout is None and locks.distributed is None
+
+    monkeypatch.setenv("SESSION_LOCKS", "redis")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    with pytest.raises(ValueError, match="REDIS_URL"):
+        create_session_locks()
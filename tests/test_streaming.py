@@ -0,0 +1,86 @@
+"""
+Tests for token-level SSE streaming
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.api.streaming import event_stream
+from tests.fakes import use_model
+
+
+def parse_frames(body: str):
+    """Split an SSE body into (id, data) pairs, skipping comments."""
+    frames = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            frames.append((int(fields["id"]), json.loads(fields["data"])))
+    return frames
+
+
+@pytest.mark.parametrize("path,attr", [("/chat/stream", "agent"), ("/chat/stream/modern", "modern_agent")])
+def test_stream_forwards_tokens_with_event_ids(path, attr, fake_model):
+    from src.api import routes
+
+    use_model(getattr(routes, attr), fake_model([
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"message": "x"}, "id": "call_1"}]),
+        "hello streaming world",
+    ]))
+
+    async def run():
+        transport = httpx.ASGITransport(app=routes.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json={"message": "hi", "session_id": "stream-1"})
+
+    response = asyncio.run(run())
+    frames = parse_frames(response.text)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [i for i, _ in frames] == list(range(1, len(frames) + 1))
+    kinds = [data["chunk_type"] for _, data in frames]
+    assert kinds[0] == "tools" and kinds[-1] == "end"
+    tokens = [data["content"] for _, data in frames if data["chunk_type"] == "token"]
+    assert tokens == ["hello", " streaming", " world"]
+
+
+class FakeRequest:
+    """Minimal stand-in for a Starlette request."""
+
+    def __init__(self):
+        self.scope = {}
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def test_event_stream_sends_heartbeats_and_cancels_on_disconnect():
+    request = FakeRequest()
+    cancelled = asyncio.Event()
+
+    async def slow_events():
+        try:
+            yield {"chunk_type": "token", "content": "a"}
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def run():
+        frames = []
+        async for frame in event_stream(request, slow_events(), heartbeat_interval=0.01):
+            frames.append(frame)
+            if frame.startswith(":"):
+                request.disconnected = True
+        return frames
+
+    frames = asyncio.run(run())
+
+    assert frames[0].startswith("id: 1\n")
+    assert frames[1] == ": heartbeat\n\n"
+    assert cancelled.is_set()
@@ -0,0 +1,170 @@
+"""
+Tests for tool result memoization
+"""
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from src.agent import metrics
+from src.agent.core import LangGraphAgent
+from src.agent.modern import ModernLangGraphAgent
+from src.agent.tool_cache import (
+    CACHE_POLICIES,
+    CachedToolExecutor,
+    CachePolicy,
+    ToolResultCache,
+    create_tool_cache,
+)
+from src.agent.tool_execution import ToolExecutor, create_tool_node
+from tests.fakes import FakeChatModel, use_model
+from tests.test_tool_execution import graph_for
+
+calls_made = []
+
+
+@tool
+def square(n: int, note: str = "") -> str:
+    """Square a number."""
+    calls_made.append(n)
+    return str(n * n)
+
+
+@tool
+def slow(n: int) -> str:
+    """Takes longer than its timeout."""
+    calls_made.append(n)
+    time.sleep(0.2)
+    return str(n)
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls_made.clear()
+
+
+def policies(*names, **kwargs):
+    return {name: CachePolicy(**kwargs) for name in names}
+
+
+def test_registry_tools_opt_in():
+    assert {"calculate", "echo"} <= set(CACHE_POLICIES)
+    assert "get_current_time" not in CACHE_POLICIES
+
+
+def test_executor_caches_and_invalidates():
+    executor = CachedToolExecutor(cache_size=10, ttl=300)
+
+    first = executor.execute("calculate", {"expression": "6*7"})
+    second = executor.execute("calculate", {"expression": "6*7"})
+    executor.invalidate_cache("calculate")
+    executor.execute("calculate", {"expression": "6*7"})
+
+    assert first == second == "Result: 6*7 = 42"
+    stats = executor.get_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+
+def test_uncached_tools_always_run():
+    executor = CachedToolExecutor()
+    executor.execute("get_current_time", {})
+    executor.execute("get_current_time", {})
+    assert executor.get_cache_stats()["entries"] == 0
+    with pytest.raises(KeyError):
+        executor.execute("missing", {})
+
+
+def test_keys_use_the_validated_arguments():
+    executor = CachedToolExecutor(tools={"square": square}, cache=ToolResultCache(policies=policies("square")))
+
+    executor.execute("square", {"n": 3})
+    executor.execute("square", {"n": "3", "note": ""})
+    executor.execute("square", {"n": 4})
+
+    assert calls_made == [3, 4]
+
+
+def test_lru_ttl_and_size_cap():
+    cache = ToolResultCache(max_entries=2, ttl_seconds=None, policies=policies("t"))
+    a, b, c = (cache.key_for("t", {"x": i}) for i in range(3))
+    cache.set(a, "a")
+    cache.set(b, "b")
+    cache.get(a)
+    cache.set(c, "c")
+    assert cache.get(b) is None and cache.get(a) == ("a", None) and len(cache) == 2
+
+    small = ToolResultCache(max_bytes=10, policies=policies("t"))
+    small.set(a, "12345")
+    small.set(b, "67890")
+    small.set(c, "x" * 11)
+    assert len(small) == 2 and small.size_bytes == 10
+    small.set(c, "z")
+    assert small.get(a) is None and small.size_bytes == 6
+
+    short = ToolResultCache(policies=policies("t", ttl_seconds=0.05))
+    short.set(a, "a")
+    time.sleep(0.1)
+    assert short.get(a) is None
+
+
+def test_tools_node_serves_hits_and_skips_errors():
+    cache = ToolResultCache(policies=policies("square", "slow"))
+    executor = ToolExecutor(timeouts={"slow": 0.05}, cache=cache)
+    graph = graph_for(create_tool_node([square, slow], executor))
+
+    def run(*tool_calls):
+        state = {"messages": [AIMessage(content="", tool_calls=list(tool_calls))]}
+        return asyncio.run(graph.ainvoke(state))["messages"][1:]
+
+    run({"name": "square", "args": {"n": 5}, "id": "a"}, {"name": "slow", "args": {"n": 1}, "id": "b"})
+    messages = run({"name": "square", "args": {"n": 5}, "id": "c"}, {"name": "slow", "args": {"n": 1}, "id": "d"})
+
+    assert calls_made == [5, 1, 1]
+    assert (messages[0].content, messages[0].tool_call_id, messages[0].name) == ("25", "c", "square")
+    assert messages[1].status == "error"
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_agents_share_cached_results_across_sessions(agent_cls, monkeypatch):
+    from src.agent import tool_execution
+
+    cache = ToolResultCache()
+    monkeypatch.setattr(tool_execution, "_default", ToolExecutor(cache=cache))
+    call = {"name": "calculate", "args": {"expression": "2+2"}, "id": "c1"}
+    model = FakeChatModel(replies=[AIMessage(content="", tool_calls=[call]), "4",
+                                   AIMessage(content="", tool_calls=[{**call, "id": "c2"}]), "4"])
+    agent = agent_cls()
+    use_model(agent, model)
+
+    agent.chat("2+2?", "session-a")
+    result = asyncio.run(agent.achat("2+2?", "session-b"))
+
+    assert cache.stats["hits"] == 1
+    assert [m.content for m in result["messages"] if m.type == "tool"] == ["Result: 2+2 = 4"]
+
+
+@pytest.mark.skipif(not metrics.ENABLED, reason="prometheus_client not installed")
+def test_hits_and_misses_are_exported():
+    def count(result):
+        return metrics.registry.get_sample_value(
+            "tool_cache_requests_total", {"tool": "echo", "result": result}) or 0.0
+
+    before = count("hit"), count("miss")
+    executor = CachedToolExecutor()
+    executor.execute("echo", {"message": "hi"})
+    executor.execute("echo", {"message": "hi"})
+
+    assert (count("hit"), count("miss")) == (before[0] + 1, before[1] + 1)
+
+
+def test_create_tool_cache_from_env(monkeypatch):
+    monkeypatch.setenv("TOOL_CACHE", "false")
+    assert create_tool_cache() is None
+    monkeypatch.setenv("TOOL_CACHE", "true")
+    monkeypatch.setenv("TOOL_CACHE_MAX_ENTRIES", "5")
+    monkeypatch.setenv("TOOL_CACHE_TTL_SECONDS", "0")
+    cache = create_tool_cache()
+    assert (cache.max_entries, cache.ttl_seconds) == (5, None)
@@ -0,0 +1,148 @@
+"""
+Tests for concurrent tool execution
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from src.agent.core import LangGraphAgent
+from src.agent.modern import ModernLangGraphAgent
+from src.agent.tool_execution import ToolExecutor, create_tool_node
+from tests.fakes import FakeChatModel, use_model
+
+
+@tool
+def slow_sync(label: str) -> str:
+    """Sleep briefly, then echo the label."""
+    time.sleep(0.2)
+    return f"sync:{label}:{threading.current_thread().name}"
+
+
+@tool
+async def slow_async(label: str, delay: float = 0.2) -> str:
+    """Sleep briefly without blocking, then echo the label."""
+    await asyncio.sleep(delay)
+    return f"async:{label}"
+
+
+def calls(name, *labels, **extra):
+    return [{"name": name, "args": {"label": label, **extra}, "id": f"call-{label}"} for label in labels]
+
+
+def graph_for(node):
+    """ToolNode needs a graph runtime; wrap it in a one-node graph."""
+    graph = StateGraph(MessagesState)
+    graph.add_node("tools", node)
+    graph.add_edge(START, "tools")
+    graph.add_edge("tools", END)
+    return graph.compile()
+
+
+def run_node(node, tool_calls):
+    state = {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+    return asyncio.run(graph_for(node).ainvoke(state))["messages"][1:]
+
+
+def test_async_tools_run_concurrently_and_keep_call_order():
+    node = create_tool_node([slow_async], ToolExecutor(max_workers=2))
+    # Later calls finish first
+    tool_calls = [{"name": "slow_async", "args": {"label": str(i), "delay": 0.2 - i * 0.04}, "id": f"call-{i}"}
+                  for i in range(5)]
+
+    started = time.perf_counter()
+    messages = run_node(node, tool_calls)
+
+    assert time.perf_counter() - started < 0.5
+    assert [m.tool_call_id for m in messages] == [c["id"] for c in tool_calls]
+    assert [m.content for m in messages] == [f"async:{i}" for i in range(5)]
+
+
+def test_sync_tools_run_on_the_bounded_pool():
+    executor = ToolExecutor(max_workers=2)
+    node = create_tool_node([slow_sync], executor)
+
+    started = time.perf_counter()
+    messages = run_node(node, calls("slow_sync", "a", "b", "c", "d"))
+    elapsed = time.perf_counter() - started
+
+    # Four 0.2s calls on two workers: two rounds
+    assert 0.35 < elapsed < 0.7
+    assert all(m.content.startswith(f"sync:{label}:tool") for m, label in zip(messages, "abcd"))
+
+
+def test_timed_out_call_returns_error_without_failing_the_batch():
+    executor = ToolExecutor(timeout=1.0, timeouts={"slow_async": 0.05})
+    node = create_tool_node([slow_async, slow_sync], executor)
+
+    messages = run_node(node, calls("slow_async", "late") + calls("slow_sync", "ok"))
+
+    assert messages[0].status == "error"
+    assert "timed out after 0.05s" in messages[0].content
+    assert messages[1].content.startswith("sync:ok")
+
+
+def test_sync_invoke_applies_timeout():
+    node = create_tool_node([slow_sync], ToolExecutor(timeout=0.05))
+    state = {"messages": [AIMessage(content="", tool_calls=calls("slow_sync", "x"))]}
+
+    message = graph_for(node).invoke(state)["messages"][1]
+
+    assert message.status == "error"
+    assert message.tool_call_id == "call-x"
+
+
+
+def test_timed_out_calls_are_cancelled_and_a_stuck_pool_fails_fast():
+    started = []
+    release = threading.Event()
+
+    @tool
+    def hangs(label: str) -> str:
+        """Block until released."""
+        started.append(label)
+        release.wait(5)
+        return label
+
+    executor = ToolExecutor(max_workers=1, timeout=0.05)
+    graph = graph_for(create_tool_node([hangs], executor))
+    state = {"messages": [AIMessage(content="", tool_calls=calls("hangs", "a", "b"))]}
+
+    first = graph.invoke(state)["messages"][1:]
+    assert [m.status for m in first] == ["error", "error"]
+    assert executor.abandoned == 1 and executor.saturated()
+
+    # The pool's only thread is stuck: new calls are refused without waiting
+    again = time.perf_counter()
+    refused = run_node(create_tool_node([hangs], executor), calls("hangs", "c"))[0]
+    assert time.perf_counter() - again < 0.05
+    assert "stuck in timed-out calls" in refused.content
+
+    release.set()
+    executor.pool.submit(lambda: None).result(timeout=5)
+    assert len(started) == 1, "the queued call was cancelled, not run late"
+    assert executor.abandoned == 0 and not executor.saturated()
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_agents_execute_parallel_tool_calls(agent_cls):
+    model = FakeChatModel(replies=[
+        AIMessage(content="", tool_calls=[
+            {"name": "calculate", "args": {"expression": "6*7"}, "id": "c1"},
+            {"name": "echo", "args": {"message": "hi"}, "id": "c2"},
+        ]),
+        "done",
+    ])
+    agent = agent_cls()
+    use_model(agent, model)
+
+    result = asyncio.run(agent.achat("do both", "parallel-tools"))
+
+    tool_messages = [m for m in result["messages"] if m.type == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == ["c1", "c2"]
+    assert "42" in tool_messages[0].content
+    assert sorted(result["tools_used"]) == ["calculate", "echo"]
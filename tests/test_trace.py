@@ -0,0 +1,97 @@
+"""
+Tests for request trace recording and replay
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.trace import TraceMiddleware, TraceRecorder, _sampled, load_trace, replay, summarize
+from tests.fakes import use_model
+
+
+@pytest.fixture
+def traced_app(tmp_path, fake_model):
+    from src.api import routes
+
+    use_model(routes.agent, fake_model(latency=0.05))
+
+    def _make(**kwargs):
+        recorder = TraceRecorder(str(tmp_path / "trace.jsonl"), **kwargs)
+        return TraceMiddleware(routes.app, recorder), recorder
+    return _make
+
+
+def send(app, calls):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await calls(client)
+    return asyncio.run(run())
+
+
+def test_recorder_captures_shape_timing_and_interleaving(traced_app):
+    app, recorder = traced_app()
+
+    async def calls(client):
+        await client.post("/chat", json={"message": "hello", "session_id": "a"})
+        await asyncio.gather(
+            client.post("/chat", json={"message": "again", "session_id": "a"}, headers={"X-Request-Timeout": "5"}),
+            client.post("/chat", json={"message": "other", "session_id": "b"}),
+        )
+        await client.get("/health")
+    send(app, calls)
+    recorder.close()
+
+    records = load_trace(recorder.path)
+    assert len(records) == 3, "only chat routes are recorded"
+    first, *rest = records
+    assert first["session_id"] == "a" and first["turn"] == 0
+    assert first["message_chars"] == 5 and "message" not in first
+    assert first["route"] == "/chat" and first["status"] == 200 and first["duration"] >= 0.05
+    again = next(r for r in rest if r["session_id"] == "a")
+    assert again["turn"] == 1 and again["timeout"] == "5"
+    assert max(r["in_flight"] for r in rest) == 2
+
+
+def test_messages_are_kept_only_when_asked(traced_app):
+    app, recorder = traced_app(capture_messages=True)
+
+    async def calls(client):
+        await client.post("/chat/stream?mode=updates", json={"message": "hi there", "session_id": "s"})
+    send(app, calls)
+    recorder.close()
+
+    record, = load_trace(recorder.path)
+    assert record["message"] == "hi there" and record["query"] == "mode=updates"
+    assert record["first_byte"] is not None and record["bytes"] > 0
+
+
+def test_sampling_keeps_sessions_whole():
+    assert all(_sampled("session-1", 0.5) == _sampled("session-1", 0.5) for _ in range(5))
+    kept = sum(_sampled(f"s{i}", 0.25) for i in range(2000))
+    assert 400 < kept < 600
+
+
+def test_replay_keeps_session_order_and_compares_with_the_recording(traced_app):
+    app, _ = traced_app()
+    records = [
+        {"t": 0.0, "method": "POST", "path": "/chat", "session_id": "a", "turn": 0, "message_chars": 12,
+         "status": 200, "duration": 0.5},
+        {"t": 0.0, "method": "POST", "path": "/chat", "session_id": "a", "turn": 1, "message_chars": 3,
+         "status": 200, "duration": 0.5},
+        {"t": 0.01, "method": "POST", "path": "/chat", "session_id": "b", "turn": 0, "message_chars": 40,
+         "status": 500, "duration": 0.5},
+    ]
+
+    results = send(app, lambda client: replay(client, records, speed=2))
+
+    assert [r["status"] for r in results] == [200, 200, 200]
+    a0, a1, b0 = results
+    assert a1["session_wait"] >= 0.04 > a0["session_wait"], "second turn waits for the first"
+    assert a0["finished"] < a1["finished"]
+    summary = summarize(results)
+    assert summary["requests"] == 3 and summary["status_changes"] == 1 and summary["errors"] == 0
+    assert summary["replayed"]["p50"] < summary["recorded"]["p50"]
+    assert set(summary["by_turn"]) == {"1", "2"}
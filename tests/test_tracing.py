@@ -0,0 +1,120 @@
+"""
+Tests for node-level execution tracing
+"""
+
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from src.agent import tracing
+from src.agent.core import LangGraphAgent
+from src.agent.fake_llm import ScriptedChatModel
+from src.agent.modern import ModernLangGraphAgent
+from src.agent.tracing import FileSpanExporter, HttpSpanExporter, Tracer
+
+
+@pytest.mark.parametrize("agent_cls", [LangGraphAgent, ModernLangGraphAgent])
+def test_turn_produces_a_root_span_with_node_children(agent_cls):
+    agent = agent_cls(llm=ScriptedChatModel(tool_rate=1.0))
+    tracer = Tracer()
+
+    with tracer.activate():
+        agent.chat("ping", "traced")
+    agent.chat("ping", "untraced")
+
+    spans = tracer.spans()
+    root = spans[-1]
+    nodes = spans[:-1]
+    assert root.parent_id is None and root.attributes["session.id"] == "traced"
+    assert {s.trace_id for s in spans} == {root.trace_id}
+    assert all(s.parent_id == root.span_id for s in nodes)
+    assert [s.name for s in nodes if s.name != "pre_model_hook"] == ["agent", "tools", "agent"]
+    assert all(root.start_ns <= s.start_ns <= s.end_ns <= root.end_ns for s in nodes)
+
+
+def test_async_turns_are_traced():
+    agent = LangGraphAgent(llm=ScriptedChatModel())
+    tracer = Tracer()
+
+    async def run():
+        with tracer.activate():
+            await agent.achat("hi", "s")
+
+    asyncio.run(run())
+    assert [s.name for s in tracer.spans()][:1] == ["agent"]
+
+
+def test_ring_buffer_keeps_the_latest_spans():
+    agent = LangGraphAgent(llm=ScriptedChatModel())
+    tracer = Tracer(capacity=4)
+
+    with tracer.activate():
+        for i in range(3):
+            agent.chat("hi", f"s{i}")
+
+    spans = tracer.spans()
+    assert len(spans) == 4 and tracer.dropped == 2
+    assert spans[-1].attributes["session.id"] == "s2"
+
+
+def test_unsampled_turns_record_nothing():
+    agent = LangGraphAgent(llm=ScriptedChatModel())
+    tracer = Tracer(sample_rate=0.0)
+    with tracer.activate():
+        agent.chat("hi", "s")
+    assert tracer.spans() == []
+
+
+def test_failed_nodes_carry_an_error_status():
+    tracer = Tracer()
+    root, node = uuid.uuid4(), uuid.uuid4()
+    tracer.handler.on_chain_start(None, {}, run_id=root, name="LangGraph")
+    tracer.handler.on_chain_start(None, {}, run_id=node, parent_run_id=root, name="agent",
+                                  metadata={"langgraph_node": "agent", "langgraph_step": 1})
+    tracer.handler.on_chain_error(ValueError("boom"), run_id=node)
+
+    span, = tracer.spans()
+    assert span.error == "ValueError: boom"
+    assert span.to_otlp()["status"] == {"code": 2, "message": "ValueError: boom"}
+
+
+def test_flush_exports_otlp_json_to_a_file(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    agent = LangGraphAgent(llm=ScriptedChatModel())
+    tracer = Tracer(exporter=FileSpanExporter(str(path)))
+    with tracer.activate():
+        agent.chat("hi", "s")
+
+    assert tracer.flush() == 2
+    assert tracer.spans() == [] and tracer.flush() == 0
+
+    document, = [json.loads(line) for line in path.read_text().splitlines()]
+    resource_spans, = document["resourceSpans"]
+    assert resource_spans["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "langgraph-agent"}}
+    ]
+    node, root = resource_spans["scopeSpans"][0]["spans"]
+    assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16 and "parentSpanId" not in root
+    assert node["parentSpanId"] == root["spanId"] and node["name"] == "agent"
+    assert int(node["endTimeUnixNano"]) >= int(node["startTimeUnixNano"])
+    assert {"key": "langgraph.step", "value": {"intValue": "1"}} in node["attributes"]
+
+
+def test_http_exporter_posts_to_the_collector(monkeypatch):
+    posted = []
+
+    class Accepted:
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(tracing.httpx, "post", lambda url, json, timeout: posted.append((url, json)) or Accepted())
+    tracer = Tracer(exporter=HttpSpanExporter("http://collector:4318/v1/traces"))
+    with tracer.activate():
+        LangGraphAgent(llm=ScriptedChatModel()).chat("hi", "s")
+    tracer.flush()
+
+    (url, body), = posted
+    assert url == "http://collector:4318/v1/traces"
+    assert len(body["resourceSpans"][0]["scopeSpans"][0]["spans"]) == 2